@@ -0,0 +1,90 @@
+"""
+Benchmark: cost of the daily HitCount upsert as the table grows.
+
+Run explicitly (not collected by the regular test run):
+
+    pytest benchmarks/bench_hitcount.py -s
+
+BENCH_HITCOUNT_ROWS sets the size of the large table (default 1,000,000).
+"""
+import os
+import statistics
+import time
+from datetime import timedelta
+
+import pytest
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.utils import timezone
+
+from mainapp.models import Blog, HitCount
+
+SMALL_ROWS = 10_000
+LARGE_ROWS = int(os.environ.get('BENCH_HITCOUNT_ROWS', 1_000_000))
+OBJECTS = 1_000
+SAMPLES = 300
+BATCH_SIZE = 50_000
+
+
+def _seed(content_type, start, stop):
+    """Inserts HitCount rows ``start``..``stop`` spread over OBJECTS objects and consecutive past days."""
+    today = timezone.localdate()
+    for batch_start in range(start, stop, BATCH_SIZE):
+        HitCount.objects.bulk_create([
+            HitCount(
+                content_type=content_type,
+                object_id=n % OBJECTS + 1,
+                day=today - timedelta(days=n // OBJECTS + 1),
+                hits=1,
+            )
+            for n in range(batch_start, min(batch_start + BATCH_SIZE, stop))
+        ])
+
+
+def _median_ms(func):
+    timings = []
+    for n in range(SAMPLES):
+        started = time.perf_counter()
+        func(n)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def _measure(content_type):
+    today = timezone.localdate()
+    upsert = _median_ms(lambda n: HitCount.objects._apply_counts(today, {(content_type.id, n % OBJECTS + 1): 1}))
+    # The pre-`day` lookup, kept for comparison: the date cast defeats the index.
+    legacy = _median_ms(lambda n: HitCount.objects.filter(
+        content_type=content_type, object_id=n % OBJECTS + 1, created_at__date=today,
+    ).first())
+    return upsert, legacy
+
+
+@pytest.mark.django_db
+def test_daily_upsert_cost_is_flat():
+    content_type = ContentType.objects.get_for_model(Blog)
+
+    _seed(content_type, 0, SMALL_ROWS)
+    small_upsert, small_legacy = _measure(content_type)
+
+    _seed(content_type, SMALL_ROWS, LARGE_ROWS)
+    large_upsert, large_legacy = _measure(content_type)
+
+    print(
+        f'\nHitCount rows      {SMALL_ROWS:>12,} {LARGE_ROWS:>12,}'
+        f'\nday upsert (ms)    {small_upsert:>12.3f} {large_upsert:>12.3f}'
+        f'\ncreated_at__date   {small_legacy:>12.3f} {large_legacy:>12.3f}'
+    )
+
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'EXPLAIN QUERY PLAN SELECT id FROM mainapp_hitcount '
+                'WHERE content_type_id = %s AND object_id = %s AND day = %s',
+                [content_type.id, 1, timezone.localdate().isoformat()],
+            )
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        assert 'unique_hitcount_per_day' in plan or 'sqlite_autoindex' in plan, plan
+
+    # Index lookups grow logarithmically; allow generous noise.
+    assert large_upsert < small_upsert * 3
@@ -0,0 +1,153 @@
+"""
+Benchmark: query budget and render latency for every public URL.
+
+Run explicitly (not collected by the regular test run):
+
+    pytest benchmarks/bench_views.py -s
+
+The database is filled by the ``seed_scale_dataset`` command; the BENCH_SEED_*
+variables override its sizes (e.g. BENCH_SEED_HITCOUNTS=100000 for a quick run).
+Results are written as JSON to BENCH_OUTPUT (default bench_results.json) so two
+commits can be compared with ``python benchmarks/compare.py old.json new.json``.
+"""
+import json
+import os
+import statistics
+import subprocess
+import time
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from mainapp import urls
+from mainapp.models import Blog, Project, Tag
+
+SEED_OPTIONS = {
+    name: int(os.environ.get(f'BENCH_SEED_{name.upper()}', default))
+    for name, default in (
+        ('projects', 200), ('images', 6), ('facts', 4), ('blogs', 500),
+        ('banners', 5), ('clients', 40), ('testimonials', 10), ('hitcounts', 1_000_000),
+    )
+}
+SAMPLES = int(os.environ.get('BENCH_SAMPLES', 30))
+OUTPUT = os.environ.get('BENCH_OUTPUT', 'bench_results.json')
+
+# Queries allowed for an anonymous render with a cold cache. A view that
+# starts issuing one query per row will blow through these at scale. Pages with
+# images include the one query that primes their responsive image derivatives.
+QUERY_BUDGETS = {
+    'homepage': 6,
+    'project_list': 4,
+    'project_detail': 4,
+    'blog_list': 4,
+    'blog_tag': 5,
+    'blog_detail': 4,
+    'hit_beacon': 2,
+    'search': 4,
+    'contact': 0,
+    'about': 2,
+    'technology_products': 0,
+    'services': 0,
+    'sustainability': 0,
+}
+
+
+@pytest.fixture(scope='module')
+def seeded(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        call_command('seed_scale_dataset', stdout=open(os.devnull, 'w'), **SEED_OPTIONS)
+        project = Project.objects.filter(status=Project.Status.PUBLISHED).order_by('id').first()
+        blog = Blog.objects.published().order_by('id').first()
+        tag = Tag.objects.in_use().first()
+    return {'project': project, 'blog': blog, 'tag': tag}
+
+
+def _requests(seeded):
+    """Yields ``(url name, method, path)`` for every pattern in mainapp/urls.py."""
+    kwargs = {
+        'project_detail': {'slug': seeded['project'].slug},
+        'blog_detail': {'slug': seeded['blog'].slug},
+        'blog_tag': {'slug': seeded['tag'].slug},
+        'hit_beacon': {'model': 'project', 'pk': seeded['project'].pk},
+    }
+    # A prefix query, so the search budget covers the term lookup and postings reads.
+    query_strings = {'search': '?q=geo'}
+    for pattern in urls.urlpatterns:
+        path = reverse(f'{urls.app_name}:{pattern.name}', kwargs=kwargs.get(pattern.name))
+        path += query_strings.get(pattern.name, '')
+        yield pattern.name, 'post' if pattern.name == 'hit_beacon' else 'get', path
+
+
+def _percentiles(timings):
+    timings = sorted(timings)
+    return {
+        'p50_ms': round(statistics.median(timings) * 1000, 3),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 3),
+    }
+
+
+def _time(client, method, path, cold):
+    timings = []
+    for _ in range(SAMPLES):
+        if cold:
+            cache.clear()
+        started = time.perf_counter()
+        getattr(client, method)(path)
+        timings.append(time.perf_counter() - started)
+    return _percentiles(timings)
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@pytest.mark.django_db
+def test_views_within_query_budget(seeded, client, settings):
+    settings.PAGE_CACHE_TIMEOUT = 60 * 60
+    results = {}
+    over_budget = []
+
+    for name, method, path in _requests(seeded):
+        assert name in QUERY_BUDGETS, f'No query budget for new URL {name!r}; add one to QUERY_BUDGETS.'
+
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(client, method)(path)
+        assert response.status_code in (200, 204), (name, response.status_code)
+        if len(queries) > QUERY_BUDGETS[name]:
+            over_budget.append(f'{name}: {len(queries)} > {QUERY_BUDGETS[name]}')
+
+        results[name] = {
+            'path': path,
+            'queries': len(queries),
+            'budget': QUERY_BUDGETS[name],
+            'uncached': _time(client, method, path, cold=True),
+            'cached': _time(client, method, path, cold=False),
+        }
+
+    with open(OUTPUT, 'w') as fh:
+        json.dump({
+            'commit': _git_commit(),
+            'vendor': connection.vendor,
+            'samples': SAMPLES,
+            'dataset': SEED_OPTIONS,
+            'views': results,
+        }, fh, indent=2)
+
+    print(f'\n{"view":<22}{"queries":>8}{"budget":>8}{"cold p50":>10}{"cold p95":>10}{"warm p50":>10}{"warm p95":>10}')
+    for name, result in results.items():
+        print(
+            f'{name:<22}{result["queries"]:>8}{result["budget"]:>8}'
+            f'{result["uncached"]["p50_ms"]:>10.2f}{result["uncached"]["p95_ms"]:>10.2f}'
+            f'{result["cached"]["p50_ms"]:>10.2f}{result["cached"]["p95_ms"]:>10.2f}'
+        )
+    print(f'Results written to {OUTPUT}')
+
+    assert not over_budget, over_budget
@@ -0,0 +1,45 @@
+"""
+Compares two bench_views.py result files:
+
+    python benchmarks/compare.py old.json new.json
+
+Exits non-zero when a view issues more queries than before.
+"""
+import json
+import sys
+
+
+def load(path):
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def main(old_path, new_path):
+    old, new = load(old_path), load(new_path)
+    print(f'{(old["commit"] or "?")[:10]} -> {(new["commit"] or "?")[:10]}')
+    print(f'{"view":<22}{"queries":>12}{"cold p50 ms":>22}{"warm p50 ms":>22}')
+
+    regressed = []
+    for name, after in new['views'].items():
+        before = old['views'].get(name)
+        if before is None:
+            print(f'{name:<22}{after["queries"]:>12}  (new)')
+            continue
+        if after['queries'] > before['queries']:
+            regressed.append(name)
+        print(
+            f'{name:<22}{before["queries"]:>5} -> {after["queries"]:<4}'
+            f'{before["uncached"]["p50_ms"]:>10.2f} -> {after["uncached"]["p50_ms"]:<8.2f}'
+            f'{before["cached"]["p50_ms"]:>10.2f} -> {after["cached"]["p50_ms"]:<8.2f}'
+        )
+
+    if regressed:
+        print(f'More queries than before: {", ".join(regressed)}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit(__doc__)
+    sys.exit(main(*sys.argv[1:]))
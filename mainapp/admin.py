@@ -1,10 +1,34 @@
 from django.contrib import admin
-from django.db.models import Sum
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ORDER_VAR
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseRedirect, StreamingHttpResponse
+from django.urls import NoReverseMatch, path, reverse
+from django.utils import timezone
 from django.utils.html import format_html
 from .models import (
     ServiceCategory, Clientele, Testimonial, Testimonial, TeamMember, Leadership, HomepageTestimonial,
-    Project, ProjectImage, ProjectFact, Blog, ContactSubmission, HitCount, ProjectHomeBanner
+    Project, ProjectImage, ProjectFact, Blog, ContactSubmission, HitCount, HitCountTotal, ProjectHomeBanner,
+    MediaReference, OutboxMessage, ContactDigest,
 )
+from . import fulltext
+from .utils import stream_csv, stream_jsonl
+
+class FullTextSearchMixin:
+    """
+    Answers the changelist search from the full-text index (settings.ADMIN_FULL_TEXT_SEARCH)
+    and, unless a column is sorted, lists the best matches first.
+    """
+    def get_search_results(self, request, queryset, search_term):
+        enabled = fulltext.is_enabled(self.model, using=queryset.db)
+        results = fulltext.search(queryset, search_term) if enabled else None
+        if results is None:
+            return super().get_search_results(request, queryset, search_term)
+        queryset = results
+        if ORDER_VAR not in request.GET:
+            queryset = queryset.order_by('-search_rank', '-pk')
+        return queryset, False
+
 
 class ServiceCategoryAdmin(admin.ModelAdmin):
     list_display = ('name', 'created_at')
@@ -36,9 +60,11 @@ class ProjectFactInline(admin.TabularInline):
     extra = 1
 
 @admin.register(Project)
-class ProjectAdmin(admin.ModelAdmin):
+class ProjectAdmin(FullTextSearchMixin, admin.ModelAdmin):
     save_on_top = False
-    list_display = ('title', 'status', 'feature_on_project_page', 'created_at', 'main_image')
+    list_display = ('title', 'status', 'feature_on_project_page', 'created_at', 'main_image', 'hit_count_display')
+    # main_image's __str__ falls back to its project's title.
+    list_select_related = ('main_image__project',)
     list_filter = ('status', 'feature_on_project_page', 'created_at')
     search_fields = ('title', 'brief_description')
     prepopulated_fields = {'slug': ('title',)}
@@ -46,11 +72,18 @@ class ProjectAdmin(admin.ModelAdmin):
 
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
+        # Totals are precomputed by recompute_hit_counts; one indexed lookup per row.
+        queryset = queryset.annotate(total_hits=HitCountTotal.objects.total_for(Project))
         return queryset
 
+    def hit_count_display(self, obj):
+        return obj.total_hits
+    hit_count_display.short_description = 'Total Hits'
+    hit_count_display.admin_order_field = 'total_hits'
+
 
 @admin.register(Blog)
-class BlogAdmin(admin.ModelAdmin):
+class BlogAdmin(FullTextSearchMixin, admin.ModelAdmin):
     save_on_top = False
     list_display = ('title', 'status', 'published_date', 'hit_count_display')
     list_filter = ('status', 'published_date')
@@ -59,50 +92,143 @@ class BlogAdmin(admin.ModelAdmin):
 
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
-        queryset = queryset.annotate(total_hits=Sum('hitcount__hits'))
+        # Totals are precomputed by recompute_hit_counts; one indexed lookup per row.
+        queryset = queryset.annotate(total_hits=HitCountTotal.objects.total_for(Blog))
         return queryset
 
     def hit_count_display(self, obj):
-        return obj.total_hits or 0
+        return obj.total_hits
     hit_count_display.short_description = 'Total Hits'
     hit_count_display.admin_order_field = 'total_hits'
 
 @admin.register(ContactSubmission)
-class ContactSubmissionAdmin(admin.ModelAdmin):
-    list_display = ('first_name', 'last_name', 'email', 'submission_date')
-    list_filter = ('submission_date',)
+class ContactSubmissionAdmin(FullTextSearchMixin, admin.ModelAdmin):
+    list_display = ('first_name', 'last_name', 'email', 'submission_date', 'notified')
+    list_filter = ('submission_date', 'notified')
     search_fields = ('first_name', 'last_name', 'email', 'message')
-    readonly_fields = ('first_name', 'last_name', 'email', 'mobile_number', 'message', 'submission_date')
-    actions = ['export_as_csv']
+    readonly_fields = ('first_name', 'last_name', 'email', 'mobile_number', 'message', 'submission_date', 'notified')
+    actions = ['export_as_csv', 'export_as_jsonl']
+    # Adds "Export CSV/JSONL" buttons that export every row matching the current filters.
+    change_list_template = 'admin/mainapp/contactsubmission/change_list.html'
+    export_fields = ('first_name', 'last_name', 'email', 'mobile_number', 'message', 'submission_date')
+    export_chunk_size = 2000
+
+    def get_urls(self):
+        return [
+            path(
+                'export/<str:export_format>/',
+                self.admin_site.admin_view(self.export_view),
+                name='mainapp_contactsubmission_export',
+            ),
+        ] + super().get_urls()
+
+    def export_view(self, request, export_format):
+        """Exports everything the changelist shows for the same filters and search, unpaginated."""
+        if not self.has_view_permission(request) or export_format not in ('csv', 'jsonl'):
+            raise PermissionDenied
+        try:
+            changelist = self.get_changelist_instance(request)
+        except IncorrectLookupParameters:
+            return HttpResponseRedirect(reverse('admin:mainapp_contactsubmission_changelist'))
+        return self.export(changelist.get_queryset(request), export_format)
+
+    def export(self, queryset, export_format):
+        """
+        Streams ``queryset`` as plain tuples fetched in chunks, so memory stays flat and
+        the first bytes go out before the database has returned the last row.
+        """
+        rows = queryset.values_list(*self.export_fields).iterator(chunk_size=self.export_chunk_size)
+        if export_format == 'jsonl':
+            response = StreamingHttpResponse(stream_jsonl(self.export_fields, rows), content_type='application/x-ndjson')
+        else:
+            response = StreamingHttpResponse(stream_csv(self.export_fields, rows), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename={self.model._meta}.{export_format}'
+        return response
 
     def export_as_csv(self, request, queryset):
-        import csv
-        from django.http import HttpResponse
-        
-        meta = self.model._meta
-        field_names = ['first_name', 'last_name', 'email', 'mobile_number', 'message', 'submission_date']
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename={}.csv'.format(meta)
-        writer = csv.writer(response)
-        writer.writerow(field_names)
-        for obj in queryset:
-            row = writer.writerow([getattr(obj, field) for field in field_names])
-        return response
+        return self.export(queryset, 'csv')
     export_as_csv.short_description = "Export Selected as CSV"
 
+    def export_as_jsonl(self, request, queryset):
+        return self.export(queryset, 'jsonl')
+    export_as_jsonl.short_description = "Export Selected as JSONL"
+
+@admin.register(HitCount)
 class HitCountAdmin(admin.ModelAdmin):
-    list_display = ('content_object', 'hits', 'created_at', 'last_hit')
-    list_filter = ('created_at', 'content_type')
-    readonly_fields = ('content_type', 'object_id', 'content_object', 'hits', 'created_at', 'last_hit')
+    list_display = ('content_object', 'hits', 'unique_visitors', 'day', 'last_hit')
+    list_filter = ('day', 'content_type')
+    readonly_fields = ('content_type', 'object_id', 'content_object', 'hits', 'unique_visitors', 'day', 'created_at', 'last_hit')
+    # The table holds one row per object and day; skip the unfiltered COUNT(*) on every page.
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # One query per content type for the page's objects instead of one per row.
+        return super().get_queryset(request).prefetch_related('content_object')
+
+
+@admin.register(MediaReference)
+class MediaReferenceAdmin(admin.ModelAdmin):
+    """Answers "where is this file used?"; search by the path relative to MEDIA_ROOT (prefixes work)."""
+    list_display = ('path', 'used_by', 'field')
+    list_filter = ('content_type', 'field')
+    list_select_related = ('content_type',)
+    search_fields = ('^path',)
+    readonly_fields = ('path', 'content_type', 'object_id', 'field', 'used_by')
+
+    def has_add_permission(self, request):
+        return False
+
+    def used_by(self, obj):
+        # Links by content type and id, so the list never loads the referencing rows.
+        label = f'{obj.content_type.name} #{obj.object_id}'
+        try:
+            url = reverse(f'admin:{obj.content_type.app_label}_{obj.content_type.model}_change', args=[obj.object_id])
+        except NoReverseMatch:
+            return label
+        return format_html('<a href="{}">{}</a>', url, label)
+    used_by.short_description = 'Used by'
 
 
 @admin.register(ProjectHomeBanner)
 class ProjectHomeBannerAdmin(admin.ModelAdmin):
     list_display = ('project', 'cement_eliminated', 'water_saved')
+    list_select_related = ('project',)
     search_fields = ('project__title', 'scope', 'tech_used', 'performance_impact')
 
 
 @admin.register(HomepageTestimonial)
 class HomepageTestimonialAdmin(admin.ModelAdmin):
     list_display = ('customer_name', 'customer_designation')
-    search_fields = ('customer_name', 'customer_designation', 'testimonial')
\ No newline at end of file
+    search_fields = ('customer_name', 'customer_designation', 'testimonial')
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('subject', 'recipients')
+    readonly_fields = (
+        'subject', 'body', 'html_body', 'from_email', 'recipients', 'submission', 'status', 'attempts',
+        'next_attempt_at', 'last_error', 'created_at', 'sent_at',
+    )
+    actions = ['retry']
+
+    def has_add_permission(self, request):
+        return False
+
+    def retry(self, request, queryset):
+        updated = queryset.exclude(status=OutboxMessage.Status.SENT).update(
+            status=OutboxMessage.Status.PENDING, attempts=0, next_attempt_at=timezone.now(),
+        )
+        self.message_user(request, f'{updated} messages queued for another delivery attempt.')
+    retry.short_description = 'Retry delivery of selected messages'
+
+
+@admin.register(ContactDigest)
+class ContactDigestAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'submission_count', 'first_submission_id', 'last_submission_id', 'message')
+    list_select_related = ('message',)
+    readonly_fields = ('first_submission_id', 'last_submission_id', 'submission_count', 'message', 'created_at')
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,125 @@
+"""
+Opt-in full-text search for the admin (settings.ADMIN_FULL_TEXT_SEARCH).
+
+Instead of ``icontains`` on every search field (a LIKE '%...%' scan of the
+whole table), the admins listed in FULL_TEXT_INDEXES search an index created
+by migration 0024_full_text_search:
+
+- SQLite: an external-content FTS5 shadow table per model, kept in sync by
+  INSERT/UPDATE/DELETE triggers, so queryset.update() and bulk_create() are
+  covered too. Results are ranked with bm25().
+- PostgreSQL: a GIN index on the model's to_tsvector() expression, ranked
+  with ts_rank().
+
+The setting only switches the admin to the index. Other database engines, and
+SQLite builds without FTS5, keep the regular admin search. SQLite drops the
+triggers when a migration rebuilds the table, so such a migration must create
+them again; until then the admin falls back to the regular search.
+"""
+import logging
+import re
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+# model label -> indexed columns; changing them needs a migration like 0024_full_text_search.
+FULL_TEXT_INDEXES = {
+    'mainapp.ContactSubmission': ('first_name', 'last_name', 'email', 'message'),
+    'mainapp.Project': ('title', 'brief_description'),
+    'mainapp.Blog': ('title', 'summary'),
+}
+
+# Fixed, so the query expression always matches the indexed one.
+POSTGRES_CONFIG = 'english'
+
+WORD_RE = re.compile(r'\w+')
+
+# (database alias, table) pairs whose index was found. Only hits are remembered, so
+# an index created after startup (by running the migration) is picked up right away.
+_installed = set()
+
+
+def _fts_table(model):
+    return f'{model._meta.db_table}_fts'
+
+
+def _is_installed(alias, table):
+    """Whether the migration created the index of ``table`` on database ``alias``."""
+    if (alias, table) in _installed:
+        return True
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            fts = f'{table}_fts'
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE name IN (%s, %s, %s, %s)",
+                [fts, f'{fts}_ai', f'{fts}_ad', f'{fts}_au'],
+            )
+            installed = len(cursor.fetchall()) == 4
+        elif connection.vendor == 'postgresql':
+            cursor.execute('SELECT 1 FROM pg_indexes WHERE indexname = %s', [f'{table}_fts_idx'])
+            installed = cursor.fetchone() is not None
+        else:
+            return False
+    if installed:
+        _installed.add((alias, table))
+    else:
+        logger.warning("The full-text index of %s is missing; using the regular admin search.", table)
+    return installed
+
+
+def is_enabled(model, using=DEFAULT_DB_ALIAS):
+    return (
+        settings.ADMIN_FULL_TEXT_SEARCH
+        and model._meta.label in FULL_TEXT_INDEXES
+        and _is_installed(using, model._meta.db_table)
+    )
+
+
+def _tsvector(model, connection, qualified=False):
+    qn = connection.ops.quote_name
+    prefix = f'{qn(model._meta.db_table)}.' if qualified else ''
+    columns = " || ' ' || ".join(
+        f"coalesce({prefix}{qn(model._meta.get_field(name).column)}, '')"
+        for name in FULL_TEXT_INDEXES[model._meta.label]
+    )
+    return f"to_tsvector('{POSTGRES_CONFIG}'::regconfig, {columns})"
+
+
+def search(queryset, search_term):
+    """
+    Filters ``queryset`` to the rows matching every word of ``search_term`` as a
+    prefix (so partial words match while typing) and annotates ``search_rank``,
+    higher for better matches; None when the term has no words.
+    """
+    words = WORD_RE.findall(search_term)
+    if not words:
+        return None
+    model = queryset.model
+    connection = connections[queryset.db]
+    qn = connection.ops.quote_name
+    pk = f'{qn(model._meta.db_table)}.{qn(model._meta.pk.column)}'
+
+    if connection.vendor == 'sqlite':
+        # Joined, so the MATCH runs once and drives both the filter and bm25() (lower is
+        # better); a correlated rank subquery would repeat the MATCH for every row.
+        fts = _fts_table(model)
+        query = ' '.join(f'"{word}"*' for word in words)
+        return queryset.extra(
+            tables=[fts],
+            where=[f'{qn(fts)}.rowid = {pk}', f'{qn(fts)} MATCH %s'],
+            params=[query],
+            select={'search_rank': f'-bm25({qn(fts)})'},
+        )
+
+    # Qualified, as admin querysets join other tables; PostgreSQL still matches it to the index.
+    tsvector = _tsvector(model, connection, qualified=True)
+    query = ' & '.join(f'{word}:*' for word in words)
+    tsquery = f"to_tsquery('{POSTGRES_CONFIG}'::regconfig, %s)"
+    condition = RawSQL(f'{tsvector} @@ {tsquery}', [query], output_field=BooleanField())
+    rank = RawSQL(f'ts_rank({tsvector}, {tsquery})', [query], output_field=FloatField())
+    return queryset.filter(condition).annotate(search_rank=rank)
@@ -0,0 +1,89 @@
+import hashlib
+import math
+
+from django.core.cache.backends.redis import RedisCache
+
+
+class HyperLogLog:
+    """
+    Pure-Python HyperLogLog sketch for approximate distinct counts in fixed memory.
+
+    With the default precision of 12 the sketch is 4 KB and estimates are within
+    roughly 1.6% of the true cardinality. Registers serialize to plain bytes so
+    the sketch can live in any Django cache backend.
+    """
+
+    def __init__(self, precision: int = 12, registers: bytes | None = None):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(registers) if registers else bytearray(self.size)
+
+    def add(self, value: str) -> bool:
+        """Adds a value; returns True if the sketch changed."""
+        digest = int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+        index = digest >> (64 - self.precision)
+        remainder = digest & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            return True
+        return False
+
+    def count(self) -> int:
+        """Returns the estimated number of distinct values added."""
+        alpha = 0.7213 / (1 + 1.079 / self.size)
+        estimate = alpha * self.size ** 2 / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.size and zeros:
+            # Linear counting is more accurate for small cardinalities.
+            estimate = self.size * math.log(self.size / zeros)
+        return round(estimate)
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.registers)
+
+
+def get_redis_client(cache):
+    """
+    Returns a raw Redis client for ``cache`` when it is Redis-backed, else None.
+
+    Supports django-redis (used in production) and Django's built-in RedisCache.
+    """
+    if cache.__class__.__module__.startswith('django_redis'):
+        return cache.client.get_client(write=True)
+    if isinstance(cache, RedisCache):
+        return cache._cache.get_client(write=True)
+    return None
+
+
+def add_to_sketch(cache, key: str, value: str, timeout: int, estimate: bool = True) -> int | None:
+    """
+    Adds ``value`` to the sketch stored under ``key`` and optionally returns its
+    estimated cardinality. Uses native PFADD/PFCOUNT on Redis.
+    """
+    client = get_redis_client(cache)
+    if client is not None:
+        redis_key = cache.make_key(key)
+        pipe = client.pipeline()
+        pipe.pfadd(redis_key, value)
+        pipe.expire(redis_key, timeout)
+        if estimate:
+            pipe.pfcount(redis_key)
+        result = pipe.execute()
+        return result[-1] if estimate else None
+
+    sketch = HyperLogLog(registers=cache.get(key))
+    if sketch.add(value):
+        cache.set(key, sketch.to_bytes(), timeout=timeout)
+    return sketch.count() if estimate else None
+
+
+def count_sketches(cache, keys: list[str]) -> dict[str, int]:
+    """Returns the estimated cardinality of each existing sketch in ``keys``."""
+    client = get_redis_client(cache)
+    if client is not None:
+        pipe = client.pipeline()
+        for key in keys:
+            pipe.pfcount(cache.make_key(key))
+        return {key: count for key, count in zip(keys, pipe.execute()) if count}
+    return {key: HyperLogLog(registers=registers).count() for key, registers in cache.get_many(keys).items()}
@@ -0,0 +1,229 @@
+"""
+Responsive image derivatives.
+
+Every uploaded image gets a fixed set of width-bounded copies (settings
+IMAGE_DERIVATIVE_WIDTHS / IMAGE_DERIVATIVE_FORMATS), recorded in ImageDerivative.
+Saving an upload only writes an ImageDerivativeJob in the same transaction, so
+the admin save never waits on Pillow and web workers never spend CPU on it;
+`manage.py build_image_derivatives --queued`, run from cron, builds the queued
+jobs, and without --queued it backfills every image that has no derivatives.
+
+Templates read the derivatives through a per-source cache entry (see
+get_derivatives()); views prime the entries of a whole page in one query.
+"""
+import hashlib
+import io
+import logging
+import os
+import warnings
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .utils import bump_cache_version
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_DIR = 'derivatives'
+# A queued job that keeps failing is left in place (with its last error) after this many runs.
+JOB_MAX_ATTEMPTS = 3
+
+
+def derivatives_cache_key(source):
+    return 'derivatives::' + hashlib.md5(source.encode('utf-8')).hexdigest()
+
+
+def supported_formats():
+    """The configured derivative formats this Pillow build can encode."""
+    Image.init()
+    formats = [fmt.lower() for fmt in settings.IMAGE_DERIVATIVE_FORMATS if fmt.upper() in Image.SAVE]
+    for fmt in set(settings.IMAGE_DERIVATIVE_FORMATS) - set(formats):
+        logger.warning("Pillow cannot encode %s; skipping those image derivatives.", fmt)
+    return formats
+
+
+def derivative_name(source, width, fmt):
+    stem, _ = os.path.splitext(source)
+    return f'{DERIVATIVE_DIR}/{stem}-{width}w.{fmt}'
+
+
+def normalize(image):
+    """Applies the EXIF orientation and converts to a mode WebP/AVIF can encode."""
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or 'A' in image.getbands() else 'RGB')
+    return image
+
+
+def build_derivatives(source, storage=default_storage):
+    """
+    (Re)generates the derivatives of the stored image ``source`` and returns the
+    cached entries. Unreadable images are logged and get no derivatives.
+    """
+    from .models import ImageDerivative
+
+    try:
+        with storage.open(source) as fh, Image.open(fh) as original:
+            image = normalize(original)
+            # Never upscale: widths above the original collapse onto the original width.
+            widths = sorted({min(width, image.width) for width in settings.IMAGE_DERIVATIVE_WIDTHS}, reverse=True)
+
+            rows = []
+            for fmt in supported_formats():
+                resized = image
+                # Largest first, each step resampled from the previous one to keep it cheap.
+                for width in widths:
+                    height = max(1, round(image.height * width / image.width))
+                    if resized.width != width:
+                        resized = resized.resize((width, height), Image.Resampling.LANCZOS)
+                    buffer = io.BytesIO()
+                    resized.save(buffer, fmt.upper(), quality=settings.IMAGE_DERIVATIVE_QUALITY)
+                    name = derivative_name(source, width, fmt)
+                    storage.delete(name)
+                    name = storage.save(name, ContentFile(buffer.getvalue()))
+                    rows.append(ImageDerivative(source=source, format=fmt, width=width, height=height, file=name))
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        logger.warning("Could not build image derivatives for %s: %s", source, e)
+        return []
+
+    new_files = {row.file for row in rows}
+    with transaction.atomic():
+        stale = ImageDerivative.objects.filter(source=source)
+        for name in stale.values_list('file', flat=True):
+            if name not in new_files:
+                storage.delete(name)
+        stale.delete()
+        ImageDerivative.objects.bulk_create(rows)
+
+    entries = sorted((row.format, row.width, row.file) for row in rows)
+    cache.set(derivatives_cache_key(source), entries, timeout=None)
+    return entries
+
+
+def process_queued(batch_size):
+    """
+    Builds the derivatives of up to ``batch_size`` queued jobs, then purges the
+    cached pages that show them and moves their HTTP validators forward. Returns ``(built, failed)``. Building is
+    idempotent, so overlapping runs at worst build an image twice.
+    """
+    from .models import ImageDerivativeJob
+
+    jobs = defaultdict(list)
+    for job in ImageDerivativeJob.objects.filter(attempts__lt=JOB_MAX_ATTEMPTS)[:batch_size]:
+        jobs[job.source].append(job)
+
+    built = failed = 0
+    done, page_tags = [], set()
+    for source, source_jobs in jobs.items():
+        try:
+            build_derivatives(source)
+        except Exception as e:
+            logger.exception("Could not build image derivatives for %s", source)
+            ImageDerivativeJob.objects.filter(pk__in=[job.pk for job in source_jobs]).update(
+                attempts=F('attempts') + 1, last_error=f'{type(e).__name__}: {e}',
+            )
+            failed += len(source_jobs)
+            continue
+        built += len(source_jobs)
+        for job in source_jobs:
+            done.append(job.pk)
+            page_tags.update(job.page_tags)
+
+    ImageDerivativeJob.objects.filter(pk__in=done).delete()
+    touch_owners([source for source, source_jobs in jobs.items() if source_jobs[0].pk in done])
+    if page_tags:
+        bump_cache_version(*page_tags)
+    return built, failed
+
+
+def touch_owners(sources):
+    """
+    Moves updated_at forward on the projects and blogs that show ``sources`` (found
+    through MediaReference), so the ETag and Last-Modified of their pages change
+    along with the srcset and revalidating browsers get the new markup.
+    """
+    from .models import Blog, MediaReference, Project, ProjectImage
+
+    if not sources:
+        return
+    references = MediaReference.objects.filter(path__in=sources)
+    now = timezone.now()
+    Blog.objects.filter(
+        pk__in=references.filter(content_type=ContentType.objects.get_for_model(Blog)).values('object_id'),
+    ).update(updated_at=now)
+    gallery = ProjectImage.objects.filter(
+        pk__in=references.filter(content_type=ContentType.objects.get_for_model(ProjectImage)).values('object_id'),
+    )
+    Project.objects.filter(pk__in=gallery.values('project_id')).update(updated_at=now)
+
+
+def prime_derivatives(files):
+    """
+    Loads the cached derivative entries of several image fields (or storage
+    names) at once, with a single query for the misses, so rendering a page of
+    images costs O(1) queries.
+    """
+    from .models import ImageDerivative
+
+    sources = {getattr(f, 'name', f) for f in files if f}
+    if not sources:
+        return {}
+    keys = {derivatives_cache_key(source): source for source in sources}
+    cached = cache.get_many(keys)
+    entries = {keys[key]: value for key, value in cached.items()}
+
+    missing = sources - entries.keys()
+    if missing:
+        found = {source: [] for source in missing}
+        rows = ImageDerivative.objects.filter(source__in=missing).values_list('source', 'format', 'width', 'file')
+        for source, fmt, width, name in rows:
+            found[source].append((fmt, width, name))
+        # Empty lists are cached too; build_derivatives() overwrites them once built.
+        cache.set_many({derivatives_cache_key(source): value for source, value in found.items()}, timeout=None)
+        entries.update(found)
+    return entries
+
+
+def get_derivatives(source):
+    """Returns ``[(format, width, name), ...]`` for one stored image."""
+    return prime_derivatives([source]).get(source, [])
+
+
+# Process-pool workers for `manage.py optimize_media`. They only take paths and
+# plain values and never touch settings, the database or the cache.
+
+def inspect_file(path):
+    """Returns ``(path, sha256, format, width, size)`` of an image file, or None if unreadable."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as fh:
+            for chunk in iter(lambda: fh.read(1024 * 1024), b''):
+                digest.update(chunk)
+            fh.seek(0)
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', Image.DecompressionBombWarning)
+                # Header only; the pixels are not decoded here.
+                with Image.open(fh) as image:
+                    image_format, width = image.format, image.width
+        return path, digest.hexdigest(), image_format, width, os.path.getsize(path)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        return None
+
+
+def encode_webp(source, target, max_width, quality):
+    """Writes ``source`` to ``target`` as WebP at most ``max_width`` pixels wide; returns the encoded size."""
+    with Image.open(source) as original:
+        image = normalize(original)
+        if image.width > max_width:
+            height = max(1, round(image.height * max_width / image.width))
+            image = image.resize((max_width, height), Image.Resampling.LANCZOS)
+        image.save(target, 'WEBP', quality=quality, method=6)
+    return os.path.getsize(target)
@@ -0,0 +1,69 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections, models
+from mainapp.images import build_derivatives, process_queued
+from mainapp.models import (
+    ProjectImage, Blog, Clientele, Testimonial, ProjectHomeBanner, HomepageTestimonial, TeamMember, Leadership,
+    ImageDerivative,
+)
+from mainapp.utils import bump_cache_version
+
+IMAGE_MODELS = (
+    ProjectImage, Blog, Clientele, Testimonial, ProjectHomeBanner, HomepageTestimonial, TeamMember, Leadership,
+)
+
+class Command(BaseCommand):
+    help = 'Generates the responsive WebP/AVIF derivatives of uploaded images that do not have them yet.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rebuild the derivatives of every image.')
+        parser.add_argument('--workers', type=int, default=4, help='Images resized in parallel.')
+        parser.add_argument(
+            '--queued', action='store_true',
+            help='Only build the uploads queued since the last run (schedule this, e.g. every minute from cron).',
+        )
+        parser.add_argument('--batch-size', type=int, default=20, help='Queued uploads built per batch.')
+
+    def handle(self, *args, **options):
+        if options['queued']:
+            return self.handle_queued(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS('Starting image derivative build...'))
+
+        sources = set()
+        for model in IMAGE_MODELS:
+            for field in model._meta.concrete_fields:
+                if isinstance(field, models.ImageField):
+                    sources.update(
+                        name for name in model.objects.values_list(field.name, flat=True).iterator() if name
+                    )
+        if not options['force']:
+            sources -= set(ImageDerivative.objects.values_list('source', flat=True).distinct())
+
+        self.stdout.write(f'Building derivatives for {len(sources)} images.')
+        built = 0
+        with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as executor:
+            for entries in executor.map(self.build, sorted(sources)):
+                built += bool(entries)
+
+        # Cached pages still carry the old (or no) srcset attributes.
+        bump_cache_version('site')
+        self.stdout.write(self.style.SUCCESS(f'Finished: {built} of {len(sources)} images have derivatives.'))
+
+    def handle_queued(self, batch_size):
+        total_built = total_failed = 0
+        while True:
+            built, failed = process_queued(batch_size)
+            total_built += built
+            total_failed += failed
+            # A short batch means the queue is drained; failed jobs wait for the next run.
+            if built + failed < batch_size:
+                break
+        if total_built or total_failed:
+            self.stdout.write(f'Built {total_built} queued images, {total_failed} failed.')
+
+    def build(self, source):
+        try:
+            return build_derivatives(source)
+        finally:
+            connections.close_all()
@@ -1,8 +1,19 @@
 import os
+import sqlite3
+import tempfile
+from itertools import islice
 from django.core.management.base import BaseCommand
 from django.apps import apps
 from django.conf import settings
 from django.db import models
+from ckeditor.fields import RichTextField
+from mainapp.models import MEDIA_REFERENCE_MODELS, MediaReference
+from mainapp.utils import extract_media_references
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
 
 class Command(BaseCommand):
     help = 'Scans the media directory and removes files not referenced by any model.'
@@ -13,48 +24,110 @@ class Command(BaseCommand):
             action='store_true',
             help="Don't delete files, just list the ones that would be deleted.",
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Rows fetched, paths recorded and files deleted per batch.',
+        )
+        parser.add_argument(
+            '--full-scan',
+            action='store_true',
+            help='Read every file field and rich-text field instead of the MediaReference index.',
+        )
 
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS('Starting orphan file cleanup...'))
         dry_run = options['dry_run']
+        self.batch_size = options['batch_size']
+        self.full_scan = options['full_scan']
 
-        # 1. Get all file paths from models
-        referenced_files = set()
-        for model in apps.get_models():
-            for field in model._meta.get_fields():
-                if isinstance(field, models.FileField):
-                    # Get all non-empty file paths for this field
-                    storage = field.storage
-                    for value in model.objects.values_list(field.name, flat=True):
-                        if value:
-                            referenced_files.add(storage.path(value))
-
-        self.stdout.write(f'Found {len(referenced_files)} referenced files in the database.')
-
-        # 2. Walk through the media directory
-        media_root = settings.MEDIA_ROOT
-        orphaned_files = []
-        for root, _, files in os.walk(media_root):
-            for filename in files:
-                filepath = os.path.join(root, filename)
-                if filepath not in referenced_files:
-                    orphaned_files.append(filepath)
+        # References and scanned files live in a throwaway SQLite file rather than in
+        # Python sets, so memory stays flat however large the media library is.
+        with tempfile.TemporaryDirectory() as tmp:
+            self.db = sqlite3.connect(os.path.join(tmp, 'orphans.sqlite3'))
+            self.db.execute('CREATE TABLE refs (name TEXT PRIMARY KEY) WITHOUT ROWID')
+            self.db.execute('CREATE TABLE files (name TEXT PRIMARY KEY, path TEXT) WITHOUT ROWID')
+            try:
+                self.cleanup(dry_run)
+            finally:
+                self.db.close()
+
+    def cleanup(self, dry_run):
+        # 1. Stream referenced names: the MediaReference index, plus the file fields of
+        #    models it does not cover (e.g. ImageDerivative); --full-scan reads everything
+        referenced = self.store_references(self.referenced_names())
+        self.stdout.write(f'Found {referenced} referenced files in the database.')
+
+        # 2. Stream the media directory into the same database, then anti-join
+        media_root = os.path.realpath(settings.MEDIA_ROOT)
+        for batch in batched(self.walk(media_root), self.batch_size):
+            self.db.executemany('INSERT INTO files VALUES (?, ?)', [
+                (os.path.relpath(path, media_root).replace(os.sep, '/'), path) for path in batch
+            ])
+        orphans = 'SELECT path FROM files WHERE name NOT IN (SELECT name FROM refs) ORDER BY path'
+        orphan_count = self.db.execute(f'SELECT COUNT(*) FROM ({orphans})').fetchone()[0]
 
         # 3. Report and optionally delete orphans
-        if not orphaned_files:
+        if not orphan_count:
             self.stdout.write(self.style.SUCCESS('No orphaned files found.'))
             return
 
-        self.stdout.write(self.style.WARNING(f'Found {len(orphaned_files)} orphaned files:'))
-        for f in orphaned_files:
-            self.stdout.write(f' - {f}')
+        self.stdout.write(self.style.WARNING(f'Found {orphan_count} orphaned files:'))
+        for (path,) in self.db.execute(orphans):
+            self.stdout.write(f' - {path}')
 
         if not dry_run:
             if input('Are you sure you want to delete these files? (y/N) ').lower() == 'y':
-                for f in orphaned_files:
-                    os.remove(f)
-                self.stdout.write(self.style.SUCCESS('Deleted orphaned files.'))
+                deleted = 0
+                cursor = self.db.execute(orphans)
+                while batch := cursor.fetchmany(self.batch_size):
+                    for (path,) in batch:
+                        try:
+                            os.remove(path)
+                            deleted += 1
+                        except FileNotFoundError:
+                            pass
+                self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} orphaned files.'))
             else:
                 self.stdout.write(self.style.NOTICE('Operation cancelled.'))
         else:
             self.stdout.write(self.style.NOTICE('Dry run complete. No files were deleted.'))
+
+    def referenced_names(self):
+        """Yields the storage name of every file the database points at."""
+        indexed = () if self.full_scan else MEDIA_REFERENCE_MODELS
+        if indexed:
+            yield from MediaReference.objects.values_list('path', flat=True).iterator(chunk_size=self.batch_size)
+        for model in apps.get_models():
+            if model in indexed:
+                continue
+            file_fields = [f.name for f in model._meta.concrete_fields if isinstance(f, models.FileField)]
+            html_fields = [f.name for f in model._meta.concrete_fields if isinstance(f, RichTextField)]
+            for field in file_fields:
+                queryset = model.objects.exclude(**{field: ''}).values_list(field, flat=True)
+                yield from queryset.iterator(chunk_size=self.batch_size)
+            for field in html_fields:
+                # Inline images exist only as URLs inside the HTML.
+                queryset = model.objects.filter(**{f'{field}__contains': settings.MEDIA_URL})
+                queryset = queryset.values_list(field, flat=True)
+                for content in queryset.iterator(chunk_size=self.batch_size):
+                    yield from extract_media_references(content)
+
+    def store_references(self, names):
+        for batch in batched(names, self.batch_size):
+            self.db.executemany('INSERT OR IGNORE INTO refs VALUES (?)', [
+                (os.path.normpath(name).replace(os.sep, '/'),) for name in batch if name
+            ])
+        return self.db.execute('SELECT COUNT(*) FROM refs').fetchone()[0]
+
+    def walk(self, root):
+        """Yields every file path below ``root`` using os.scandir, without building a list."""
+        stack = [root] if os.path.isdir(root) else []
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry.path
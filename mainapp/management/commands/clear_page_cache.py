@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from mainapp.utils import bump_cache_version
+
+class Command(BaseCommand):
+    help = 'Invalidates every cached page, e.g. after deploying template changes.'
+
+    def handle(self, *args, **options):
+        bump_cache_version('site')
+        self.stdout.write(self.style.SUCCESS('Page cache cleared.'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from mainapp.models import HitCount
+
+class Command(BaseCommand):
+    help = 'Flushes buffered hit counters from the cache into the HitCount table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=2,
+            help='Number of days (counting today) whose buffered counters are drained.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of counters written per bulk update.',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Flushing buffered hit counts...'))
+        applied = HitCount.objects.flush_buffered(days=options['days'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Applied {applied} buffered hits.'))
@@ -0,0 +1,249 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+from django.db.models import Case, Value, When
+from mainapp.images import DERIVATIVE_DIR, derivatives_cache_key, encode_webp, inspect_file
+from mainapp.models import ImageDerivative, MediaReference
+from mainapp.utils import bump_cache_version
+
+EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
+FORMATS = {'JPEG', 'MPO', 'PNG', 'WEBP'}
+MANIFEST_VERSION = 1
+
+class Command(BaseCommand):
+    help = (
+        'Re-encodes oversized JPEG/PNG/WebP files in MEDIA_ROOT and STATICFILES_DIRS to bounded WebP '
+        'in parallel, skipping files the content-hash manifest has already seen.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-width', type=int, default=2560, help='Wider images are scaled down to this.')
+        parser.add_argument('--quality', type=int, default=80, help='WebP quality (0-100).')
+        parser.add_argument(
+            '--min-bytes', type=int, default=300 * 1024,
+            help='Files no wider than --max-width and smaller than this are left alone.',
+        )
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes.')
+        parser.add_argument('--dry-run', action='store_true', help="List what would be re-encoded, change nothing.")
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Starting media optimization...'))
+        self.options = options
+        self.media_root = os.path.realpath(settings.MEDIA_ROOT)
+        self.manifest_path = str(settings.MEDIA_OPTIMIZE_MANIFEST)
+        self.files = self.load_manifest()
+        # Hashes of files this command wrote; such content is never encoded again.
+        self.outputs = {entry[2] for entry in self.files.values() if entry[3]}
+        renames = {}
+
+        try:
+            # 1. Only files whose size or mtime moved since the last run are read at all
+            paths = set(self.walk())
+            # Forget files that no longer exist
+            self.files = {path: entry for path, entry in self.files.items() if path in paths}
+            changed = [path for path in paths if not self.unchanged(path)]
+            self.stdout.write(f'{len(changed)} new or modified files to inspect.')
+
+            with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+                # 2. Hash and read headers in parallel; identical content is grouped
+                groups = defaultdict(list)
+                for info in executor.map(inspect_file, changed, chunksize=32):
+                    if info is None:
+                        continue
+                    path, sha256, image_format, width, size = info
+                    previous = self.files.get(path)
+                    if sha256 in self.outputs or (previous and previous[2] == sha256):
+                        # Only touched, or a copy of something we already wrote
+                        self.remember(path, sha256, optimized=sha256 in self.outputs)
+                    elif image_format not in FORMATS or (
+                        width <= options['max_width'] and size < options['min_bytes']
+                    ):
+                        self.remember(path, sha256)
+                    else:
+                        groups[sha256].append(path)
+
+                self.stdout.write(f'{sum(map(len, groups.values()))} oversized files, {len(groups)} distinct.')
+                if options['dry_run']:
+                    for paths in groups.values():
+                        for path in paths:
+                            self.stdout.write(f' - {path}')
+                    self.files = None  # Leave the manifest untouched
+                    return
+
+                # 3. Encode each distinct content once, then fan the result out to its copies
+                staging = tempfile.mkdtemp(prefix='optimize_media-')
+                try:
+                    futures = {
+                        sha256: executor.submit(
+                            encode_webp, paths[0], os.path.join(staging, f'{sha256}.webp'),
+                            options['max_width'], options['quality'],
+                        )
+                        for sha256, paths in groups.items()
+                    }
+                    for sha256, future in futures.items():
+                        try:
+                            future.result()
+                        except Exception as e:
+                            self.stdout.write(self.style.WARNING(f'Could not encode {groups[sha256][0]}: {e}'))
+                            continue
+                        staged = os.path.join(staging, f'{sha256}.webp')
+                        output_sha256 = self.hash_file(staged)
+                        for path in groups[sha256]:
+                            self.place(path, sha256, staged, output_sha256, renames)
+                finally:
+                    shutil.rmtree(staging, ignore_errors=True)
+
+            # 4. Repoint the ImageFields of converted uploads
+            if renames:
+                self.apply_renames(renames)
+        finally:
+            self.save_manifest()
+
+        self.stdout.write(self.style.SUCCESS(f'Finished media optimization; {len(renames)} uploads converted.'))
+
+    def roots(self):
+        yield self.media_root
+        for entry in settings.STATICFILES_DIRS:
+            yield os.path.realpath(entry[1] if isinstance(entry, (list, tuple)) else entry)
+
+    def walk(self):
+        """Yields candidate image paths; derivatives are already bounded and are skipped."""
+        skip = os.path.join(self.media_root, DERIVATIVE_DIR)
+        stack = [root for root in self.roots() if os.path.isdir(root)]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.path != skip:
+                            stack.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in EXTENSIONS:
+                        yield entry.path
+
+    def load_manifest(self):
+        try:
+            with open(self.manifest_path) as fh:
+                manifest = json.load(fh)
+        except (FileNotFoundError, ValueError):
+            return {}
+        return manifest['files'] if manifest.get('version') == MANIFEST_VERSION else {}
+
+    def save_manifest(self):
+        if self.files is None:
+            return
+        tmp = f'{self.manifest_path}.tmp'
+        with open(tmp, 'w') as fh:
+            json.dump({'version': MANIFEST_VERSION, 'files': self.files}, fh)
+        os.replace(tmp, self.manifest_path)
+
+    def unchanged(self, path):
+        entry = self.files.get(path)
+        if entry is None:
+            return False
+        stat = os.stat(path)
+        return entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns
+
+    def remember(self, path, sha256, optimized=False):
+        stat = os.stat(path)
+        self.files[path] = [stat.st_size, stat.st_mtime_ns, sha256, optimized]
+        if optimized:
+            self.outputs.add(sha256)
+
+    @staticmethod
+    def hash_file(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as fh:
+            for chunk in iter(lambda: fh.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def place(self, path, sha256, staged, output_sha256, renames):
+        """Installs the encoded copy for ``path``: in place for WebP, as a .webp sibling otherwise."""
+        if os.path.getsize(staged) >= os.path.getsize(path):
+            self.remember(path, sha256)  # Already as small as we can make it
+            return
+
+        stem, ext = os.path.splitext(path)
+        name = None
+        if ext.lower() == '.webp':
+            target = path
+        elif path.startswith(self.media_root + os.sep):
+            name = os.path.relpath(path, self.media_root).replace(os.sep, '/')
+            if not self.renamable(name):
+                self.remember(path, sha256)
+                return
+            new_name = default_storage.get_available_name(os.path.splitext(name)[0] + '.webp')
+            target = default_storage.path(new_name)
+        else:
+            target = stem + '.webp'
+            if os.path.exists(target) and target not in self.files:
+                self.remember(path, sha256)  # A hand-made WebP already sits next to it
+                return
+
+        tmp = f'{target}.tmp'
+        shutil.copyfile(staged, tmp)
+        os.replace(tmp, target)
+        self.remember(target, output_sha256, optimized=True)
+        if name is not None:
+            renames[name] = new_name
+        elif target != path:
+            self.remember(path, sha256)  # Static originals stay for the templates that use them
+
+    def image_fields(self):
+        for model in apps.get_models():
+            if model is ImageDerivative:
+                continue
+            for field in model._meta.concrete_fields:
+                if isinstance(field, models.ImageField):
+                    yield model, field
+
+    def renamable(self, name):
+        """
+        An upload can be renamed when the MediaReference index shows it in use by
+        ImageFields only; links inside rich-text HTML would break.
+        """
+        fields = []
+        for reference in MediaReference.objects.filter(path=name).select_related('content_type'):
+            model = reference.content_type.model_class()
+            fields.append(model and model._meta.get_field(reference.field))
+        return bool(fields) and all(isinstance(field, models.ImageField) for field in fields)
+
+    def apply_renames(self, renames, batch_size=500):
+        """
+        Points every ImageField, the derivatives and the reference index at the new
+        WebP names in one transaction; the originals are only deleted once it has committed.
+        """
+        old_names = list(renames)
+        with transaction.atomic():
+            for start in range(0, len(old_names), batch_size):
+                batch = old_names[start:start + batch_size]
+                for model, field in self.image_fields():
+                    model.objects.filter(**{f'{field.name}__in': batch}).update(**{field.name: Case(
+                        *(When(**{field.name: old}, then=Value(renames[old])) for old in batch),
+                        output_field=field,
+                    )})
+                ImageDerivative.objects.filter(source__in=batch).update(source=Case(
+                    *(When(source=old, then=Value(renames[old])) for old in batch),
+                    output_field=ImageDerivative._meta.get_field('source'),
+                ))
+                MediaReference.objects.filter(path__in=batch).update(path=Case(
+                    *(When(path=old, then=Value(renames[old])) for old in batch),
+                    output_field=MediaReference._meta.get_field('path'),
+                ))
+
+        for old, new in renames.items():
+            self.files.pop(default_storage.path(old), None)
+            default_storage.delete(old)
+            cache.delete_many([derivatives_cache_key(old), derivatives_cache_key(new)])
+        # Queryset updates skip the signals that purge cached pages.
+        bump_cache_version('site')
@@ -0,0 +1,32 @@
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from mainapp.models import MEDIA_REFERENCE_MODELS, MediaReference, media_references
+
+class Command(BaseCommand):
+    help = 'Rebuilds the MediaReference index from scratch (e.g. after bulk imports that skip signals).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows read and references written per batch.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Rebuilding media reference index...'))
+        batch_size = options['batch_size']
+
+        with transaction.atomic():
+            MediaReference.objects.all().delete()
+            for model in MEDIA_REFERENCE_MODELS:
+                content_type = ContentType.objects.get_for_model(model)
+                batch, written = [], 0
+                for instance in model.objects.iterator(chunk_size=batch_size):
+                    batch.extend(
+                        MediaReference(content_type=content_type, object_id=instance.pk, field=field, path=path)
+                        for field, path in media_references(instance)
+                    )
+                    if len(batch) >= batch_size:
+                        written += len(MediaReference.objects.bulk_create(batch))
+                        batch = []
+                written += len(MediaReference.objects.bulk_create(batch))
+                self.stdout.write(f'Indexed {written} {model._meta.verbose_name} references.')
+
+        self.stdout.write(self.style.SUCCESS('Finished rebuilding media reference index.'))
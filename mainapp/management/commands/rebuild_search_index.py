@@ -0,0 +1,83 @@
+from collections import Counter
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import ExpressionWrapper, F, FloatField, OuterRef, Subquery, Value
+from mainapp.models import SEARCH_MODELS, SearchDocument, SearchPosting, SearchStatistics, SearchTerm
+from mainapp.search import B, K1, analyze
+from mainapp.utils import bump_cache_version
+
+class Command(BaseCommand):
+    help = 'Rebuilds the site search index from scratch (e.g. after bulk imports that skip signals).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Objects read and indexed per batch.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Rebuilding search index...'))
+        batch_size = options['batch_size']
+        term_ids = {}
+        document_counts = Counter()
+
+        with transaction.atomic():
+            SearchPosting.objects.all().delete()
+            SearchDocument.objects.all().delete()
+            SearchTerm.objects.all().delete()
+
+            for model in SEARCH_MODELS:
+                content_type = ContentType.objects.get_for_model(model)
+                batch, indexed = [], 0
+                for instance in model.objects.iterator(chunk_size=batch_size):
+                    analyzed = analyze(instance)
+                    if analyzed is not None:
+                        batch.append((instance.pk, analyzed))
+                    if len(batch) >= batch_size:
+                        indexed += self.index(content_type, batch, term_ids, document_counts)
+                        batch = []
+                indexed += self.index(content_type, batch, term_ids, document_counts)
+                self.stdout.write(f'Indexed {indexed} {model._meta.verbose_name_plural}.')
+
+            # Document frequencies were counted on the way.
+            terms = list(SearchTerm.objects.all())
+            for term in terms:
+                term.document_count = document_counts[term.term]
+            SearchTerm.objects.bulk_update(terms, ['document_count'], batch_size=batch_size)
+            # Impacts need the final average length, so they are filled in with one UPDATE.
+            self.compute_impacts(SearchStatistics.objects.refresh().average_length)
+
+        bump_cache_version('search')
+        self.stdout.write(self.style.SUCCESS(f'Finished rebuilding search index; {len(term_ids)} terms.'))
+
+    def index(self, content_type, batch, term_ids, document_counts):
+        """Writes one batch of ``(object id, (fields, terms))``; returns the number of documents."""
+        if not batch:
+            return 0
+        documents = SearchDocument.objects.bulk_create([
+            SearchDocument(content_type=content_type, object_id=object_id, **fields)
+            for object_id, (fields, terms) in batch
+        ])
+        new_terms = {term for _, (_, terms) in batch for term in terms} - term_ids.keys()
+        for term in SearchTerm.objects.bulk_create([SearchTerm(term=term) for term in new_terms]):
+            term_ids[term.term] = term.pk
+
+        postings = []
+        for document, (_, (_, terms)) in zip(documents, batch):
+            document_counts.update(terms.keys())
+            postings.extend(
+                SearchPosting(term_id=term_ids[term], document=document, frequency=frequency, impact=0)
+                for term, frequency in terms.items()
+            )
+        SearchPosting.objects.bulk_create(postings, batch_size=5000)
+        return len(documents)
+
+    def compute_impacts(self, average_length):
+        """search.impact() for every posting, in SQL."""
+        average_length = average_length or 1
+        length = Subquery(SearchDocument.objects.filter(pk=OuterRef('document_id')).values('length'))
+        SearchPosting.objects.update(impact=ExpressionWrapper(
+            F('frequency') * Value(K1 + 1) / (
+                F('frequency') + Value(K1) * (Value(1 - B) + Value(B) * length / Value(float(average_length)))
+            ),
+            output_field=FloatField(),
+        ))
@@ -1,25 +1,23 @@
+from django.contrib.contenttypes.models import ContentType
 from django.core.management.base import BaseCommand
-from django.db.models import Sum
-from mainapp.models import HitCount, Project, Blog
+from mainapp.models import HitCountTotal, Project, Blog
 
 class Command(BaseCommand):
-    help = 'Recomputes and caches aggregated hit counts for content objects.'
+    help = 'Recomputes the denormalized per-object hit totals (HitCountTotal) from the daily hit counts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Re-sum every object instead of only those hit since the previous run.',
+        )
 
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS('Starting hit count recomputation...'))
 
-        # Example for Projects
-        projects = Project.objects.filter(status='PUBLISHED')
-        for project in projects:
-            total_hits = HitCount.objects.filter(object_id=project.pk, content_type__model='project').aggregate(total=Sum('hits'))['total'] or 0
-            # Here you would typically update a cached value or a denormalized field on the Project model.
-            # For this example, we'll just print the result.
-            self.stdout.write(f'Project "{project.title}" has {total_hits} total hits.')
-
-        # Example for Blogs
-        blogs = Blog.objects.filter(status='PUBLISHED')
-        for blog in blogs:
-            total_hits = HitCount.objects.filter(object_id=blog.pk, content_type__model='blog').aggregate(total=Sum('hits'))['total'] or 0
-            self.stdout.write(f'Blog "{blog.title}" has {total_hits} total hits.')
+        for model in (Project, Blog):
+            content_type = ContentType.objects.get_for_model(model)
+            written = HitCountTotal.objects.recompute(content_type, full=options['full'])
+            self.stdout.write(f'Updated {written} {model._meta.verbose_name} totals.')
 
         self.stdout.write(self.style.SUCCESS('Finished hit count recomputation.'))
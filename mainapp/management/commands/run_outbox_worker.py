@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.conf import settings
+from mainapp.outbox import enqueue_contact_digest, process_batch
+
+class Command(BaseCommand):
+    help = 'Sends queued OutboxMessage emails in batches, retrying failures with exponential backoff.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the messages that are due now and exit (e.g. from cron) instead of polling.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Seconds to sleep between polls when the outbox is empty.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Messages claimed and sent over one SMTP connection per batch.',
+        )
+        parser.add_argument(
+            '--digest-now',
+            action='store_true',
+            help='In digest mode, queue the pending contact submissions without waiting for CONTACT_DIGEST_INTERVAL.',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Starting outbox worker...'))
+        total_sent = total_failed = 0
+
+        digest_mode = settings.CONTACT_NOTIFICATION_MODE == 'digest'
+        force_digest = options['digest_now']
+
+        try:
+            while True:
+                if digest_mode:
+                    digest = enqueue_contact_digest(force=force_digest)
+                    force_digest = False
+                    if digest and digest.message_id:
+                        self.stdout.write(f'Queued a digest of {digest.submission_count} contact submissions.')
+                sent, failed = process_batch(options['batch_size'])
+                total_sent += sent
+                total_failed += failed
+                if sent or failed:
+                    self.stdout.write(f'Sent {sent} messages, {failed} failed.')
+                    # A full batch probably means more are waiting.
+                    if sent + failed >= options['batch_size']:
+                        continue
+                if options['once']:
+                    break
+                # Long-running worker: drop connections the database may have timed out.
+                close_old_connections()
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f'Outbox worker stopped; {total_sent} sent, {total_failed} failed.'))
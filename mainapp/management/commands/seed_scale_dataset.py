@@ -0,0 +1,202 @@
+import random
+from datetime import timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from mainapp.models import (
+    Project, ProjectImage, ProjectFact, ProjectHomeBanner, Blog, Clientele, Testimonial,
+    HomepageTestimonial, Leadership, HitCount, HitCountTotal, BlogTag,
+)
+from mainapp.utils import bump_cache_version
+
+# Every seeded row is recognisable by this prefix so --clear only removes seeded data.
+PREFIX = 'seed'
+WORDS = (
+    'cement-free road precast drain kerbstone paver fly ash steel slag geopolymer concrete '
+    'curing carbon water highway village warehouse bridge footpath block sustainable'
+).split()
+
+
+class Command(BaseCommand):
+    help = 'Bulk-creates a deterministic, parameterized dataset for benchmarks and query-budget checks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=200, help='Number of published projects.')
+        parser.add_argument('--images', type=int, default=6, help='Gallery images per project.')
+        parser.add_argument('--facts', type=int, default=4, help='Facts per project.')
+        parser.add_argument('--blogs', type=int, default=500, help='Number of published blogs.')
+        parser.add_argument('--banners', type=int, default=5, help='Homepage project banners.')
+        parser.add_argument('--clients', type=int, default=40, help='Clientele logos.')
+        parser.add_argument('--testimonials', type=int, default=10, help='Homepage and featured testimonials.')
+        parser.add_argument('--hitcounts', type=int, default=1_000_000, help='Daily HitCount rows.')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed gives the same data.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk insert.')
+        parser.add_argument('--clear', action='store_true', help='Delete previously seeded rows first.')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+
+        if options['clear']:
+            self.clear()
+
+        self.stdout.write(self.style.SUCCESS('Seeding scale dataset...'))
+        with transaction.atomic():
+            projects = self.seed_projects(options['projects'], options['images'], options['facts'])
+            blogs = self.seed_blogs(options['blogs'])
+            self.seed_homepage(projects, options['banners'], options['clients'], options['testimonials'])
+        self.seed_hitcounts(projects + blogs, options['hitcounts'])
+
+        for model in (Project, Blog):
+            HitCountTotal.objects.recompute(ContentType.objects.get_for_model(model), full=True)
+        # Bulk inserts bypass the signals that index media, tags and search and purge cached pages.
+        BlogTag.objects.rebuild(batch_size=self.batch_size)
+        call_command('rebuild_media_references', stdout=self.stdout)
+        call_command('rebuild_search_index', stdout=self.stdout)
+        bump_cache_version('site', 'homepage', 'about', 'project_list', 'blog_list')
+        self.stdout.write(self.style.SUCCESS('Finished seeding scale dataset.'))
+
+    def clear(self):
+        projects = Project.objects.filter(slug__startswith=f'{PREFIX}-')
+        blogs = Blog.objects.filter(slug__startswith=f'{PREFIX}-')
+        for model, queryset in ((Project, projects), (Blog, blogs)):
+            content_type = ContentType.objects.get_for_model(model)
+            ids = queryset.values('pk')
+            HitCount.objects.filter(content_type=content_type, object_id__in=ids).delete()
+            HitCountTotal.objects.filter(content_type=content_type, object_id__in=ids).delete()
+        projects.delete()
+        blogs.delete()
+        Clientele.objects.filter(name__startswith=f'{PREFIX} ').delete()
+        Testimonial.objects.filter(author_name__startswith=f'{PREFIX} ').delete()
+        HomepageTestimonial.objects.filter(customer_name__startswith=f'{PREFIX} ').delete()
+        Leadership.objects.filter(name__startswith=f'{PREFIX} ').delete()
+        self.stdout.write('Cleared previously seeded rows.')
+
+    def words(self, count):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(count))
+
+    def rich_text(self, paragraphs):
+        return ''.join(f'<h2>{self.words(4).title()}</h2><p>{self.words(80)}</p>' for _ in range(paragraphs))
+
+    def seed_projects(self, count, images, facts):
+        projects = Project.objects.bulk_create([
+            Project(
+                title=f'{self.words(3).title()} {n}',
+                slug=f'{PREFIX}-project-{n}',
+                status=Project.Status.PUBLISHED,
+                brief_description=self.words(40),
+                detail_content=self.rich_text(8),
+                feature_on_project_page=n < 6,
+            )
+            for n in range(count)
+        ], batch_size=self.batch_size)
+
+        ProjectImage.objects.bulk_create([
+            ProjectImage(
+                project=project,
+                image=f'project_images/{PREFIX}-{project.pk}-{n}.webp',
+                alt_text=self.words(3),
+                order=n,
+                main_image=n == 0,
+            )
+            for project in projects for n in range(images)
+        ], batch_size=self.batch_size)
+        ProjectFact.objects.bulk_create([
+            ProjectFact(project=project, key=f'Fact {n}', value=self.words(2))
+            for project in projects for n in range(facts)
+        ], batch_size=self.batch_size)
+
+        # The signals that maintain Project.main_image do not run for bulk inserts.
+        main_images = dict(
+            ProjectImage.objects.filter(project__in=projects, main_image=True).values_list('project_id', 'pk')
+        )
+        for project in projects:
+            project.main_image_id = main_images.get(project.pk)
+        Project.objects.bulk_update(projects, ['main_image'], batch_size=self.batch_size)
+        self.stdout.write(f'Created {len(projects)} projects with {images} images and {facts} facts each.')
+        return projects
+
+    def seed_blogs(self, count):
+        now = timezone.now()
+        blogs = Blog.objects.bulk_create([
+            Blog(
+                title=f'{self.words(5).title()} {n}',
+                slug=f'{PREFIX}-blog-{n}',
+                status=Blog.Status.PUBLISHED,
+                summary=self.words(30),
+                content=self.rich_text(12),
+                header_image_desktop=f'blog_headers/desktop/{PREFIX}-{n}.webp',
+                header_image_mobile=f'blog_headers/mobile/{PREFIX}-{n}.webp',
+                tags=', '.join(self.rng.sample(WORDS, 3)),
+                published_date=now - timedelta(hours=n),
+            )
+            for n in range(count)
+        ], batch_size=self.batch_size)
+        self.stdout.write(f'Created {len(blogs)} blogs.')
+        return blogs
+
+    def seed_homepage(self, projects, banners, clients, testimonials):
+        ProjectHomeBanner.objects.bulk_create([
+            ProjectHomeBanner(
+                project=projects[n % len(projects)] if projects else None,
+                scope=self.words(10),
+                tech_used=self.words(6),
+                performance_impact=self.words(6),
+                background_image=f'project_home_banners/{PREFIX}-{n}.webp',
+                cement_eliminated=f'{self.rng.randint(10, 90)}%',
+                water_saved=f'{self.rng.randint(1, 50)} KL',
+            )
+            for n in range(banners)
+        ])
+        Clientele.objects.bulk_create([
+            Clientele(name=f'{PREFIX} Client {n}', logo=f'clientele_logos/{PREFIX}-{n}.webp')
+            for n in range(clients)
+        ])
+        Testimonial.objects.bulk_create([
+            Testimonial(
+                quote=self.words(30), author_name=f'{PREFIX} Author {n}', author_title=self.words(2), is_featured=True,
+            )
+            for n in range(testimonials)
+        ])
+        HomepageTestimonial.objects.bulk_create([
+            HomepageTestimonial(
+                customer_name=f'{PREFIX} Customer {n}',
+                customer_designation=self.words(2),
+                customer_image=f'homepage_testimonials/{PREFIX}-{n}.webp',
+                testimonial=self.words(30),
+            )
+            for n in range(testimonials)
+        ])
+        Leadership.objects.bulk_create([
+            Leadership(
+                name=f'{PREFIX} Leader {n}', designation=self.words(2), description=self.words(40),
+                photo=f'leadership_photos/{PREFIX}-{n}.webp',
+            )
+            for n in range(4)
+        ])
+        self.stdout.write(f'Created {banners} banners, {clients} clients and {testimonials} testimonials.')
+
+    def seed_hitcounts(self, objects, total):
+        """Spreads ``total`` daily rows over the given objects, one row per object and day."""
+        if not objects or not total:
+            return
+        content_types = {model: ContentType.objects.get_for_model(model) for model in (Project, Blog)}
+        today = timezone.localdate()
+        batch = []
+        for n in range(total):
+            obj = objects[n % len(objects)]
+            batch.append(HitCount(
+                content_type=content_types[type(obj)],
+                object_id=obj.pk,
+                day=today - timedelta(days=n // len(objects)),
+                hits=self.rng.randint(1, 500),
+            ))
+            if len(batch) >= self.batch_size:
+                HitCount.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            HitCount.objects.bulk_create(batch)
+        self.stdout.write(f'Created {total} HitCount rows.')
@@ -0,0 +1,52 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import models
+from mainapp.models import ImageDerivative
+from mainapp.utils import validate_stored_image
+
+class Command(BaseCommand):
+    help = 'Re-validates every stored image against the upload limits, in parallel, and reports offenders.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(), help='Worker processes (default: one per CPU).',
+        )
+        parser.add_argument('--chunk-size', type=int, default=32, help='Files handed to a worker at a time.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Starting media validation...'))
+
+        # 1. Collect (model, pk, field, name) for every stored image
+        images = []
+        for model in apps.get_app_config('mainapp').get_models():
+            if model is ImageDerivative:
+                continue  # Generated by us from already validated originals
+            for field in model._meta.concrete_fields:
+                if isinstance(field, models.ImageField):
+                    rows = model.objects.exclude(**{field.name: ''}).values_list('pk', field.name)
+                    images.extend((model, pk, field, name) for pk, name in rows.iterator())
+
+        self.stdout.write(f'Checking {len(images)} images with {options["workers"]} processes.')
+
+        # 2. Header-only checks fan out across processes; workers only get paths and limits
+        limits = (settings.IMAGE_UPLOAD_MAX_MB, settings.IMAGE_UPLOAD_MAX_PIXELS, settings.IMAGE_UPLOAD_FORMATS)
+        paths = [field.storage.path(name) for model, pk, field, name in images]
+        with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+            errors = list(executor.map(
+                validate_stored_image, paths, *([limit] * len(paths) for limit in limits),
+                chunksize=options['chunk_size'],
+            ))
+
+        # 3. Report
+        offenders = [(image, error) for image, error in zip(images, errors) if error]
+        if not offenders:
+            self.stdout.write(self.style.SUCCESS('All images pass validation.'))
+            return
+
+        self.stdout.write(self.style.WARNING(f'Found {len(offenders)} invalid images:'))
+        for (model, pk, field, name), error in offenders:
+            self.stdout.write(f' - {model._meta.label} #{pk} {field.name}: {name} ({error})')
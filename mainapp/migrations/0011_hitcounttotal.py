@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('mainapp', '0010_alter_leadership_description'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HitCountTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('last_hit', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': 'Total Hit Count',
+                'verbose_name_plural': 'Total Hit Counts',
+                'unique_together': {('content_type', 'object_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0011_hitcounttotal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hitcount',
+            name='day',
+            field=models.DateField(null=True),
+        ),
+    ]
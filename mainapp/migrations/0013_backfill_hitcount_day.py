@@ -0,0 +1,49 @@
+from django.db import migrations, transaction
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncDate
+
+BATCH_SIZE = 10000
+
+
+def backfill_day(apps, schema_editor):
+    """Copies created_at's date into day in primary-key batches, then merges same-day duplicates."""
+    HitCount = apps.get_model('mainapp', 'HitCount')
+    db_alias = schema_editor.connection.alias
+    rows = HitCount.objects.using(db_alias)
+
+    bounds = rows.aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        return
+    for start in range(bounds['low'], bounds['high'] + 1, BATCH_SIZE):
+        with transaction.atomic(using=db_alias):
+            rows.filter(pk__gte=start, pk__lt=start + BATCH_SIZE, day__isnull=True).update(
+                day=TruncDate('created_at'),
+            )
+
+    # unique_together on the full timestamp allowed several "daily" rows per day.
+    duplicates = (
+        rows.values('content_type_id', 'object_id', 'day')
+        .annotate(rows=Count('pk'), hits_total=Sum('hits'), keep=Min('pk'), latest=Max('last_hit'))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    for group in duplicates.iterator():
+        with transaction.atomic(using=db_alias):
+            same_day = rows.filter(
+                content_type_id=group['content_type_id'], object_id=group['object_id'], day=group['day'],
+            )
+            same_day.exclude(pk=group['keep']).delete()
+            same_day.filter(pk=group['keep']).update(hits=group['hits_total'], last_hit=group['latest'])
+
+
+class Migration(migrations.Migration):
+    # Each batch commits on its own so large tables are not backfilled in one transaction.
+    atomic = False
+
+    dependencies = [
+        ('mainapp', '0012_hitcount_day'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_day, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-17 09:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('mainapp', '0013_backfill_hitcount_day'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='hitcount',
+            name='day',
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+        migrations.AlterUniqueTogether(
+            name='hitcount',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='hitcount',
+            constraint=models.UniqueConstraint(fields=('content_type', 'object_id', 'day'), name='unique_hitcount_per_day'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0014_hitcount_unique_day'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hitcount',
+            name='unique_visitors',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
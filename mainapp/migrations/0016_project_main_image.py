@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_main_images(apps, schema_editor):
+    """Keeps one main-flagged image per project and points each project at its main image."""
+    Project = apps.get_model('mainapp', 'Project')
+    ProjectImage = apps.get_model('mainapp', 'ProjectImage')
+    db_alias = schema_editor.connection.alias
+
+    for project in Project.objects.using(db_alias).only('pk').iterator():
+        images = ProjectImage.objects.using(db_alias).filter(project=project).order_by('-main_image', 'order', 'pk')
+        main = images.values_list('pk', 'main_image').first()
+        if main is None:
+            continue
+        if main[1]:
+            images.filter(main_image=True).exclude(pk=main[0]).update(main_image=False)
+        Project.objects.using(db_alias).filter(pk=project.pk).update(main_image=main[0])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0015_hitcount_unique_visitors'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='main_image',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='mainapp.projectimage'),
+        ),
+        migrations.RunPython(populate_main_images, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='projectimage',
+            constraint=models.UniqueConstraint(condition=models.Q(('main_image', True)), fields=('project',), name='unique_main_image_per_project'),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:57
+
+import html
+import os
+import re
+from urllib.parse import unquote
+
+import django.db.models.deletion
+from ckeditor.fields import RichTextField
+from django.conf import settings
+from django.db import migrations, models
+
+INDEXED_MODELS = (
+    'Clientele', 'Testimonial', 'HomepageTestimonial', 'TeamMember', 'Leadership',
+    'Project', 'ProjectImage', 'ProjectHomeBanner', 'Blog',
+)
+
+
+def extract_media_references(content):
+    """
+    A frozen copy of mainapp.utils.extract_media_references() as of this
+    migration: the storage names of the media files linked from rich-text HTML,
+    including the thumbnails CKEditor keeps next to its uploads.
+    """
+    pattern = re.escape(settings.MEDIA_URL) + r'''([^"'\s<>()?#]+)'''
+    for match in re.finditer(pattern, content or ''):
+        name = unquote(html.unescape(match.group(1)))
+        yield name
+        if name.startswith(settings.CKEDITOR_UPLOAD_PATH):
+            yield '{0}_thumb{1}'.format(*os.path.splitext(name))
+
+
+def populate_media_references(apps, schema_editor):
+    """Indexes the media files used by existing rows; signals keep the index current afterwards."""
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    MediaReference = apps.get_model('mainapp', 'MediaReference')
+    db_alias = schema_editor.connection.alias
+
+    for model_name in INDEXED_MODELS:
+        model = apps.get_model('mainapp', model_name)
+        content_type, _ = ContentType.objects.using(db_alias).get_or_create(
+            app_label='mainapp', model=model_name.lower(),
+        )
+        file_fields = [f.name for f in model._meta.concrete_fields if isinstance(f, models.FileField)]
+        html_fields = [f.name for f in model._meta.concrete_fields if isinstance(f, RichTextField)]
+        batch = []
+        for row in model.objects.using(db_alias).values('pk', *file_fields, *html_fields).iterator(chunk_size=1000):
+            references = {(name, row[name]) for name in file_fields if row[name]}
+            for name in html_fields:
+                references.update((name, path) for path in extract_media_references(row[name]) if len(path) <= 255)
+            batch.extend(
+                MediaReference(content_type=content_type, object_id=row['pk'], field=field, path=path)
+                for field, path in references
+            )
+            if len(batch) >= 1000:
+                MediaReference.objects.using(db_alias).bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        MediaReference.objects.using(db_alias).bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('mainapp', '0017_imagederivative'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaReference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(db_index=True, max_length=255)),
+                ('object_id', models.PositiveIntegerField()),
+                ('field', models.CharField(max_length=100)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'ordering': ['path'],
+                'constraints': [models.UniqueConstraint(fields=('content_type', 'object_id', 'field', 'path'), name='unique_media_reference')],
+            },
+        ),
+        migrations.RunPython(populate_media_references, migrations.RunPython.noop),
+    ]
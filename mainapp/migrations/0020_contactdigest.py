@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def set_high_water_mark(apps, schema_editor):
+    """Starts the digests after the existing submissions, which were already emailed one by one."""
+    ContactSubmission = apps.get_model('mainapp', 'ContactSubmission')
+    ContactDigest = apps.get_model('mainapp', 'ContactDigest')
+    db_alias = schema_editor.connection.alias
+    last = ContactSubmission.objects.using(db_alias).aggregate(last=Max('pk'))['last']
+    ContactDigest.objects.using(db_alias).create(last_submission_id=last or 0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0019_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContactDigest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_submission_id', models.PositiveBigIntegerField(blank=True, null=True, unique=True)),
+                ('last_submission_id', models.PositiveBigIntegerField(db_index=True)),
+                ('submission_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('message', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='contact_digest', to='mainapp.outboxmessage')),
+            ],
+            options={
+                'ordering': ['-last_submission_id'],
+            },
+        ),
+        migrations.RunPython(set_high_water_mark, migrations.RunPython.noop),
+    ]
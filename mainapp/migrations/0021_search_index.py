@@ -0,0 +1,175 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:18
+
+import html
+import re
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Avg, ExpressionWrapper, F, FloatField, OuterRef, Subquery, Value
+from django.utils.html import strip_tags
+
+# Frozen copies of mainapp.search as of this migration; later changes to the
+# analysis are picked up by `manage.py rebuild_search_index`.
+BATCH_SIZE = 500
+WORD_RE = re.compile(r'\w+')
+MAX_TERM_LENGTH = 64
+SUMMARY_LENGTH = 240
+K1 = 1.2
+B = 0.75
+STOPWORDS = frozenset(
+    'a an and are as at be by for from has have in is it its of on or that the this to was were will with'.split()
+)
+# model name -> (((field, weight), ...), detail URL)
+SEARCH_FIELDS = {
+    'project': ((('title', 3), ('brief_description', 2), ('detail_content', 1)), '/projects/{}/'),
+    'blog': ((('title', 3), ('summary', 2), ('tags', 2), ('content', 1)), '/blog/{}/'),
+}
+
+
+def plain_text(value):
+    return ' '.join(html.unescape(strip_tags(value or '')).split())
+
+
+def tokenize(text):
+    return [
+        word for word in WORD_RE.findall(text.lower())
+        if 1 < len(word) <= MAX_TERM_LENGTH and word not in STOPWORDS
+    ]
+
+
+def analyze(row, fields, url):
+    """Returns ``(SearchDocument columns, Counter of weighted term frequencies)`` for one published row."""
+    terms = Counter()
+    length = 0
+    for field, weight in fields:
+        words = tokenize(plain_text(row[field]))
+        length += len(words)
+        for word in words:
+            terms[word] += weight
+    summary = plain_text(row[fields[1][0]])
+    if len(summary) > SUMMARY_LENGTH:
+        summary = summary[:SUMMARY_LENGTH].rsplit(' ', 1)[0] + '…'
+    return {'title': row['title'][:255], 'url': url.format(row['slug']), 'summary': summary, 'length': length}, terms
+
+
+def index_batch(apps, content_type, batch, term_ids, document_counts, db_alias):
+    SearchDocument = apps.get_model('mainapp', 'SearchDocument')
+    SearchTerm = apps.get_model('mainapp', 'SearchTerm')
+    SearchPosting = apps.get_model('mainapp', 'SearchPosting')
+    if not batch:
+        return
+    documents = SearchDocument.objects.using(db_alias).bulk_create([
+        SearchDocument(content_type=content_type, object_id=object_id, **columns)
+        for object_id, columns, terms in batch
+    ])
+    new_terms = {term for _, _, terms in batch for term in terms} - term_ids.keys()
+    for term in SearchTerm.objects.using(db_alias).bulk_create([SearchTerm(term=term) for term in new_terms]):
+        term_ids[term.term] = term.pk
+    postings = []
+    for document, (_, _, terms) in zip(documents, batch):
+        document_counts.update(terms.keys())
+        postings.extend(
+            SearchPosting(term_id=term_ids[term], document=document, frequency=frequency, impact=0)
+            for term, frequency in terms.items()
+        )
+    SearchPosting.objects.using(db_alias).bulk_create(postings, batch_size=5000)
+
+
+def backfill_search_index(apps, schema_editor):
+    """Indexes the published projects and blogs, in batches; signals keep the index current afterwards."""
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    SearchDocument = apps.get_model('mainapp', 'SearchDocument')
+    SearchTerm = apps.get_model('mainapp', 'SearchTerm')
+    SearchPosting = apps.get_model('mainapp', 'SearchPosting')
+    db_alias = schema_editor.connection.alias
+    term_ids = {}
+    document_counts = Counter()
+
+    for model_name, (fields, url) in SEARCH_FIELDS.items():
+        model = apps.get_model('mainapp', model_name)
+        rows = model.objects.using(db_alias).filter(status='PUBLISHED').order_by('pk').values(
+            'pk', 'slug', *{field for field, weight in fields},
+        )
+        if not rows.exists():
+            continue
+        content_type, _ = ContentType.objects.using(db_alias).get_or_create(app_label='mainapp', model=model_name)
+        batch = []
+        for row in rows.iterator(chunk_size=BATCH_SIZE):
+            batch.append((row['pk'], *analyze(row, fields, url)))
+            if len(batch) >= BATCH_SIZE:
+                index_batch(apps, content_type, batch, term_ids, document_counts, db_alias)
+                batch = []
+        index_batch(apps, content_type, batch, term_ids, document_counts, db_alias)
+
+    if not term_ids:
+        return
+    terms = list(SearchTerm.objects.using(db_alias).all())
+    for term in terms:
+        term.document_count = document_counts[term.term]
+    SearchTerm.objects.using(db_alias).bulk_update(terms, ['document_count'], batch_size=BATCH_SIZE)
+
+    # The BM25 term-frequency component of every posting, now that the average length is known.
+    average_length = SearchDocument.objects.using(db_alias).aggregate(average=Avg('length'))['average'] or 1
+    length = Subquery(SearchDocument.objects.using(db_alias).filter(pk=OuterRef('document_id')).values('length'))
+    SearchPosting.objects.using(db_alias).update(impact=ExpressionWrapper(
+        F('frequency') * Value(K1 + 1) / (
+            F('frequency') + Value(K1) * (Value(1 - B) + Value(B) * length / Value(float(average_length)))
+        ),
+        output_field=FloatField(),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('mainapp', '0020_contactdigest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, unique=True)),
+                ('document_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('url', models.CharField(max_length=255)),
+                ('summary', models.TextField(blank=True)),
+                ('length', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SearchPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('frequency', models.PositiveIntegerField()),
+                ('impact', models.FloatField()),
+                ('document', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='postings', to='mainapp.searchdocument')),
+                ('term', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='postings', to='mainapp.searchterm')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='searchdocument',
+            constraint=models.UniqueConstraint(fields=('content_type', 'object_id'), name='unique_search_document'),
+        ),
+        migrations.AddIndex(
+            model_name='searchposting',
+            index=models.Index(fields=['term', '-impact', 'document'], name='search_posting_impact_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='searchposting',
+            constraint=models.UniqueConstraint(fields=('document', 'term'), name='unique_search_posting'),
+        ),
+        migrations.RunPython(backfill_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.text import slugify
+
+BATCH_SIZE = 500
+
+
+def parse_tags(value):
+    """A frozen copy of mainapp.utils.parse_tags() as of this migration: ``{slug: name}``, in order."""
+    tags = {}
+    for name in (value or '').split(','):
+        name = ' '.join(name.split())[:100]
+        slug = slugify(name)[:100]
+        if slug and slug not in tags:
+            tags[slug] = name
+    return tags
+
+
+def index_batch(Tag, BlogTag, batch, db_alias):
+    names = {slug: name for _, tags in batch for slug, name in tags.items()}
+    if not names:
+        return
+    Tag.objects.using(db_alias).bulk_create(
+        [Tag(slug=slug, name=name) for slug, name in names.items()], ignore_conflicts=True,
+    )
+    tag_ids = dict(Tag.objects.using(db_alias).filter(slug__in=names).values_list('slug', 'pk'))
+    BlogTag.objects.using(db_alias).bulk_create([
+        BlogTag(blog_id=blog_id, tag_id=tag_ids[slug]) for blog_id, tags in batch for slug in tags
+    ])
+
+
+def backfill_blog_tags(apps, schema_editor):
+    """Indexes the tags of the existing blogs, in batches; signals keep the index current afterwards."""
+    Blog = apps.get_model('mainapp', 'Blog')
+    Tag = apps.get_model('mainapp', 'Tag')
+    BlogTag = apps.get_model('mainapp', 'BlogTag')
+    db_alias = schema_editor.connection.alias
+
+    batch = []
+    blogs = Blog.objects.using(db_alias).exclude(tags='').order_by('pk').values_list('pk', 'tags')
+    for blog_id, tags in blogs.iterator(chunk_size=BATCH_SIZE):
+        batch.append((blog_id, parse_tags(tags)))
+        if len(batch) >= BATCH_SIZE:
+            index_batch(Tag, BlogTag, batch, db_alias)
+            batch = []
+    index_batch(Tag, BlogTag, batch, db_alias)
+
+    published = BlogTag.objects.using(db_alias).filter(
+        tag=OuterRef('pk'), blog__status='PUBLISHED',
+    ).values('tag').annotate(count=Count('pk')).values('count')
+    Tag.objects.using(db_alias).update(blog_count=Coalesce(Subquery(published), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0021_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(max_length=100, unique=True)),
+                ('blog_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BlogTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('blog', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='blog_tags', to='mainapp.blog')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='blog_tags', to='mainapp.tag')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('blog', 'tag'), name='unique_blog_tag')],
+            },
+        ),
+        migrations.RunPython(backfill_blog_tags, migrations.RunPython.noop),
+    ]
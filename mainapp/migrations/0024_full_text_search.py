@@ -0,0 +1,94 @@
+from django.db import migrations
+
+# Mirrors mainapp.fulltext.FULL_TEXT_INDEXES as it was when this migration was
+# written; a later change to the indexed columns needs a migration of its own.
+INDEXES = {
+    'mainapp_contactsubmission': ('first_name', 'last_name', 'email', 'message'),
+    'mainapp_project': ('title', 'brief_description'),
+    'mainapp_blog': ('title', 'summary'),
+}
+
+
+def sqlite_forwards(table, columns):
+    fts = f'{table}_fts'
+    names = ', '.join(f'"{column}"' for column in columns)
+    new = ', '.join(f'new."{column}"' for column in columns)
+    old = ', '.join(f'old."{column}"' for column in columns)
+    return [
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS "{fts}" USING fts5({names}, '
+        f'content="{table}", content_rowid="id", tokenize=\'unicode61 remove_diacritics 2\')',
+        f'CREATE TRIGGER IF NOT EXISTS "{fts}_ai" AFTER INSERT ON "{table}" BEGIN '
+        f'INSERT INTO "{fts}"(rowid, {names}) VALUES (new."id", {new}); END',
+        f'CREATE TRIGGER IF NOT EXISTS "{fts}_ad" AFTER DELETE ON "{table}" BEGIN '
+        f'INSERT INTO "{fts}"("{fts}", rowid, {names}) VALUES (\'delete\', old."id", {old}); END',
+        # Only when an indexed column changes, so e.g. marking a submission notified costs nothing.
+        f'CREATE TRIGGER IF NOT EXISTS "{fts}_au" AFTER UPDATE OF {names} ON "{table}" BEGIN '
+        f'INSERT INTO "{fts}"("{fts}", rowid, {names}) VALUES (\'delete\', old."id", {old}); '
+        f'INSERT INTO "{fts}"(rowid, {names}) VALUES (new."id", {new}); END',
+        # Index the rows that already exist (or repair an index the old post_migrate hook built).
+        f'INSERT INTO "{fts}"("{fts}") VALUES (\'rebuild\')',
+    ]
+
+
+def sqlite_backwards(table):
+    fts = f'{table}_fts'
+    return [f'DROP TRIGGER IF EXISTS "{fts}_{suffix}"' for suffix in ('ai', 'ad', 'au')] + [
+        f'DROP TABLE IF EXISTS "{fts}"',
+    ]
+
+
+def postgresql_forwards(table, columns):
+    # The expression must stay identical to fulltext._tsvector() for queries to use it.
+    document = " || ' ' || ".join(f'coalesce("{column}", \'\')' for column in columns)
+    return [f'CREATE INDEX IF NOT EXISTS "{table}_fts_idx" ON "{table}" '
+            f"USING GIN (to_tsvector('english'::regconfig, {document}))"]
+
+
+def postgresql_backwards(table):
+    return [f'DROP INDEX IF EXISTS "{table}_fts_idx"']
+
+
+class VendorRunSQL(migrations.RunSQL):
+    """RunSQL that only runs on one database vendor (and, for SQLite, only with FTS5 compiled in)."""
+
+    def __init__(self, vendor, sql, reverse_sql):
+        self.vendor = vendor
+        super().__init__(sql, reverse_sql)
+
+    def deconstruct(self):
+        name, args, kwargs = super().deconstruct()
+        kwargs['vendor'] = self.vendor
+        return name, args, kwargs
+
+    def applies(self, connection):
+        if connection.vendor != self.vendor:
+            return False
+        if self.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA compile_options')
+                return any(option == 'ENABLE_FTS5' for (option,) in cursor.fetchall())
+        return True
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if self.applies(schema_editor.connection):
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if self.applies(schema_editor.connection):
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0023_outboxmessage_claimed_by'),
+    ]
+
+    operations = [
+        operation
+        for table, columns in INDEXES.items()
+        for operation in (
+            VendorRunSQL('sqlite', sqlite_forwards(table, columns), sqlite_backwards(table)),
+            VendorRunSQL('postgresql', postgresql_forwards(table, columns), postgresql_backwards(table)),
+        )
+    ]
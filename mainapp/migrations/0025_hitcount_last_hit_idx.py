@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('mainapp', '0024_full_text_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='hitcount',
+            index=models.Index(fields=['content_type', 'last_hit'], name='hitcount_last_hit_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:45
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def count_documents(apps, schema_editor):
+    """Starts the running totals from the documents already in the index."""
+    SearchDocument = apps.get_model('mainapp', 'SearchDocument')
+    SearchStatistics = apps.get_model('mainapp', 'SearchStatistics')
+    db_alias = schema_editor.connection.alias
+    totals = SearchDocument.objects.using(db_alias).aggregate(documents=Count('pk'), length=Sum('length'))
+    SearchStatistics.objects.using(db_alias).create(
+        pk=1, document_count=totals['documents'], total_length=totals['length'] or 0,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0025_hitcount_last_hit_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('document_count', models.PositiveIntegerField(default=0)),
+                ('total_length', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'search statistics',
+            },
+        ),
+        migrations.RunPython(count_documents, migrations.RunPython.noop),
+    ]
@@ -1,14 +1,50 @@
-from django.db import models
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, models, transaction
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
 from django.core.cache import caches
 from django.core.exceptions import ValidationError
-from django.db.models import F
+from django.db.models import Count, F, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
 from django.utils import timezone
+from ckeditor.fields import RichTextField
 from ckeditor_uploader.fields import RichTextUploadingField
 
-# NOTE: Add image validation logic (e.g., file size, dimensions) in clean() methods
-# or using signals for more robust validation before saving.
+from .hyperloglog import add_to_sketch, count_sketches
+from .search import analyze, impact
+from .utils import extract_media_references, image_validate_and_resize, parse_tags
+
+
+def new_uploads(instance):
+    """Returns the (field name, file) pairs of ``instance`` holding a file not stored yet."""
+    return [
+        (field.name, getattr(instance, field.name)) for field in instance._meta.concrete_fields
+        if isinstance(field, models.ImageField)
+        and getattr(instance, field.name)
+        and not getattr(instance, field.name)._committed
+    ]
+
+
+class ValidatedImagesMixin:
+    """
+    Validates fresh image uploads in clean(), reading only their headers (see
+    image_validate_and_resize). signals.py repeats the check on save for code
+    paths that skip full_clean().
+    """
+
+    def clean(self):
+        super().clean()
+        errors = {}
+        for name, file in new_uploads(self):
+            try:
+                image_validate_and_resize(file)
+            except ValidationError as e:
+                errors[name] = e.messages
+        if errors:
+            raise ValidationError(errors)
 
 class ServiceCategory(models.Model):
     """Represents a category of service offered."""
@@ -21,7 +57,7 @@ class ServiceCategory(models.Model):
     class Meta:
         verbose_name_plural = "Service Categories"
 
-class Clientele(models.Model):
+class Clientele(ValidatedImagesMixin, models.Model):
     """Represents a client or partner."""
     name = models.CharField(max_length=100, unique=True)
     logo = models.ImageField(upload_to='clientele_logos/')
@@ -31,7 +67,7 @@ class Clientele(models.Model):
     def __str__(self):
         return self.name
 
-class Testimonial(models.Model):
+class Testimonial(ValidatedImagesMixin, models.Model):
     """Represents a testimonial from a client."""
     quote = models.TextField()
     author_name = models.CharField(max_length=100)
@@ -44,7 +80,7 @@ class Testimonial(models.Model):
         return f'"{self.quote[:30]}..." - {self.author_name}'
 
 
-class HomepageTestimonial(models.Model):
+class HomepageTestimonial(ValidatedImagesMixin, models.Model):
     customer_name = models.CharField("Customer Name", max_length=75)
     customer_designation = models.CharField("Customer Designation", max_length=75)
     customer_image = models.ImageField("Customer Image", upload_to='homepage_testimonials/', blank=True)
@@ -53,7 +89,7 @@ class HomepageTestimonial(models.Model):
     def __str__(self):
         return self.customer_name
 
-class TeamMember(models.Model):
+class TeamMember(ValidatedImagesMixin, models.Model):
     """Represents a member of the team. Not a Django user."""
     name = models.CharField(max_length=255)
     role = models.CharField(max_length=150)
@@ -69,7 +105,7 @@ class TeamMember(models.Model):
         ordering = ['order']
 
 
-class Leadership(models.Model):
+class Leadership(ValidatedImagesMixin, models.Model):
     """Represents a leadership member displayed on the About page."""
     name = models.CharField(max_length=50)
     designation = models.CharField(max_length=100)
@@ -103,20 +139,31 @@ class Project(models.Model):
     meta_keywords = models.CharField(max_length=255, blank=True, help_text="Comma-separated keywords.")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized result of resolve_main_image(), kept current by the ProjectImage
+    # signals so list pages can select_related('main_image') instead of querying per card.
+    main_image = models.ForeignKey(
+        'ProjectImage', on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='+',
+    )
 
     def __str__(self):
         return self.title
 
-    @property
-    def main_image(self):
-        """Return the designated main image for this project, falling back to the first gallery image."""
+    def resolve_main_image(self):
+        """
+        Return the designated main image for this project, falling back to the first gallery image.
+        Uses the prefetched gallery when the project was loaded with prefetch_related('gallery_images').
+        """
+        prefetched = getattr(self, '_prefetched_objects_cache', {}).get('gallery_images')
+        if prefetched is not None:
+            images = list(prefetched)
+            return next((image for image in images if image.main_image), images[0] if images else None)
         main = self.gallery_images.filter(main_image=True).first()
         if main:
             return main
         return self.gallery_images.first()
 
 
-class ProjectImage(models.Model):
+class ProjectImage(ValidatedImagesMixin, models.Model):
     """Represents a gallery image for a Project."""
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='gallery_images')
     image = models.ImageField(upload_to='project_images/')
@@ -127,6 +174,11 @@ class ProjectImage(models.Model):
 
     class Meta:
         ordering = ['order']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['project'], condition=models.Q(main_image=True), name='unique_main_image_per_project',
+            ),
+        ]
 
     def __str__(self):
         return self.alt_text or f"Image for {self.project.title}"
@@ -145,7 +197,7 @@ class ProjectFact(models.Model):
         return f"{self.key}: {self.value}"
 
 
-class ProjectHomeBanner(models.Model):
+class ProjectHomeBanner(ValidatedImagesMixin, models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="home_banners", null=True, blank=True)
     scope = models.CharField("Scope", max_length=300)
     tech_used = models.CharField("Tech Used", max_length=200)
@@ -157,7 +209,18 @@ class ProjectHomeBanner(models.Model):
     def __str__(self):
         return self.project.title
 
-class Blog(models.Model):
+class BlogQuerySet(models.QuerySet):
+    # Columns shown on blog cards (list, homepage, About page).
+    CARD_FIELDS = ('id', 'title', 'slug', 'status', 'summary', 'header_image_desktop', 'published_date', 'created_at')
+
+    def published(self):
+        return self.filter(status=Blog.Status.PUBLISHED)
+
+    def cards(self):
+        """Loads only the card columns, leaving out the rich-text content and meta fields."""
+        return self.only(*self.CARD_FIELDS)
+
+class Blog(ValidatedImagesMixin, models.Model):
     """Represents a blog post."""
     class Status(models.TextChoices):
         DRAFT = 'DRAFT', 'Draft'
@@ -170,7 +233,7 @@ class Blog(models.Model):
     content = RichTextUploadingField()
     header_image_desktop = models.ImageField(upload_to='blog_headers/desktop/')
     header_image_mobile = models.ImageField(upload_to='blog_headers/mobile/')
-    # NOTE: For a more robust tagging system, consider using a library like django-taggit.
+    # Mirrored into the Tag/BlogTag index on save, which tag pages and counts read.
     tags = models.CharField(max_length=255, blank=True, help_text="Comma-separated tags.")
     published_date = models.DateTimeField(default=timezone.now, db_index=True)
     meta_description = models.CharField(max_length=160, blank=True)
@@ -179,9 +242,99 @@ class Blog(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     hitcount = GenericRelation('HitCount', object_id_field='object_id', content_type_field='content_type')
 
+    objects = BlogQuerySet.as_manager()
+
     def __str__(self):
         return self.title
 
+class TagQuerySet(models.QuerySet):
+    def in_use(self):
+        """Tags of at least one published blog, most used first."""
+        return self.filter(blog_count__gt=0).order_by('-blog_count', 'name')
+
+    def refresh_counts(self):
+        published = BlogTag.objects.filter(
+            tag=OuterRef('pk'), blog__status=Blog.Status.PUBLISHED,
+        ).values('tag').annotate(count=Count('pk')).values('count')
+        return self.update(blog_count=Coalesce(Subquery(published), 0))
+
+class Tag(models.Model):
+    """A blog tag, normalized from Blog.tags (see BlogTag)."""
+    name = models.CharField(max_length=100)
+    slug = models.SlugField(max_length=100, unique=True)
+    # Published blogs with this tag; refreshed whenever one of them is saved or deleted.
+    blog_count = models.PositiveIntegerField(default=0)
+
+    objects = TagQuerySet.as_manager()
+
+    def __str__(self):
+        return self.name
+
+class BlogTagManager(models.Manager):
+    def sync(self, blog):
+        """Brings the index rows of ``blog`` in line with its tags field and refreshes the affected counts."""
+        tags = parse_tags(blog.tags)
+        with transaction.atomic():
+            if tags:
+                Tag.objects.bulk_create([Tag(slug=slug, name=name) for slug, name in tags.items()], ignore_conflicts=True)
+            current = set(Tag.objects.filter(slug__in=tags).values_list('pk', flat=True))
+            stored = set(self.filter(blog=blog).values_list('tag_id', flat=True))
+            if stored - current:
+                self.filter(blog=blog, tag_id__in=stored - current).delete()
+            self.bulk_create([self.model(blog=blog, tag_id=tag_id) for tag_id in current - stored])
+            # Counts only include published blogs, so a status change moves all of them.
+            if current | stored:
+                Tag.objects.filter(pk__in=current | stored).refresh_counts()
+
+    def clear(self, blog):
+        """Refreshes the counts of a deleted blog's tags; its rows went with it."""
+        Tag.objects.filter(slug__in=parse_tags(blog.tags)).refresh_counts()
+
+    def rebuild(self, batch_size=500):
+        """Rebuilds the whole index from every blog's tags field, in batches (e.g. after bulk imports)."""
+        with transaction.atomic():
+            self.all().delete()
+            batch = []
+            blogs = Blog.objects.exclude(tags='').order_by('pk').values_list('pk', 'tags')
+            for blog_id, tags in blogs.iterator(chunk_size=batch_size):
+                batch.append((blog_id, parse_tags(tags)))
+                if len(batch) >= batch_size:
+                    self._index(batch)
+                    batch = []
+            self._index(batch)
+            Tag.objects.refresh_counts()
+
+    def _index(self, batch):
+        names = {slug: name for _, tags in batch for slug, name in tags.items()}
+        if not names:
+            return
+        Tag.objects.bulk_create([Tag(slug=slug, name=name) for slug, name in names.items()], ignore_conflicts=True)
+        tag_ids = dict(Tag.objects.filter(slug__in=names).values_list('slug', 'pk'))
+        self.bulk_create([
+            self.model(blog_id=blog_id, tag_id=tag_ids[slug]) for blog_id, tags in batch for slug in tags
+        ])
+
+class BlogTag(models.Model):
+    """
+    Index of which blog carries which tag, maintained on save by signals.py, so
+    tag pages and counts are indexed joins instead of scans of Blog.tags.
+    """
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='blog_tags')
+    blog = models.ForeignKey(Blog, on_delete=models.CASCADE, related_name='blog_tags')
+
+    objects = BlogTagManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['blog', 'tag'], name='unique_blog_tag'),
+        ]
+
+class ContactSubmissionQuerySet(models.QuerySet):
+    def awaiting_digest(self):
+        """Submissions not yet reported and without an email of their own ('immediate' mode)."""
+        return self.filter(notified=False, outbox_messages__isnull=True)
+
+
 class ContactSubmission(models.Model):
     """Represents a submission from the contact form."""
     first_name = models.CharField(max_length=100)
@@ -190,6 +343,10 @@ class ContactSubmission(models.Model):
     mobile_number = models.CharField(max_length=20)
     message = models.TextField()
     submission_date = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Set by the outbox worker once the notification email has been sent.
+    notified = models.BooleanField(default=False)
+
+    objects = ContactSubmissionQuerySet.as_manager()
 
     def __str__(self):
         return f"Submission from {self.first_name} {self.last_name} ({self.email})"
@@ -197,13 +354,133 @@ class ContactSubmission(models.Model):
     class Meta:
         ordering = ['-submission_date']
 
+
+class OutboxMessageManager(models.Manager):
+    def enqueue_email(self, subject, body, recipients, html_body='', from_email=None, submission=None):
+        """
+        Queues an email for `manage.py run_outbox_worker`. Call it inside the
+        transaction that writes the data it announces, so both commit together.
+        """
+        return self.create(
+            subject=subject,
+            body=body,
+            html_body=html_body,
+            from_email=from_email or settings.EMAIL_HOST_USER,
+            recipients=list(recipients),
+            submission=submission,
+        )
+
+    def claim(self, batch_size):
+        """
+        Leases up to ``batch_size`` due messages to the calling worker by pushing
+        their next_attempt_at past the lease and stamping them with a fresh token.
+        A worker that dies mid-batch simply lets the lease expire and another
+        worker retries.
+        """
+        now = timezone.now()
+        token = uuid.uuid4().hex
+        due = self.filter(status=OutboxMessage.Status.PENDING, next_attempt_at__lte=now)
+        lease = {'next_attempt_at': now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS), 'claimed_by': token}
+        oldest = due.order_by('next_attempt_at', 'pk')
+        if connections[self.db].features.has_select_for_update_skip_locked:
+            with transaction.atomic(using=self.db):
+                ids = list(oldest.select_for_update(skip_locked=True).values_list('pk', flat=True)[:batch_size])
+                due.filter(pk__in=ids).update(**lease)
+        else:
+            # One conditional UPDATE: a row another worker leased a moment ago no longer
+            # matches ``due``, and there is no read-then-write transaction to lock up.
+            due.filter(pk__in=oldest.values('pk')[:batch_size]).update(**lease)
+        return list(self.filter(claimed_by=token).select_related('contact_digest').order_by('pk'))
+
+
+class OutboxMessage(models.Model):
+    """
+    An email written in the same transaction as the data it announces and sent
+    later by `manage.py run_outbox_worker`, so requests never wait on SMTP.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        SENT = 'SENT', 'Sent'
+        FAILED = 'FAILED', 'Failed'
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=255, blank=True)
+    recipients = models.JSONField(default=list)
+    submission = models.ForeignKey(
+        ContactSubmission, on_delete=models.SET_NULL, null=True, blank=True, related_name='outbox_messages',
+    )
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    # Token of the worker holding the current lease; see OutboxMessageManager.claim().
+    claimed_by = models.CharField(max_length=32, blank=True, db_index=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    objects = OutboxMessageManager()
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} ({self.get_status_display()})"
+
+
+class ContactDigestManager(models.Manager):
+    def high_water_mark(self):
+        """Returns ``(last reported submission id, when)``, or ``(0, None)`` before the first digest."""
+        latest = self.order_by('-last_submission_id').values_list('last_submission_id', 'created_at').first()
+        return latest or (0, None)
+
+
+class ContactDigest(models.Model):
+    """
+    One digest email reporting the contact submissions with ids in
+    ``first_submission_id..last_submission_id`` that were not emailed on their own.
+    The highest ``last_submission_id`` is the high-water mark the next digest starts
+    after, so each submission is reported exactly once. A row without a message
+    only moves the mark past submissions sent in 'immediate' mode.
+    """
+    # Unique, so two workers racing to build the same digest cannot both succeed.
+    first_submission_id = models.PositiveBigIntegerField(null=True, blank=True, unique=True)
+    last_submission_id = models.PositiveBigIntegerField(db_index=True)
+    submission_count = models.PositiveIntegerField(default=0)
+    message = models.OneToOneField(
+        OutboxMessage, on_delete=models.SET_NULL, null=True, blank=True, related_name='contact_digest',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = ContactDigestManager()
+
+    class Meta:
+        ordering = ['-last_submission_id']
+
+    def __str__(self):
+        return f"Digest of {self.submission_count} submissions ({self.created_at:%Y-%m-%d %H:%M})"
+
 # --- Analytics Models ---
 
 class HitCountManager(models.Manager):
+    # Buffered counters are kept long enough to survive a missed flush run.
+    BUFFER_TIMEOUT = 3 * 24 * 60 * 60
+
     def increment(self, obj, request=None, delta=1, debounce_seconds=60):
         """
         Increments the hit count for a given object, with debouncing to prevent 
         rapid-fire increments from a single visitor.
+
+        With settings.HITCOUNT_BUFFERED enabled the hit is only added to a cache
+        counter; flush_buffered() (see the flush_hit_counts command) persists it.
+
+        With settings.HITCOUNT_UNIQUE_VISITORS enabled, the per-visitor debounce keys
+        are replaced by one HyperLogLog sketch per object and day: every view counts
+        as a hit and unique_visitors holds the approximate number of distinct visitors.
         """
         if not obj:
             return
@@ -216,29 +493,142 @@ class HitCountManager(models.Manager):
             from .utils import get_visitor_key
             visitor_key = get_visitor_key(request)
 
-        # Use cache to debounce hits from the same visitor
-        cache_key = f"hit::{content_type.id}::{obj.pk}::{visitor_key}"
         cache = caches['default']
-        
-        # NOTE: This relies on a configured cache backend (e.g., Redis in prod).
-        # If cache is not available, it will fall back to incrementing on every hit.
-        if cache.get(cache_key):
-            return # Debounce period is active, do not increment
-
-        cache.set(cache_key, 1, timeout=debounce_seconds)
-
-        # Get or create a HitCount row for today and update it atomically
-        today = timezone.now().date()
-        hit_count, created = self.get_or_create(
-            content_type=content_type,
-            object_id=obj.pk,
-            created_at__date=today,
-            defaults={'hits': 0}
-        )
+        today = timezone.localdate()
+        buffered = getattr(settings, 'HITCOUNT_BUFFERED', False)
+        uniques = None
+
+        if getattr(settings, 'HITCOUNT_UNIQUE_VISITORS', False):
+            # Buffered flushes read the sketch themselves, so skip the estimate here.
+            estimate = add_to_sketch(
+                cache, self._sketch_key(content_type.id, obj.pk, today), visitor_key,
+                timeout=self.BUFFER_TIMEOUT, estimate=not buffered,
+            )
+            uniques = {(content_type.id, obj.pk): estimate}
+        else:
+            # Use cache to debounce hits from the same visitor
+            cache_key = f"hit::{content_type.id}::{obj.pk}::{visitor_key}"
 
-        hit_count.hits = F('hits') + delta
-        hit_count.last_hit = timezone.now()
-        hit_count.save(update_fields=['hits', 'last_hit'])
+            # NOTE: This relies on a configured cache backend (e.g., Redis in prod).
+            # If cache is not available, it will fall back to incrementing on every hit.
+            # cache.add() only succeeds when the key is absent, so one round-trip both
+            # checks and starts the debounce period.
+            if not cache.add(cache_key, 1, timeout=debounce_seconds):
+                return # Debounce period is active, do not increment
+
+        if buffered:
+            self._buffer_hit(cache, content_type.id, obj.pk, today, delta)
+            return
+
+        # Create today's row or add to it in a single atomic statement
+        self._apply_counts(today, {(content_type.id, obj.pk): delta}, uniques)
+
+    @staticmethod
+    def _sketch_key(content_type_id, object_id, day):
+        return f"hll::{day:%Y%m%d}::{content_type_id}::{object_id}"
+
+    def _buffer_hit(self, cache, content_type_id, object_id, day, delta):
+        """
+        Adds ``delta`` to the cache counter for an object and day.
+
+        Each counter is registered once in a numbered slot so flush_buffered()
+        can enumerate the counters without a key scan.
+        """
+        prefix = f"hitbuf::{day:%Y%m%d}"
+        counter_key = f"{prefix}::{content_type_id}::{object_id}"
+        if cache.add(counter_key, 0, timeout=self.BUFFER_TIMEOUT):
+            cache.add(f"{prefix}::slots", 0, timeout=self.BUFFER_TIMEOUT)
+            slot = cache.incr(f"{prefix}::slots")
+            cache.set(f"{prefix}::slot::{slot}", (content_type_id, object_id), timeout=self.BUFFER_TIMEOUT)
+        try:
+            cache.incr(counter_key, delta)
+        except ValueError:
+            # The counter expired or was evicted between add() and incr().
+            pass
+
+    def flush_buffered(self, days=2, batch_size=500):
+        """
+        Drains the buffered cache counters of the last ``days`` days into HitCount
+        rows, one bulk write per batch. Returns the number of hits applied.
+        """
+        cache = caches['default']
+        today = timezone.localdate()
+        applied = 0
+        for offset in range(days):
+            day = today - timedelta(days=offset)
+            prefix = f"hitbuf::{day:%Y%m%d}"
+            slots = cache.get(f"{prefix}::slots") or 0
+            for start in range(1, slots + 1, batch_size):
+                slot_keys = [f"{prefix}::slot::{n}" for n in range(start, min(start + batch_size, slots + 1))]
+                targets = {
+                    f"{prefix}::{ct_id}::{object_id}": (ct_id, object_id)
+                    for ct_id, object_id in cache.get_many(slot_keys).values()
+                }
+                drained = {}
+                for counter_key, value in cache.get_many(list(targets)).items():
+                    if value:
+                        # decr() rather than delete() so hits landing meanwhile are kept.
+                        cache.decr(counter_key, value)
+                        drained[counter_key] = value
+                uniques = None
+                if getattr(settings, 'HITCOUNT_UNIQUE_VISITORS', False) and drained:
+                    sketch_keys = {self._sketch_key(*targets[key], day): targets[key] for key in drained}
+                    uniques = {
+                        sketch_keys[key]: estimate
+                        for key, estimate in count_sketches(cache, list(sketch_keys)).items()
+                    }
+                try:
+                    self._apply_counts(day, {targets[key]: value for key, value in drained.items()}, uniques)
+                except Exception:
+                    for counter_key, value in drained.items():
+                        cache.incr(counter_key, value)
+                    raise
+                applied += sum(drained.values())
+        return applied
+
+    def _apply_counts(self, day, counts, uniques=None):
+        """
+        Adds ``{(content_type_id, object_id): hits}`` to the HitCount rows for ``day``.
+
+        ``uniques`` optionally maps the same keys to unique-visitor estimates; a
+        row's unique_visitors only ever moves up to the latest estimate.
+        """
+        if not counts:
+            return
+        uniques = uniques or {}
+        connection = connections[self.db]
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            # No INSERT ... ON CONFLICT support; fall back to a lookup per row.
+            with transaction.atomic(using=self.db):
+                for (ct_id, object_id), delta in counts.items():
+                    hit_count, _ = self.get_or_create(content_type_id=ct_id, object_id=object_id, day=day)
+                    hit_count.hits = F('hits') + delta
+                    hit_count.unique_visitors = Greatest(
+                        F('unique_visitors'), Value(uniques.get((ct_id, object_id)) or 0),
+                    )
+                    hit_count.save(update_fields=['hits', 'unique_visitors', 'last_hit'])
+            return
+
+        # Concurrent first hits of the day conflict on the (content_type, object_id, day)
+        # unique constraint and are folded into the same row instead of duplicating it.
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        day_value = connection.ops.adapt_datefield_value(day)
+        rows = ', '.join(['(%s, %s, %s, %s, %s, %s, %s)'] * len(counts))
+        params = []
+        for (ct_id, object_id), delta in counts.items():
+            params.extend([ct_id, object_id, day_value, delta, uniques.get((ct_id, object_id)) or 0, now, now])
+        sql = (
+            f'INSERT INTO {table} (content_type_id, object_id, day, hits, unique_visitors, created_at, last_hit) '
+            f'VALUES {rows} '
+            f'ON CONFLICT (content_type_id, object_id, day) '
+            f'DO UPDATE SET hits = {table}.hits + EXCLUDED.hits, '
+            f'unique_visitors = CASE WHEN EXCLUDED.unique_visitors > {table}.unique_visitors '
+            f'THEN EXCLUDED.unique_visitors ELSE {table}.unique_visitors END, '
+            f'last_hit = EXCLUDED.last_hit'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
 
 class HitCount(models.Model):
     """
@@ -249,16 +639,401 @@ class HitCount(models.Model):
     object_id = models.PositiveIntegerField()
     content_object = GenericForeignKey('content_type', 'object_id')
     hits = models.PositiveIntegerField(default=0)
+    # Approximate distinct visitors (HyperLogLog); only filled with HITCOUNT_UNIQUE_VISITORS.
+    unique_visitors = models.PositiveIntegerField(default=0)
+    # Plain date column so daily lookups hit the unique index instead of casting created_at.
+    day = models.DateField(default=timezone.localdate)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     last_hit = models.DateTimeField(auto_now=True)
 
     objects = HitCountManager()
 
     def __str__(self):
-        return f"{self.content_object} - {self.hits} hits on {self.created_at.date()}"
+        return f"{self.content_object} - {self.hits} hits on {self.day}"
 
     class Meta:
         ordering = ['-created_at']
-        unique_together = ('content_type', 'object_id', 'created_at')
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id', 'day'], name='unique_hitcount_per_day'),
+        ]
+        indexes = [
+            # The incremental HitCountTotal recompute looks up rows touched since its watermark.
+            models.Index(fields=['content_type', 'last_hit'], name='hitcount_last_hit_idx'),
+        ]
         verbose_name = 'Daily Hit Count'
         verbose_name_plural = 'Daily Hit Counts'
+
+
+class HitCountTotalManager(models.Manager):
+    # last_hit is stamped before the writing transaction commits, so a slow write (e.g. a
+    # large buffered flush) can become visible with a last_hit below a watermark taken
+    # meanwhile. Incremental runs look back this far to pick such rows up.
+    WATERMARK_OVERLAP = timedelta(minutes=10)
+
+    def recompute(self, content_type, full=False, batch_size=500):
+        """
+        Folds the daily HitCount rows of one content type into per-object totals
+        with a single GROUP BY query.
+
+        Unless ``full`` is set, only objects with HitCount rows touched since the
+        last run (the newest ``last_hit`` already folded in, less WATERMARK_OVERLAP)
+        are re-summed; totals are full sums, so re-summing the overlap is harmless.
+        A write committing more than WATERMARK_OVERLAP after its last_hit is only
+        picked up once that object is hit again, or by a ``full`` run.
+        Returns the number of totals written.
+        """
+        rows = HitCount.objects.filter(content_type=content_type)
+        if not full:
+            watermark = self.filter(content_type=content_type).aggregate(watermark=Max('last_hit'))['watermark']
+            if watermark:
+                since = watermark - self.WATERMARK_OVERLAP
+                rows = rows.filter(object_id__in=rows.filter(last_hit__gte=since).values('object_id'))
+
+        grouped = rows.order_by().values('object_id').annotate(total=Sum('hits'), latest=Max('last_hit'))
+        written = 0
+        batch = []
+        for row in grouped.iterator(chunk_size=batch_size):
+            batch.append(self.model(
+                content_type=content_type,
+                object_id=row['object_id'],
+                hits=row['total'],
+                last_hit=row['latest'],
+            ))
+            if len(batch) >= batch_size:
+                written += self._upsert(batch)
+                batch = []
+        if batch:
+            written += self._upsert(batch)
+        return written
+
+    def _upsert(self, totals):
+        self.bulk_create(
+            totals,
+            update_conflicts=True,
+            unique_fields=['content_type', 'object_id'],
+            update_fields=['hits', 'last_hit'],
+        )
+        return len(totals)
+
+    def total_for(self, model):
+        """Returns an expression giving the precomputed total hits of each ``model`` row (0 if none)."""
+        content_type = ContentType.objects.get_for_model(model)
+        totals = self.filter(content_type=content_type, object_id=OuterRef('pk')).values('hits')[:1]
+        return Coalesce(Subquery(totals), 0)
+
+class HitCountTotal(models.Model):
+    """
+    Denormalized all-time hit total per content object, maintained by the
+    recompute_hit_counts command so readers never re-sum the daily rows.
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+    hits = models.PositiveIntegerField(default=0)
+    # Newest HitCount.last_hit folded into this total; doubles as the recompute watermark.
+    last_hit = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    objects = HitCountTotalManager()
+
+    def __str__(self):
+        return f"{self.content_object} - {self.hits} total hits"
+
+    class Meta:
+        unique_together = ('content_type', 'object_id')
+        verbose_name = 'Total Hit Count'
+        verbose_name_plural = 'Total Hit Counts'
+
+class ImageDerivative(models.Model):
+    """
+    A width-bounded WebP/AVIF copy of an uploaded image, generated off the request
+    path by mainapp.images and emitted in ``srcset`` by the responsive_images tags.
+    """
+    # Storage name of the original upload, e.g. 'project_images/site.jpg'.
+    source = models.CharField(max_length=255, db_index=True)
+    format = models.CharField(max_length=10)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    file = models.ImageField(upload_to='derivatives/', max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['source', 'format', 'width']
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'format', 'width'], name='unique_image_derivative'),
+        ]
+
+    def __str__(self):
+        return f"{self.source} ({self.format}, {self.width}w)"
+
+
+class ImageDerivativeJobManager(models.Manager):
+    def enqueue(self, sources, page_tags):
+        """
+        Queues the derivatives of ``sources`` for `manage.py build_image_derivatives
+        --queued`. Call it inside the transaction that stores the uploads, so both
+        commit together.
+        """
+        return self.bulk_create([self.model(source=source, page_tags=list(page_tags)) for source in sources])
+
+
+class ImageDerivativeJob(models.Model):
+    """
+    An upload whose derivatives are still to be built, written with the upload so
+    a worker restart cannot lose it and built outside the web process.
+    """
+    source = models.CharField(max_length=255)
+    # Page-cache tags of the pages showing the image, purged once it is built.
+    page_tags = models.JSONField(default=list)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = ImageDerivativeJobManager()
+
+    class Meta:
+        ordering = ['pk']
+
+    def __str__(self):
+        return self.source
+
+
+def media_references(instance):
+    """
+    Returns the ``(field name, storage path)`` pairs of the media files ``instance``
+    uses: its FileField/ImageField values and the media URLs in its rich text.
+    """
+    max_length = MediaReference._meta.get_field('path').max_length
+    references = set()
+    for field in instance._meta.concrete_fields:
+        if isinstance(field, models.FileField):
+            file = getattr(instance, field.name)
+            if file:
+                references.add((field.name, file.name))
+        elif isinstance(field, RichTextField):
+            references.update(
+                (field.name, path) for path in extract_media_references(getattr(instance, field.name))
+                if len(path) <= max_length
+            )
+    return references
+
+
+class MediaReferenceManager(models.Manager):
+    def sync(self, instance):
+        """Brings the stored references of ``instance`` in line with its current field values."""
+        content_type = ContentType.objects.get_for_model(instance)
+        current = media_references(instance)
+        rows = self.filter(content_type=content_type, object_id=instance.pk)
+        stored = set(rows.values_list('field', 'path'))
+
+        stale = stored - current
+        if stale:
+            condition = models.Q()
+            for field, path in stale:
+                condition |= models.Q(field=field, path=path)
+            rows.filter(condition).delete()
+        self.bulk_create([
+            self.model(content_type=content_type, object_id=instance.pk, field=field, path=path)
+            for field, path in current - stored
+        ], ignore_conflicts=True)
+
+    def clear(self, instance):
+        self.filter(content_type=ContentType.objects.get_for_model(instance), object_id=instance.pk).delete()
+
+
+class MediaReference(models.Model):
+    """
+    Index of which row uses which media file, maintained on save by signals.py,
+    so orphan detection, renames and "where is this used" are indexed lookups.
+    """
+    # Storage name relative to MEDIA_ROOT, e.g. 'uploads/ckeditor/2024/05/01/site.webp'.
+    path = models.CharField(max_length=255, db_index=True)
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+    field = models.CharField(max_length=100)
+
+    objects = MediaReferenceManager()
+
+    class Meta:
+        ordering = ['path']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['content_type', 'object_id', 'field', 'path'], name='unique_media_reference',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.path} ({self.content_type.model}.{self.field} #{self.object_id})"
+
+
+# Models whose media files are indexed in MediaReference.
+MEDIA_REFERENCE_MODELS = (
+    Clientele, Testimonial, HomepageTestimonial, TeamMember, Leadership, Project, ProjectImage, ProjectHomeBanner, Blog,
+)
+
+
+class SearchDocumentManager(models.Manager):
+    def sync(self, instance):
+        """
+        Re-indexes ``instance`` alone: its postings are rewritten and only the
+        document counts of terms it gained or lost change.
+        """
+        analyzed = analyze(instance)
+        if analyzed is None:
+            self.clear(instance)
+            return
+        fields, terms = analyzed
+        content_type = ContentType.objects.get_for_model(instance)
+
+        with transaction.atomic():
+            previous_length = self.filter(
+                content_type=content_type, object_id=instance.pk,
+            ).values_list('length', flat=True).first() or 0
+            document, created = self.update_or_create(
+                content_type=content_type, object_id=instance.pk, defaults=fields,
+            )
+            stored = set() if created else set(document.postings.values_list('term__term', flat=True))
+            added = terms.keys() - stored
+            removed = stored - terms.keys()
+
+            SearchTerm.objects.bulk_create([SearchTerm(term=term) for term in added], ignore_conflicts=True)
+            term_ids = dict(SearchTerm.objects.filter(term__in=terms.keys() | removed).values_list('term', 'pk'))
+            statistics = SearchStatistics.objects.record(
+                documents=int(created), length=document.length - previous_length,
+            )
+            average_length = statistics.average_length or document.length
+            # Every impact depends on the document length, so all of its postings are rewritten.
+            # Other documents keep the average of their last write until rebuild_search_index.
+            document.postings.all().delete()
+            SearchPosting.objects.bulk_create([
+                SearchPosting(
+                    term_id=term_ids[term], document=document, frequency=frequency,
+                    impact=impact(frequency, document.length, average_length),
+                )
+                for term, frequency in terms.items()
+            ])
+            SearchTerm.objects.filter(pk__in=[term_ids[term] for term in added]).update(
+                document_count=F('document_count') + 1,
+            )
+            SearchTerm.objects.filter(pk__in=[term_ids[term] for term in removed]).update(
+                document_count=F('document_count') - 1,
+            )
+
+    def clear(self, instance):
+        documents = self.filter(content_type=ContentType.objects.get_for_model(instance), object_id=instance.pk)
+        with transaction.atomic():
+            lengths = list(documents.values_list('length', flat=True))
+            if not lengths:
+                return
+            term_ids = list(SearchPosting.objects.filter(document__in=documents).values_list('term_id', flat=True))
+            if term_ids:
+                SearchTerm.objects.filter(pk__in=term_ids).update(document_count=F('document_count') - 1)
+            documents.delete()
+            SearchStatistics.objects.record(documents=-len(lengths), length=-sum(lengths))
+
+
+class SearchDocument(models.Model):
+    """
+    One published project or blog in the site search index (see mainapp/search.py),
+    with the columns the results page shows so it never loads the objects.
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+    title = models.CharField(max_length=255)
+    url = models.CharField(max_length=255)
+    summary = models.TextField(blank=True)
+    # Number of indexed words, for BM25 length normalisation.
+    length = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = SearchDocumentManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id'], name='unique_search_document'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class SearchTerm(models.Model):
+    """A word of the search vocabulary; the unique index doubles as the prefix lookup."""
+    term = models.CharField(max_length=64, unique=True)
+    # Number of documents containing the term (BM25 idf).
+    document_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.term
+
+
+class SearchPosting(models.Model):
+    """
+    How often (weighted by field) a term occurs in a document, and the resulting
+    BM25 impact; queries read each term's postings in descending impact order.
+    """
+    # Both covered by the indexes below.
+    term = models.ForeignKey(SearchTerm, on_delete=models.CASCADE, related_name='postings', db_index=False)
+    document = models.ForeignKey(SearchDocument, on_delete=models.CASCADE, related_name='postings', db_index=False)
+    frequency = models.PositiveIntegerField()
+    impact = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['document', 'term'], name='unique_search_posting'),
+        ]
+        indexes = [
+            # Includes the document so a query's top postings are read from the index alone.
+            models.Index(fields=['term', '-impact', 'document'], name='search_posting_impact_idx'),
+        ]
+
+
+class SearchStatisticsManager(models.Manager):
+    def current(self):
+        return self.filter(pk=1).first() or self.refresh()
+
+    def record(self, documents, length):
+        """
+        Adds ``documents`` and ``length`` to the running totals and returns the
+        updated row. Call it inside the transaction that changes the index.
+        """
+        updated = self.filter(pk=1).update(
+            document_count=F('document_count') + documents, total_length=F('total_length') + length,
+        )
+        if not updated:
+            return self.refresh()
+        return self.get(pk=1)
+
+    def refresh(self):
+        """Recounts the totals from SearchDocument, e.g. after rebuild_search_index."""
+        totals = SearchDocument.objects.aggregate(documents=Count('pk'), length=Sum('length'))
+        statistics, _ = self.update_or_create(pk=1, defaults={
+            'document_count': totals['documents'], 'total_length': totals['length'] or 0,
+        })
+        return statistics
+
+
+class SearchStatistics(models.Model):
+    """
+    The single row of running search index totals, so saves and queries read the
+    document count and average length without aggregating SearchDocument.
+    """
+    document_count = models.PositiveIntegerField(default=0)
+    total_length = models.PositiveBigIntegerField(default=0)
+
+    objects = SearchStatisticsManager()
+
+    class Meta:
+        verbose_name_plural = 'search statistics'
+
+    def __str__(self):
+        return f"{self.document_count} documents"
+
+    @property
+    def average_length(self):
+        return self.total_length / self.document_count if self.document_count else 0
+
+
+# Models whose published rows are in the site search index.
+SEARCH_MODELS = (Project, Blog)
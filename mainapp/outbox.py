@@ -0,0 +1,163 @@
+"""
+Delivery of queued OutboxMessage emails.
+
+Views write an OutboxMessage in the same transaction as the data the email is
+about, so a crash or an SMTP outage can neither lose the notification nor send
+one for a rolled-back submission. `manage.py run_outbox_worker` claims due
+messages in batches and sends each batch over a single SMTP connection.
+
+With CONTACT_NOTIFICATION_MODE = 'digest' no per-submission message is written;
+the worker instead queues one ContactDigest email every CONTACT_DIGEST_INTERVAL.
+"""
+import logging
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import ContactDigest, ContactSubmission, OutboxMessage
+from .utils import format_contact_digest
+
+logger = logging.getLogger(__name__)
+
+# Submissions younger than this are left for the next digest: a slower transaction
+# may still commit a lower id, which would otherwise fall below the high-water mark.
+DIGEST_SETTLE = timedelta(seconds=60)
+
+
+def backoff(attempts):
+    """Seconds to wait before retry number ``attempts``: exponential, capped, with jitter."""
+    delay = min(settings.OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1), settings.OUTBOX_BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def build_email(message, connection):
+    email = EmailMultiAlternatives(
+        subject=message.subject,
+        body=message.body,
+        from_email=message.from_email or None,
+        to=message.recipients,
+        connection=connection,
+    )
+    if message.html_body:
+        email.attach_alternative(message.html_body, 'text/html')
+    return email
+
+
+def record_failure(message, error):
+    """Counts a failed attempt: schedules the retry with backoff, or gives up after OUTBOX_MAX_ATTEMPTS."""
+    message.attempts += 1
+    message.last_error = f'{type(error).__name__}: {error}'
+    if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        message.status = OutboxMessage.Status.FAILED
+        logger.error("Giving up on outbox message %s after %s attempts: %s", message.pk, message.attempts, error)
+    else:
+        message.next_attempt_at = timezone.now() + timedelta(seconds=backoff(message.attempts))
+        logger.warning("Outbox message %s failed (attempt %s): %s", message.pk, message.attempts, error)
+    message.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+
+def send(message, connection):
+    """Sends one message and records the outcome; returns True when it went out."""
+    try:
+        build_email(message, connection).send(fail_silently=False)
+    except Exception as e:
+        record_failure(message, e)
+        return False
+
+    message.attempts += 1
+    message.status = OutboxMessage.Status.SENT
+    message.sent_at = timezone.now()
+    message.last_error = ''
+    message.save(update_fields=['attempts', 'status', 'sent_at', 'last_error'])
+    if message.submission_id:
+        ContactSubmission.objects.filter(pk=message.submission_id).update(notified=True)
+    digest = getattr(message, 'contact_digest', None)  # Loaded by claim()
+    if digest is not None and digest.first_submission_id:
+        ContactSubmission.objects.awaiting_digest().filter(
+            pk__range=(digest.first_submission_id, digest.last_submission_id),
+        ).update(notified=True)
+    return True
+
+
+def enqueue_contact_digest(force=False):
+    """
+    Queues one email listing every contact submission after the high-water mark
+    that was not emailed on its own, at most once per CONTACT_DIGEST_INTERVAL
+    unless ``force``. Returns the new ContactDigest, or None when nothing was due.
+
+    Submissions received in 'immediate' mode are stepped over, so switching modes
+    never reports a submission twice.
+    """
+    high_water_mark, last_sent = ContactDigest.objects.high_water_mark()
+    now = timezone.now()
+    if not force and last_sent and now - last_sent < timedelta(seconds=settings.CONTACT_DIGEST_INTERVAL):
+        return None
+
+    # Only the unbroken run of settled submissions, so a late commit below the
+    # new mark is impossible.
+    settled = []
+    for submission in ContactSubmission.objects.filter(pk__gt=high_water_mark).order_by('pk'):
+        if submission.submission_date > now - DIGEST_SETTLE:
+            break
+        settled.append(submission)
+    if not settled:
+        return None
+    pending = set(ContactSubmission.objects.awaiting_digest().filter(
+        pk__range=(settled[0].pk, settled[-1].pk),
+    ).values_list('pk', flat=True))
+    submissions = [submission for submission in settled if submission.pk in pending]
+
+    try:
+        with transaction.atomic():
+            message = None
+            if submissions:
+                subject, text_body, html_body = format_contact_digest(submissions)
+                message = OutboxMessage.objects.enqueue_email(
+                    subject, text_body, [settings.CONTACT_NOTIFICATION_EMAIL], html_body=html_body,
+                )
+            # With no message this only moves the mark past submissions that were
+            # already emailed, so later digests do not scan them again.
+            return ContactDigest.objects.create(
+                first_submission_id=settled[0].pk,
+                last_submission_id=settled[-1].pk,
+                submission_count=len(submissions),
+                message=message,
+            )
+    except IntegrityError:
+        # Another worker queued this digest first.
+        return None
+
+
+def process_batch(batch_size):
+    """
+    Claims up to ``batch_size`` due messages and sends them over one connection.
+    Returns ``(sent, failed)``.
+    """
+    messages = OutboxMessage.objects.claim(batch_size)
+    if not messages:
+        return 0, 0
+
+    sent = 0
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        # Nothing can be sent this round. Every claimed message counts one failed
+        # attempt, rather than each paying its own connect timeout in send().
+        logger.warning("Could not open the email connection: %s", e)
+        for message in messages:
+            record_failure(message, e)
+        return 0, len(messages)
+    try:
+        for message in messages:
+            sent += send(message, connection)
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+    return sent, len(messages) - sent
@@ -0,0 +1,59 @@
+"""
+Token-bucket rate limiting in the configured cache.
+
+Each key owns a bucket of ``burst`` tokens that refills by one token every
+``refill_seconds``; a request spends a token or is rejected. On Redis the whole
+check is a single atomic script call. Other backends fall back to an atomic
+``incr`` on a fixed window of ``burst * refill_seconds``, which allows the same
+long-run rate but up to two bursts around a window boundary.
+"""
+import math
+import time
+
+from .hyperloglog import get_redis_client
+
+# KEYS[1] = bucket; ARGV = burst, refill_seconds, now. Returns {allowed, retry_after}.
+TOKEN_BUCKET_SCRIPT = """
+local burst = tonumber(ARGV[1])
+local refill = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) / refill)
+local allowed, retry_after = 0, math.ceil((1 - tokens) * refill)
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed, retry_after = 1, 0
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst * refill))
+return {allowed, retry_after}
+"""
+
+
+def take_token(cache, key: str, burst: int, refill_seconds: float) -> tuple[bool, int]:
+    """
+    Spends one token from the bucket under ``key``. Returns ``(allowed, retry_after)``,
+    where ``retry_after`` is the number of seconds until a token is available.
+    """
+    now = time.time()
+    client = get_redis_client(cache)
+    if client is not None:
+        allowed, retry_after = client.eval(
+            TOKEN_BUCKET_SCRIPT, 1, cache.make_key(key), burst, refill_seconds, now,
+        )
+        return bool(allowed), int(retry_after)
+
+    period = burst * refill_seconds
+    window = int(now // period)
+    window_key = f"{key}::{window}"
+    cache.add(window_key, 0, timeout=math.ceil(period))
+    try:
+        used = cache.incr(window_key)
+    except ValueError:
+        # Evicted between add() and incr(); let the request through.
+        return True, 0
+    if used <= burst:
+        return True, 0
+    return False, math.ceil((window + 1) * period - now)
@@ -0,0 +1,189 @@
+"""
+Public site search over published projects and blogs.
+
+An inverted index lives in three tables: SearchDocument (one row per indexed
+object, with what the results page shows), SearchTerm (the vocabulary and each
+term's document frequency) and SearchPosting (term, document, frequency and
+BM25 impact). SearchStatistics keeps the running document count and total
+length that idf and length normalisation need. signals.py re-indexes a single
+object on save and drops it on delete; `manage.py rebuild_search_index` rebuilds
+everything, e.g. after bulk imports.
+
+Each posting stores the length-normalised BM25 term-frequency component (its
+"impact"), computed when written, and is indexed by (term, impact). A query
+matches every word as a prefix of at most MAX_PREFIX_EXPANSIONS terms and reads
+the MAX_POSTINGS_PER_TERM highest-impact postings of each term, every one a
+separately limited walk down that index, before weighing them by idf. Cost is
+bounded whatever the corpus size; documents outside every matching term's top
+postings are the only ones that can be missed.
+"""
+import heapq
+import html
+import math
+import re
+from collections import Counter
+
+from django.db import connection
+from django.db.models import Q
+from django.urls import reverse
+from django.utils.html import strip_tags
+
+WORD_RE = re.compile(r'\w+')
+MAX_TERM_LENGTH = 64
+SUMMARY_LENGTH = 240
+# Query words beyond this are ignored.
+MAX_QUERY_WORDS = 8
+# Terms a single query prefix may expand to (the most common ones win).
+MAX_PREFIX_EXPANSIONS = 30
+# Highest-impact postings read per matching term.
+MAX_POSTINGS_PER_TERM = 250
+# BM25 parameters.
+K1 = 1.2
+B = 0.75
+
+STOPWORDS = frozenset(
+    'a an and are as at be by for from has have in is it its of on or that the this to was were will with'.split()
+)
+
+# model label -> ((field, weight), ...); a title word counts three times as much as a body word.
+SEARCH_FIELDS = {
+    'mainapp.Project': (('title', 3), ('brief_description', 2), ('detail_content', 1)),
+    'mainapp.Blog': (('title', 3), ('summary', 2), ('tags', 2), ('content', 1)),
+}
+DETAIL_URLS = {
+    'mainapp.Project': 'mainapp:project_detail',
+    'mainapp.Blog': 'mainapp:blog_detail',
+}
+
+
+def plain_text(value):
+    """Strips the tags and entities of rich-text HTML and collapses whitespace."""
+    return ' '.join(html.unescape(strip_tags(value or '')).split())
+
+
+def tokenize(text):
+    return [
+        word for word in WORD_RE.findall(text.lower())
+        if 1 < len(word) <= MAX_TERM_LENGTH and word not in STOPWORDS
+    ]
+
+
+def impact(frequency, length, average_length):
+    """The BM25 term-frequency component of one posting."""
+    return frequency * (K1 + 1) / (frequency + K1 * (1 - B + B * length / (average_length or 1)))
+
+
+def analyze(instance):
+    """
+    Returns ``(fields, terms)`` for a searchable instance: the SearchDocument
+    column values and a Counter of weighted term frequencies. None when the
+    instance should not be in the index (e.g. a draft).
+    """
+    label = instance._meta.label
+    if label not in SEARCH_FIELDS or instance.status != instance.Status.PUBLISHED:
+        return None
+
+    terms = Counter()
+    length = 0
+    for field, weight in SEARCH_FIELDS[label]:
+        words = tokenize(plain_text(getattr(instance, field)))
+        length += len(words)
+        for word in words:
+            terms[word] += weight
+
+    summary_field = SEARCH_FIELDS[label][1][0]
+    summary = plain_text(getattr(instance, summary_field))
+    if len(summary) > SUMMARY_LENGTH:
+        summary = summary[:SUMMARY_LENGTH].rsplit(' ', 1)[0] + '…'
+    fields = {
+        'title': instance.title[:255],
+        'url': reverse(DETAIL_URLS[label], kwargs={'slug': instance.slug}),
+        'summary': summary,
+        'length': length,
+    }
+    return fields, terms
+
+
+def top_postings(term_ids, limit):
+    """
+    Returns ``(term id, document id, impact)`` rows for the ``limit`` highest-impact
+    postings of each term, in one query. Every term gets its own LIMIT, which
+    the database answers by reading the head of the (term, impact) index instead
+    of sorting the postings of all terms together.
+    """
+    from .models import SearchPosting
+
+    if not term_ids:
+        return []
+    qn = connection.ops.quote_name
+    table = qn(SearchPosting._meta.db_table)
+    # Sliced querysets cannot be combined with union() on every backend, hence the SQL.
+    sql = ' UNION ALL '.join(
+        f'SELECT * FROM (SELECT {qn("term_id")}, {qn("document_id")}, {qn("impact")} FROM {table} '
+        f'WHERE {qn("term_id")} = %s ORDER BY {qn("impact")} DESC LIMIT %s) AS {qn(f"term_{n}")}'
+        for n in range(len(term_ids))
+    )
+    params = []
+    for term_id in term_ids:
+        params.extend([term_id, limit])
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def search(query, limit=50):
+    """
+    Returns up to ``limit`` SearchDocuments matching ``query``, best first, each
+    with a ``score`` attribute.
+    """
+    from .models import SearchDocument, SearchStatistics, SearchTerm
+
+    words = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_WORDS]
+    if not words:
+        return []
+
+    # 1. Expand each word to the indexed terms it prefixes (a range scan on the unique index)
+    condition = Q()
+    for word in words:
+        condition |= Q(term__gte=word, term__lt=word + '\uffff')
+    expansions = {word: [] for word in words}
+    for term_id, term, document_count in SearchTerm.objects.filter(
+        condition, document_count__gt=0,
+    ).values_list('pk', 'term', 'document_count'):
+        for word in words:
+            if term.startswith(word):
+                # The exact word always makes the cut.
+                expansions[word].append((term == word, document_count, term_id))
+    if not any(expansions.values()):
+        return []
+
+    # 2. Per word, score the top postings of its expansions: idf * impact, the best expansion per document
+    total = SearchStatistics.objects.current().document_count
+    idf = {}
+    for word, matches in expansions.items():
+        expansions[word] = heapq.nlargest(MAX_PREFIX_EXPANSIONS, matches)
+        for exact, document_count, term_id in expansions[word]:
+            idf[term_id] = math.log(1 + (total - document_count + 0.5) / (document_count + 0.5))
+    postings = {term_id: [] for term_id in idf}
+    for term_id, document_id, posting_impact in top_postings(list(idf), MAX_POSTINGS_PER_TERM):
+        postings[term_id].append((document_id, idf[term_id] * posting_impact))
+
+    scores = Counter()
+    for word, matches in expansions.items():
+        best = {}
+        for exact, document_count, term_id in matches:
+            for document_id, score in postings[term_id]:
+                if score > best.get(document_id, 0):
+                    best[document_id] = score
+        scores.update(best)
+
+    # 3. Load only the page of results
+    top = scores.most_common(limit)
+    documents = SearchDocument.objects.in_bulk([document_id for document_id, score in top])
+    results = []
+    for document_id, score in top:
+        document = documents.get(document_id)
+        if document is not None:
+            document.score = score
+            results.append(document)
+    return results
@@ -1,7 +1,13 @@
-from django.db.models.signals import pre_save
+from django.core.exceptions import ValidationError
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from .models import Project, Blog
-from .utils import slugify_unique
+from django.utils import timezone
+from .models import (
+    Project, ProjectImage, ProjectFact, Blog, Clientele, Testimonial, ProjectHomeBanner,
+    HomepageTestimonial, TeamMember, Leadership, MediaReference, SearchDocument, BlogTag, ImageDerivativeJob,
+    new_uploads,
+)
+from .utils import bump_cache_version, image_validate_and_resize, slugify_unique
 
 @receiver(pre_save, sender=Project)
 def create_project_slug(sender, instance, **kwargs):
@@ -15,7 +21,148 @@ def create_blog_slug(sender, instance, **kwargs):
     if not instance.slug:
         instance.slug = slugify_unique(instance, value_field='title')
 
-# NOTE: You can add more signals here, for example:
-# - A pre_save signal to validate uploaded image sizes using the image_validate_and_resize utility.
-# - A post_save signal for ContactSubmission to enqueue a background task for sending emails,
-#   making the contact form submission faster for the user.
+def page_cache_tags(instance):
+    """Returns the page-cache tags of every page that displays ``instance``."""
+    if isinstance(instance, Project):
+        slugs = {instance.slug, getattr(instance, '_previous_slug', instance.slug)}
+        return ['homepage', 'project_list', 'search', *(f'project:{slug}' for slug in slugs)]
+    if isinstance(instance, (ProjectImage, ProjectFact)):
+        return ['project_list', f'project:{instance.project.slug}']
+    if isinstance(instance, Blog):
+        slugs = {instance.slug, getattr(instance, '_previous_slug', instance.slug)}
+        return ['homepage', 'about', 'blog_list', 'search', *(f'blog:{slug}' for slug in slugs)]
+    if isinstance(instance, (TeamMember, Leadership)):
+        return ['about']
+    return ['homepage']
+
+@receiver(pre_save, sender=Project)
+@receiver(pre_save, sender=Blog)
+def remember_previous_slug(sender, instance, **kwargs):
+    """Records the stored slug so a renamed page's old URL is purged as well."""
+    if instance.pk:
+        instance._previous_slug = sender.objects.filter(pk=instance.pk).values_list('slug', flat=True).first()
+
+@receiver(pre_save, sender=ProjectImage)
+def demote_other_main_images(sender, instance, **kwargs):
+    """Unflags the project's previous main image; only one is allowed per project."""
+    if instance.main_image:
+        sender.objects.filter(project_id=instance.project_id, main_image=True).exclude(pk=instance.pk).update(
+            main_image=False,
+        )
+
+@receiver([post_save, post_delete], sender=ProjectImage)
+def refresh_project_main_image(sender, instance, **kwargs):
+    """
+    Repoints the denormalized Project.main_image and moves updated_at forward, so
+    the HTTP validators of the project pages cover the gallery as well.
+    """
+    main_image_id = (
+        sender.objects.filter(project_id=instance.project_id)
+        .order_by('-main_image', 'order', 'pk')
+        .values_list('pk', flat=True)
+        .first()
+    )
+    Project.objects.filter(pk=instance.project_id).update(main_image=main_image_id, updated_at=timezone.now())
+
+@receiver([post_save, post_delete], sender=ProjectFact)
+def touch_project(sender, instance, **kwargs):
+    """Moves the parent project's updated_at forward so its HTTP validators cover its facts."""
+    Project.objects.filter(pk=instance.project_id).update(updated_at=timezone.now())
+
+@receiver([post_save, post_delete], sender=Project)
+@receiver([post_save, post_delete], sender=ProjectImage)
+@receiver([post_save, post_delete], sender=ProjectFact)
+@receiver([post_save, post_delete], sender=Blog)
+@receiver([post_save, post_delete], sender=Clientele)
+@receiver([post_save, post_delete], sender=Testimonial)
+@receiver([post_save, post_delete], sender=ProjectHomeBanner)
+@receiver([post_save, post_delete], sender=HomepageTestimonial)
+@receiver([post_save, post_delete], sender=TeamMember)
+@receiver([post_save, post_delete], sender=Leadership)
+def purge_cached_pages(sender, instance, **kwargs):
+    """
+    Purges the cached pages (and the cached homepage content, which shares the
+    'homepage' tag) that display the saved or deleted instance.
+    """
+    bump_cache_version(*page_cache_tags(instance))
+
+@receiver(pre_save, sender=ProjectImage)
+@receiver(pre_save, sender=Blog)
+@receiver(pre_save, sender=Clientele)
+@receiver(pre_save, sender=Testimonial)
+@receiver(pre_save, sender=ProjectHomeBanner)
+@receiver(pre_save, sender=HomepageTestimonial)
+@receiver(pre_save, sender=TeamMember)
+@receiver(pre_save, sender=Leadership)
+def validate_new_uploads(sender, instance, **kwargs):
+    """
+    Rejects fresh uploads that fail the header-only checks before save() stores
+    them, and notes their fields so their derivatives are queued after saving.
+    """
+    uploads = new_uploads(instance)
+    for name, file in uploads:
+        try:
+            image_validate_and_resize(file)
+        except ValidationError as e:
+            raise ValidationError({name: e.messages})
+    instance._new_uploads = [name for name, file in uploads]
+
+@receiver(post_save, sender=ProjectImage)
+@receiver(post_save, sender=Blog)
+@receiver(post_save, sender=Clientele)
+@receiver(post_save, sender=Testimonial)
+@receiver(post_save, sender=ProjectHomeBanner)
+@receiver(post_save, sender=HomepageTestimonial)
+@receiver(post_save, sender=TeamMember)
+@receiver(post_save, sender=Leadership)
+def schedule_image_derivatives(sender, instance, **kwargs):
+    """Queues the responsive derivatives of new uploads; see mainapp/images.py."""
+    sources = [getattr(instance, name).name for name in getattr(instance, '_new_uploads', ())]
+    if sources:
+        ImageDerivativeJob.objects.enqueue(sources, page_cache_tags(instance))
+
+@receiver(post_save, sender=Clientele)
+@receiver(post_save, sender=Testimonial)
+@receiver(post_save, sender=HomepageTestimonial)
+@receiver(post_save, sender=TeamMember)
+@receiver(post_save, sender=Leadership)
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=ProjectImage)
+@receiver(post_save, sender=ProjectHomeBanner)
+@receiver(post_save, sender=Blog)
+def index_media_references(sender, instance, **kwargs):
+    """Keeps MediaReference in line with the instance's files and rich-text media links."""
+    MediaReference.objects.sync(instance)
+
+@receiver(post_delete, sender=Clientele)
+@receiver(post_delete, sender=Testimonial)
+@receiver(post_delete, sender=HomepageTestimonial)
+@receiver(post_delete, sender=TeamMember)
+@receiver(post_delete, sender=Leadership)
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=ProjectImage)
+@receiver(post_delete, sender=ProjectHomeBanner)
+@receiver(post_delete, sender=Blog)
+def drop_media_references(sender, instance, **kwargs):
+    """Removes the deleted instance's entries from the media reference index."""
+    MediaReference.objects.clear(instance)
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Blog)
+def index_search_document(sender, instance, **kwargs):
+    """Re-indexes the saved project or blog for site search; unpublishing removes it."""
+    SearchDocument.objects.sync(instance)
+
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Blog)
+def drop_search_document(sender, instance, **kwargs):
+    SearchDocument.objects.clear(instance)
+
+@receiver(post_save, sender=Blog)
+def index_blog_tags(sender, instance, **kwargs):
+    """Mirrors the blog's tags field into the Tag/BlogTag index."""
+    BlogTag.objects.sync(instance)
+
+@receiver(post_delete, sender=Blog)
+def drop_blog_tags(sender, instance, **kwargs):
+    BlogTag.objects.clear(instance)
@@ -0,0 +1,45 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html
+
+from mainapp.images import get_derivatives
+
+register = template.Library()
+
+
+def _candidates(image, fmt):
+    if not image:
+        return []
+    return [(width, name) for entry_fmt, width, name in get_derivatives(image.name) if entry_fmt == fmt]
+
+
+@register.simple_tag
+def srcset(image, sizes='100vw', format='webp'):
+    """
+    Renders ``srcset``/``sizes`` attributes listing the derivatives of ``image``,
+    or nothing while they are still being built (the plain ``src`` then applies):
+
+        <img src="{{ blog.header_image_desktop.url }}" {% srcset blog.header_image_desktop "100vw" %}>
+    """
+    candidates = _candidates(image, format)
+    if not candidates:
+        return ''
+    return format_html(
+        'srcset="{}" sizes="{}"',
+        ', '.join(f'{default_storage.url(name)} {width}w' for width, name in candidates),
+        sizes,
+    )
+
+
+@register.simple_tag
+def derivative_url(image, width, format='webp'):
+    """
+    Returns the URL of the smallest derivative at least ``width`` pixels wide (or
+    the largest one), for places srcset cannot reach such as CSS backgrounds.
+    Falls back to the original upload.
+    """
+    candidates = _candidates(image, format)
+    if not candidates:
+        return image.url if image else ''
+    name = next((name for candidate, name in candidates if candidate >= int(width)), candidates[-1][1])
+    return default_storage.url(name)
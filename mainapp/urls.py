@@ -14,7 +14,10 @@ urlpatterns = [
     path('projects/', views.ProjectListView.as_view(), name='project_list'),
     path('projects/<slug:slug>/', views.ProjectDetailView.as_view(), name='project_detail'),
     path('blog/', views.BlogListView.as_view(), name='blog_list'),
+    path('blog/tag/<slug:slug>/', views.TagBlogListView.as_view(), name='blog_tag'),
     path('blog/<slug:slug>/', views.BlogDetailView.as_view(), name='blog_detail'),
+    path('hit/<str:model>/<int:pk>/', views.HitBeaconView.as_view(), name='hit_beacon'),
+    path('search/', views.SearchView.as_view(), name='search'),
     path('contact/', views.ContactView.as_view(), name='contact'),
     path('about/', views.AboutUsView.as_view(), name='about'),
     path('technology-products/', views.TechnologyProductsView.as_view(), name='technology_products'),
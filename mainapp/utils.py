@@ -1,7 +1,27 @@
+import base64
+import csv
 import hashlib
+import html
+import json
+import os
+import re
+import uuid
+import warnings
+from datetime import date
+from functools import lru_cache
 from typing import Type
+from urllib.parse import unquote
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
 from django.utils.text import slugify
+from PIL import Image, UnidentifiedImageError
 
 def slugify_unique(instance: Type[models.Model], value_field: str = 'title', slug_field: str = 'slug') -> str:
     """
@@ -23,43 +43,209 @@ def slugify_unique(instance: Type[models.Model], value_field: str = 'title', slu
             i += 1
     return slug
 
+@lru_cache(maxsize=2)
+def _visitor_salt(day: date) -> str:
+    """Returns the salt mixed into anonymous visitor keys; it rotates daily."""
+    return salted_hmac('mainapp.utils.get_visitor_key', day.isoformat()).hexdigest()
+
+def get_client_ip(request) -> str:
+    """
+    Returns the client's IP address. Behind settings.TRUSTED_PROXY_COUNT reverse
+    proxies it is read from X-Forwarded-For, counting from the right, so entries
+    a client sends itself are never trusted.
+    """
+    hops = settings.TRUSTED_PROXY_COUNT
+    if hops:
+        forwarded = [address.strip() for address in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')]
+        forwarded = [address for address in forwarded if address]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.META.get('REMOTE_ADDR', '')
+
 def get_visitor_key(request) -> str:
     """
-    Returns a hashed key for the visitor based on session or IP and User-Agent.
+    Returns a hashed key for the visitor, memoized on the request.
+
+    Authenticated users are keyed on user and session. Anonymous visitors get a
+    sessionless fingerprint of IP, User-Agent and a daily rotating salt, so no
+    session row or cookie is created for them.
     """
-    session_key = request.session.session_key
-    if not session_key:
-        request.session.create()
-        session_key = request.session.session_key
+    visitor_key = getattr(request, '_visitor_key', None)
+    if visitor_key:
+        return visitor_key
 
-    ip_address = request.META.get('REMOTE_ADDR', '')
-    user_agent = request.META.get('HTTP_USER_AGENT', '')
-    
-    # Use session key for logged-in users or a hash of IP+UA for anonymous users
-    if request.user.is_authenticated:
-        key_string = f"{request.user.pk}:{session_key}"
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        session_key = request.session.session_key
+        if not session_key:
+            request.session.create()
+            session_key = request.session.session_key
+        key_string = f"{user.pk}:{session_key}"
     else:
-        key_string = f"{ip_address}:{user_agent}"
-        
-    return hashlib.sha256(key_string.encode('utf-8')).hexdigest()
+        ip_address = get_client_ip(request)
+        user_agent = request.META.get('HTTP_USER_AGENT', '')
+        key_string = f"{ip_address}:{user_agent}:{_visitor_salt(timezone.localdate())}"
+
+    request._visitor_key = hashlib.sha256(key_string.encode('utf-8')).hexdigest()
+    return request._visitor_key
+
+def get_cache_version(name: str) -> str:
+    """
+    Returns the current version token of a cached namespace, for use in cache keys.
+    """
+    return get_cache_versions([name])[name]
+
+def get_cache_versions(names) -> dict:
+    """
+    Returns ``{name: version token}`` for several namespaces (cache tags) in one
+    cache round-trip, issuing tokens for namespaces that have none yet.
+    """
+    keys = {f"version::{name}": name for name in names}
+    found = cache.get_many(list(keys))
+    missing = {key: uuid.uuid4().hex for key in keys if key not in found}
+    if missing:
+        # add() so a concurrent bump is never overwritten by our fresh token.
+        for key, token in missing.items():
+            if not cache.add(key, token, timeout=None):
+                missing[key] = cache.get(key, token)
+        found.update(missing)
+    return {keys[key]: token for key, token in found.items()}
+
+def bump_cache_version(*names: str) -> None:
+    """
+    Invalidates everything cached under the given namespaces by issuing new version
+    tokens. Random tokens (rather than counters) stay safe if the version key is evicted.
+    """
+    cache.set_many({f"version::{name}": uuid.uuid4().hex for name in names}, timeout=None)
+
+def encode_cursor(values) -> str:
+    """
+    Encodes the ordering values of the last row on a page into an opaque URL-safe cursor.
+    """
+    payload = json.dumps([value.isoformat() if hasattr(value, 'isoformat') else value for value in values])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def keyset_filter(model, fields, cursor) -> Q | None:
+    """
+    Returns a filter selecting the rows after ``cursor`` in descending ``fields``
+    order (e.g. ``('created_at', 'id')``), or None for a missing or invalid cursor.
+    Unlike OFFSET, the database seeks straight to the cursor so deep pages cost
+    the same as the first one.
+    """
+    if not cursor:
+        return None
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        values = [model._meta.get_field(name).to_python(value) for name, value in zip(fields, raw)]
+    except (ValueError, TypeError, ValidationError):
+        return None
+    if len(values) != len(fields) or None in values:
+        return None
+
+    # (a, b) < (x, y)  <=>  a < x OR (a = x AND b < y)
+    condition = Q()
+    for depth, name in enumerate(fields):
+        step = Q(**{f'{name}__lt': values[depth]})
+        for previous in range(depth):
+            step &= Q(**{fields[previous]: values[previous]})
+        condition |= step
+    return condition
+
+def keyset_page(queryset, fields, cursor, page_size):
+    """
+    Returns ``(rows, next_cursor)`` for the page of ``queryset`` after ``cursor``,
+    ordered descending on ``fields``. One query, no COUNT; next_cursor is None on
+    the last page.
+    """
+    after = keyset_filter(queryset.model, fields, cursor)
+    if after is not None:
+        queryset = queryset.filter(after)
+    rows = list(queryset.order_by(*(f'-{name}' for name in fields))[:page_size + 1])
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, encode_cursor([getattr(rows[-1], name) for name in fields])
+
+def image_validate_and_resize(file, max_size_mb: int = None, max_pixels: int = None, formats=None):
+    """
+    Validates an image upload from its byte size and header alone, without decoding
+    the pixel data, so a 50-megapixel photo or a decompression bomb never reaches
+    worker memory. Raises ValidationError; otherwise returns ``(format, width, height)``.
 
-# NOTE: The following functions are placeholders. A robust implementation would involve
-# more detailed logic, especially for image processing.
+    Nothing is resized at upload time: templates serve the width-bounded
+    derivatives built by mainapp.images instead of the original.
+    """
+    max_size_mb = max_size_mb or settings.IMAGE_UPLOAD_MAX_MB
+    max_pixels = max_pixels or settings.IMAGE_UPLOAD_MAX_PIXELS
+    formats = formats or settings.IMAGE_UPLOAD_FORMATS
+
+    if file.size > max_size_mb * 1024 * 1024:
+        raise ValidationError(f"Image size cannot exceed {max_size_mb}MB.")
+
+    file.seek(0)
+    try:
+        with warnings.catch_warnings():
+            # The pixel limit below is stricter; don't let Pillow warn first.
+            warnings.simplefilter('ignore', Image.DecompressionBombWarning)
+            # Image.open() only parses the header; pixels would be decoded by load().
+            with Image.open(file) as image:
+                image_format, (width, height) = image.format, image.size
+    except Image.DecompressionBombError:
+        raise ValidationError(f"Image cannot exceed {max_pixels // 1_000_000} megapixels.")
+    except (UnidentifiedImageError, OSError):
+        raise ValidationError("Upload a valid image. The file is either not an image or a corrupted image.")
+    finally:
+        file.seek(0)
+
+    if image_format not in formats:
+        raise ValidationError(f"{image_format} images are not supported. Use one of: {', '.join(formats)}.")
+    if width * height > max_pixels:
+        raise ValidationError(
+            f"Image is {width}x{height} pixels; it cannot exceed {max_pixels // 1_000_000} megapixels."
+        )
+    return image_format, width, height
 
-def image_validate_and_resize(file, max_size_mb: int = 5, max_width: int = 2500):
+def validate_stored_image(path: str, max_size_mb: int, max_pixels: int, formats) -> str | None:
     """
-    Placeholder for image validation and resizing logic.
-    - Validates file size, content type (MIME).
-    - Resizes image if it exceeds max_width.
+    Checks a file of the media library; returns the validation message or None.
+    A process-pool worker for `manage.py validate_media`, so limits are passed in
+    rather than read from settings.
     """
-    # from PIL import Image
-    # from django.core.exceptions import ValidationError
-    #
-    # if file.size > max_size_mb * 1024 * 1024:
-    #     raise ValidationError(f"Image size cannot exceed {max_size_mb}MB.")
-    #
-    # # ... more validation and resizing logic using Pillow ...
-    pass
+    try:
+        with File(open(path, 'rb')) as fh:
+            image_validate_and_resize(fh, max_size_mb=max_size_mb, max_pixels=max_pixels, formats=formats)
+    except FileNotFoundError:
+        return "File is missing."
+    except ValidationError as e:
+        return ' '.join(e.messages)
+    return None
+
+def extract_media_references(content: str):
+    """
+    Yields the storage names of the media files linked from rich-text HTML, e.g.
+    'uploads/ckeditor/2024/05/01/site.webp' for an inline CKEditor image at
+    '/media/uploads/ckeditor/2024/05/01/site.webp'. The thumbnails CKEditor keeps
+    next to its uploads are included.
+    """
+    pattern = re.escape(settings.MEDIA_URL) + r'''([^"'\s<>()?#]+)'''
+    for match in re.finditer(pattern, content or ''):
+        name = unquote(html.unescape(match.group(1)))
+        yield name
+        if name.startswith(settings.CKEDITOR_UPLOAD_PATH):
+            yield '{0}_thumb{1}'.format(*os.path.splitext(name))
+
+def parse_tags(value: str) -> dict:
+    """
+    Splits a comma-separated tags field into ``{slug: name}``, in order. Tags with
+    the same slug ("Fly Ash", "fly-ash") are one tag; the first spelling names it.
+    """
+    tags = {}
+    for name in (value or '').split(','):
+        name = ' '.join(name.split())[:100]
+        slug = slugify(name)[:100]
+        if slug and slug not in tags:
+            tags[slug] = name
+    return tags
 
 def format_contact_email(submission) -> tuple[str, str]:
     """
@@ -88,3 +274,60 @@ def format_contact_email(submission) -> tuple[str, str]:
     )
     
     return subject, text_body, html_body
+
+
+def format_contact_digest(submissions) -> tuple[str, str, str]:
+    """
+    Formats several contact submissions into one digest email: a plain text list
+    and an HTML table.
+    """
+    subject = f"{len(submissions)} new contact inquiries"
+
+    text_body = f"You have received {len(submissions)} new contact submissions:\n\n" + "".join(
+        f"[{timezone.localtime(s.submission_date):%Y-%m-%d %H:%M}] {s.first_name} {s.last_name}\n"
+        f"Email: {s.email}\n"
+        f"Mobile: {s.mobile_number or 'N/A'}\n"
+        f"Message: {s.message}\n\n"
+        for s in submissions
+    )
+
+    rows = "".join(
+        f"<tr><td>{timezone.localtime(s.submission_date):%Y-%m-%d %H:%M}</td>"
+        f"<td>{html.escape(s.first_name)} {html.escape(s.last_name)}</td>"
+        f"<td>{html.escape(s.email)}</td>"
+        f"<td>{html.escape(s.mobile_number or 'N/A')}</td>"
+        f"<td>{html.escape(s.message)}</td></tr>"
+        for s in submissions
+    )
+    html_body = (
+        f"<html><body>"
+        f"<h2>{len(submissions)} New Contact Inquiries</h2>"
+        f"<table border=\"1\" cellpadding=\"6\" cellspacing=\"0\">"
+        f"<tr><th>Received</th><th>Name</th><th>Email</th><th>Mobile</th><th>Message</th></tr>"
+        f"{rows}"
+        f"</table>"
+        f"</body></html>"
+    )
+
+    return subject, text_body, html_body
+
+
+class _Echo:
+    """Pseudo-buffer whose write() returns the line, so csv.writer can feed a generator."""
+    def write(self, value):
+        return value
+
+
+def stream_csv(header, rows):
+    """Yields ``header`` and then each row of ``rows`` as one CSV line, never buffering more."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_jsonl(header, rows):
+    """Yields each row of ``rows`` as one JSON object per line, keyed by ``header``."""
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(header, row))) + '\n'
@@ -1,18 +1,28 @@
+from django.views import View
 from django.views.generic import TemplateView, ListView, DetailView, CreateView
 from django.urls import reverse_lazy
 from django.db import transaction
-from django.core.mail import send_mail
+from django.db.models import Count, F, Max, Q, Window, prefetch_related_objects
+from django.db.models.functions import RowNumber
+from django.core.cache import cache
 from django.conf import settings
-from django.http import HttpResponseRedirect
+from django.http import HttpResponse, HttpResponseRedirect
+from django.shortcuts import get_object_or_404
+import hashlib
 import logging
 
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.utils.decorators import method_decorator
+from django.utils.http import parse_http_date_safe
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
 
 from .models import (
     Project,
     ProjectImage,
     ProjectHomeBanner,
     Blog,
+    Tag,
     Clientele,
     Testimonial,
     HomepageTestimonial,
@@ -20,75 +30,304 @@ from .models import (
     Leadership,
     HitCount,
     ContactSubmission,
+    OutboxMessage,
 )
 from .forms import ContactForm
-from .utils import format_contact_email
+from .images import prime_derivatives
+from .ratelimit import take_token
+from .search import search
+from .utils import (
+    encode_cursor, format_contact_email, get_cache_version, get_cache_versions, get_client_ip, keyset_filter,
+    keyset_page,
+)
 
 logger = logging.getLogger(__name__)
 
-class HomepageView(TemplateView):
+class PageCacheMixin:
+    """
+    Serves anonymous GET requests from a full-page cache keyed on the absolute URL.
+
+    Each entry records the versions of its cache tags (see get_cache_tags()). Saving
+    a model bumps the tags of the pages that show it (signals.py), which purges
+    exactly those pages. Every page also carries the 'site' tag so the whole cache
+    can be dropped on deploy (manage.py clear_page_cache).
+    """
+    page_cache_tags = ()
+    # Vary included, so downstream caches key a replayed page the same way as a fresh one.
+    cached_headers = ('Content-Type', 'ETag', 'Last-Modified', 'Cache-Control', 'Vary')
+
+    def get_cache_tags(self):
+        """Returns the cache tags of this page; must be computable before rendering."""
+        return ['site', *self.page_cache_tags]
+
+    def is_page_cacheable(self, request):
+        """Returns whether this request may be served from and stored in the page cache."""
+        return True
+
+    def dispatch(self, request, *args, **kwargs):
+        timeout = getattr(settings, 'PAGE_CACHE_TIMEOUT', 0)
+        if (not timeout or request.method not in ('GET', 'HEAD') or request.user.is_authenticated
+                or not self.is_page_cacheable(request)):
+            return super().dispatch(request, *args, **kwargs)
+
+        cache_key = 'page::' + hashlib.sha256(request.build_absolute_uri().encode('utf-8')).hexdigest()
+        # Snapshot the tag versions before rendering so a save during the render
+        # leaves the stored entry stale rather than silently current.
+        versions = get_cache_versions(self.get_cache_tags())
+        entry = cache.get(cache_key)
+        if entry and entry['versions'] == versions:
+            response = HttpResponse(entry['content'], headers=entry['headers'])
+            # Stored validators are current as long as the tags are, so conditional
+            # requests are answered without touching the database.
+            return get_conditional_response(
+                request,
+                etag=response.get('ETag'),
+                last_modified=parse_http_date_safe(response.get('Last-Modified', '')),
+                response=response,
+            )
+
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200 and not response.cookies and not response.streaming:
+            if hasattr(response, 'render'):
+                response.render()
+            cache.set(cache_key, {
+                'versions': versions,
+                'content': response.content,
+                'headers': {
+                    header: response[header] for header in self.cached_headers if response.has_header(header)
+                },
+            }, timeout=timeout)
+        return response
+
+class ConditionalGetMixin:
+    """
+    Answers If-None-Match / If-Modified-Since with 304 before the template is rendered.
+
+    Subclasses implement get_validators(), returning ``(etag_parts, last_modified)``
+    from a cheap query, or None to fall through (e.g. to a 404).
+    """
+
+    def get_validators(self):
+        raise NotImplementedError
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        validators = self.get_validators()
+        if validators is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        etag_parts, last_modified = validators
+        # The 'site' version changes on deploy, so template changes also change the ETag.
+        etag_source = ':'.join(str(part) for part in (get_cache_version('site'), request.get_full_path(), *etag_parts))
+        etag = hashlib.md5(etag_source.encode('utf-8')).hexdigest()
+        response = condition(
+            etag_func=lambda *args, **kwargs: etag,
+            last_modified_func=lambda *args, **kwargs: last_modified,
+        )(super().dispatch)(request, *args, **kwargs)
+        # Validators alone would allow heuristic caching; make browsers revalidate instead.
+        patch_cache_control(response, no_cache=True)
+        return response
+
+class PublishedValidatorsMixin(ConditionalGetMixin):
+    """Validators for list pages: the newest change and the size of the published set."""
+
+    def get_validators(self):
+        stats = self.model.objects.aggregate(
+            # Drafts are included so unpublishing also moves Last-Modified forward.
+            last_modified=Max('updated_at'),
+            published=Count('pk', filter=Q(status='PUBLISHED')),
+        )
+        if stats['last_modified'] is None:
+            return None
+        return (stats['published'], stats['last_modified'].isoformat()), stats['last_modified']
+
+class ObjectValidatorsMixin(ConditionalGetMixin):
+    """Validators for detail pages: the published object's updated_at."""
+
+    def get_validators(self):
+        updated_at = self.get_queryset().filter(slug=self.kwargs['slug']).values_list('updated_at', flat=True).first()
+        if updated_at is None:
+            return None
+        return (updated_at.isoformat(),), updated_at
+
+class HomepageView(PageCacheMixin, TemplateView):
     template_name = "mainapp/homepage.html"
+    page_cache_tags = ('homepage',)
+    cache_timeout = 60 * 60 * 24
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # NOTE: For performance on large datasets, consider caching these querysets.
-        # Avoid order_by('?') on large tables; fetch random IDs in a more performant way if needed.
-        context['recent_blogs'] = Blog.objects.filter(status='PUBLISHED').order_by('-published_date')[:3]
-        context['clients'] = Clientele.objects.all()
-        context['featured_testimonials'] = Testimonial.objects.filter(is_featured=True)
-        context['home_project_banners'] = ProjectHomeBanner.objects.all()
-        context['homepage_testimonials'] = HomepageTestimonial.objects.all()
-        print(len(HomepageTestimonial.objects.all()))
+        # Materialized lists cached under a versioned key; signals.py bumps the
+        # 'homepage' version whenever one of the underlying models changes.
+        cache_key = f"homepage::{get_cache_version('homepage')}"
+        content = cache.get(cache_key)
+        if content is None:
+            # Avoid order_by('?') on large tables; fetch random IDs in a more performant way if needed.
+            content = {
+                'recent_blogs': list(Blog.objects.published().cards().order_by('-published_date')[:3]),
+                'clients': list(Clientele.objects.all()),
+                'featured_testimonials': list(Testimonial.objects.filter(is_featured=True)),
+                'home_project_banners': list(ProjectHomeBanner.objects.select_related('project')),
+                'homepage_testimonials': list(HomepageTestimonial.objects.all()),
+            }
+            cache.set(cache_key, content, timeout=self.cache_timeout)
+        context.update(content)
+        prime_derivatives([
+            *(banner.background_image for banner in content['home_project_banners']),
+            *(testimonial.customer_image for testimonial in content['homepage_testimonials']),
+            *(client.logo for client in content['clients']),
+        ])
         return context
 
-class ProjectListView(ListView):
+class ProjectListView(PageCacheMixin, PublishedValidatorsMixin, ListView):
     model = Project
     template_name = "mainapp/project_list.html"
     context_object_name = "projects"
-    paginate_by = 12
+    page_cache_tags = ('project_list',)
+    # Archive cards per page; the archive is keyset-paginated on (created_at, id).
+    archive_page_size = 12
+    archive_ordering = ('created_at', 'id')
 
+    def get_queryset(self):
+        # main_image is a denormalized FK, so one joined query covers every card.
+        return Project.objects.filter(status='PUBLISHED').select_related('main_image')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        base_qs = Project.objects.filter(status='PUBLISHED').prefetch_related('gallery_images')
-        context['signature_projects'] = base_qs.filter(feature_on_project_page=True)
-        context['archive_projects'] = base_qs.filter(feature_on_project_page=False)
+        after = keyset_filter(Project, self.archive_ordering, self.request.GET.get('after'))
+
+        # One query: every signature project plus one page (and a look-ahead row) of
+        # the archive, numbered per section by a window function and split in Python.
+        projects = self.get_queryset()
+        if after is not None:
+            projects = projects.filter(Q(feature_on_project_page=True) | after)
+        projects = (
+            projects
+            .annotate(section_row=Window(
+                RowNumber(),
+                partition_by=[F('feature_on_project_page')],
+                order_by=[F(name).desc() for name in self.archive_ordering],
+            ))
+            .filter(Q(feature_on_project_page=True) | Q(section_row__lte=self.archive_page_size + 1))
+            .order_by(*(f'-{name}' for name in self.archive_ordering))
+        )
+        signature_projects, archive_projects = [], []
+        for project in projects:
+            (signature_projects if project.feature_on_project_page else archive_projects).append(project)
+
+        next_cursor = None
+        if len(archive_projects) > self.archive_page_size:
+            archive_projects = archive_projects[:self.archive_page_size]
+            last = archive_projects[-1]
+            next_cursor = encode_cursor([getattr(last, name) for name in self.archive_ordering])
+
+        prime_derivatives(
+            project.main_image.image for project in (*signature_projects, *archive_projects) if project.main_image
+        )
+        context['signature_projects'] = signature_projects
+        context['archive_projects'] = archive_projects
+        context['archive_next_cursor'] = next_cursor
+        context['archive_total'] = self.get_archive_total()
         return context
 
-class ProjectDetailView(DetailView):
+    def get_archive_total(self):
+        """Archive size, cached until the next project change bumps the 'project_list' tag."""
+        cache_key = f"project_list::archive_total::{get_cache_version('project_list')}"
+        return cache.get_or_set(
+            cache_key,
+            lambda: self.get_queryset().filter(feature_on_project_page=False).count(),
+            timeout=None,
+        )
+
+class ProjectDetailView(PageCacheMixin, ObjectValidatorsMixin, DetailView):
+    # Hits are counted by HitBeaconView, so cached renders are counted too.
     model = Project
     template_name = "mainapp/project_detail.html"
     context_object_name = "project"
 
+    def get_cache_tags(self):
+        return [*super().get_cache_tags(), f"project:{self.kwargs['slug']}"]
+
     def get_queryset(self):
         return Project.objects.filter(status='PUBLISHED')
 
-    def get(self, request, *args, **kwargs):
-        response = super().get(request, *args, **kwargs)
-        # Safely increment hit count
-        HitCount.objects.increment(self.object, request=self.request)
-        return response
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # The template walks the gallery twice; prefetching serves both from one query.
+        prefetch_related_objects([self.object], 'gallery_images')
+        prime_derivatives(image.image for image in self.object.gallery_images.all())
+        return context
 
-class BlogListView(ListView):
+class BlogListView(PageCacheMixin, PublishedValidatorsMixin, ListView):
     model = Blog
     template_name = "mainapp/blog_list.html"
     context_object_name = "blogs"
+    page_cache_tags = ('blog_list',)
+    popular_tags = 12
+    # Keyset-paginated on (published_date, id); see keyset_page().
+    page_size = 12
+    keyset_ordering = ('published_date', 'id')
+
+    def get_queryset(self):
+        return Blog.objects.published().cards()
+
+    def get_context_data(self, **kwargs):
+        blogs, next_cursor = keyset_page(
+            self.object_list, self.keyset_ordering, self.request.GET.get('after'), self.page_size,
+        )
+        context = super().get_context_data(object_list=blogs, **kwargs)
+        context['next_cursor'] = next_cursor
+        context['popular_tags'] = Tag.objects.in_use()[:self.popular_tags]
+        prime_derivatives(blog.header_image_desktop for blog in blogs)
+        return context
+
+class TagBlogListView(BlogListView):
+    """Published blogs with one tag, read through the BlogTag index."""
 
     def get_queryset(self):
-        return Blog.objects.filter(status='PUBLISHED').order_by('-published_date')
+        self.tag = get_object_or_404(Tag, slug=self.kwargs['slug'])
+        return super().get_queryset().filter(blog_tags__tag=self.tag)
 
-class BlogDetailView(DetailView):
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['tag'] = self.tag
+        return context
+
+class BlogDetailView(PageCacheMixin, ObjectValidatorsMixin, DetailView):
+    # Hits are counted by HitBeaconView, so cached renders are counted too.
     model = Blog
     template_name = "mainapp/blog_detail.html"
     context_object_name = "blog"
 
+    def get_cache_tags(self):
+        return [*super().get_cache_tags(), f"blog:{self.kwargs['slug']}"]
+
     def get_queryset(self):
         return Blog.objects.filter(status='PUBLISHED')
 
-    def get(self, request, *args, **kwargs):
-        response = super().get(request, *args, **kwargs)
-        HitCount.objects.increment(self.object, request=self.request)
-        return response
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['tags'] = Tag.objects.filter(blog_tags__blog=self.object).order_by('name')
+        prime_derivatives([self.object.header_image_desktop])
+        return context
+
+@method_decorator(csrf_exempt, name='dispatch')
+class HitBeaconView(View):
+    """
+    Counts a page view reported by the detail templates via navigator.sendBeacon,
+    so views served from the page cache are still counted.
+    """
+    http_method_names = ['post']
+    models = {'project': Project, 'blog': Blog}
+
+    def post(self, request, model, pk):
+        model_class = self.models.get(model)
+        if model_class is None:
+            return HttpResponse(status=404)
+        obj = get_object_or_404(model_class.objects.filter(status='PUBLISHED').only('pk'), pk=pk)
+        HitCount.objects.increment(obj, request=request)
+        return HttpResponse(status=204)
 
 class ContactView(CreateView):
     model = ContactSubmission
@@ -97,6 +336,25 @@ class ContactView(CreateView):
     def get_success_url(self):
         return reverse_lazy('mainapp:contact') + '?success=1'
 
+    def post(self, request, *args, **kwargs):
+        # Throttle before the form is even parsed: a flood costs one cache call per
+        # request rather than a validation pass, a transaction and an email.
+        if settings.CONTACT_THROTTLE_BURST:
+            allowed, retry_after = take_token(
+                cache,
+                # The client IP rather than get_visitor_key(), which a bot could vary with its User-Agent.
+                f"throttle::contact::{get_client_ip(request)}",
+                settings.CONTACT_THROTTLE_BURST,
+                settings.CONTACT_THROTTLE_REFILL_SECONDS,
+            )
+            if not allowed:
+                response = HttpResponse(
+                    "Too many submissions. Please try again later.", status=429, content_type='text/plain',
+                )
+                response['Retry-After'] = str(retry_after)
+                return response
+        return super().post(request, *args, **kwargs)
+
     def form_valid(self, form):
         # Honeypot check
         # If form has a honeypot field check it defensively
@@ -105,43 +363,57 @@ class ContactView(CreateView):
 
         self.object = form.save(commit=False)
 
-        try:
-            with transaction.atomic():
-                self.object.save()
+        # The submission and its notification commit together; the email itself is
+        # sent by `manage.py run_outbox_worker`, so SMTP never delays the response.
+        # In digest mode the worker reports the submission in its next digest instead.
+        with transaction.atomic():
+            self.object.save()
+            if settings.CONTACT_NOTIFICATION_MODE != 'digest':
                 subject, text_body, html_body = format_contact_email(self.object)
-
-                # NOTE: For production, this email sending should be offloaded to a background worker
-                send_mail(
-                    subject=subject,
-                    message=text_body,
-                    from_email=settings.EMAIL_HOST_USER,
-                    recipient_list=[settings.CONTACT_NOTIFICATION_EMAIL],
-                    html_message=html_body,
-                    fail_silently=False
+                OutboxMessage.objects.enqueue_email(
+                    subject, text_body, [settings.CONTACT_NOTIFICATION_EMAIL],
+                    html_body=html_body, submission=self.object,
                 )
 
-        except Exception as e:
-            logger.error(f"Failed to send contact submission email for {getattr(self.object, 'email', 'unknown')}: {e}")
-            # Continue to success page even if email fails
-
         return HttpResponseRedirect(self.get_success_url())
 
-class AboutUsView(TemplateView):
+class SearchView(PageCacheMixin, TemplateView):
+    """Site search over published projects and blogs (see mainapp/search.py)."""
+    template_name = "mainapp/search.html"
+    # Any project or blog save purges the cached (empty) search page.
+    page_cache_tags = ('search',)
+    results_limit = 50
+
+    def is_page_cacheable(self, request):
+        # Every distinct ?q= would get its own entry, so arbitrary queries could
+        # evict the pages that are worth caching. Results are cheap to recompute.
+        return not request.GET.get('q', '').strip()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()[:200]
+        context['query'] = query
+        context['results'] = search(query, limit=self.results_limit) if query else []
+        return context
+
+class AboutUsView(PageCacheMixin, TemplateView):
     template_name = "mainapp/about.html"
+    page_cache_tags = ('about',)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['team_members'] = TeamMember.objects.all()
-        context['leadership_team'] = Leadership.objects.all()
-        context['recent_blogs'] = Blog.objects.filter(status='PUBLISHED').order_by('-published_date')[:3]
+        context['leadership_team'] = list(Leadership.objects.all())
+        prime_derivatives(leader.photo for leader in context['leadership_team'])
+        context['recent_blogs'] = Blog.objects.published().cards().order_by('-published_date')[:3]
         return context
 
 # Placeholder Views
-class TechnologyProductsView(TemplateView):
+class TechnologyProductsView(PageCacheMixin, TemplateView):
     template_name = "mainapp/technology_products.html"
 
-class ServicesView(TemplateView):
+class ServicesView(PageCacheMixin, TemplateView):
     template_name = "mainapp/services.html"
 
-class SustainabilityView(TemplateView):
+class SustainabilityView(PageCacheMixin, TemplateView):
     template_name = "mainapp/sustainability.html"
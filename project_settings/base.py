@@ -155,6 +155,32 @@ EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=False, cast=bool)
 CONTACT_NOTIFICATION_EMAIL = config('CONTACT_NOTIFICATION_EMAIL')
 
+# Outgoing email is queued in OutboxMessage and sent by `manage.py run_outbox_worker`.
+# Failed sends are retried after OUTBOX_BACKOFF_SECONDS * 2^(attempts - 1) (capped at
+# OUTBOX_BACKOFF_MAX_SECONDS) until OUTBOX_MAX_ATTEMPTS; a claimed batch that is not
+# finished within OUTBOX_LEASE_SECONDS (e.g. the worker died) becomes due again.
+OUTBOX_MAX_ATTEMPTS = config('OUTBOX_MAX_ATTEMPTS', default=8, cast=int)
+OUTBOX_BACKOFF_SECONDS = config('OUTBOX_BACKOFF_SECONDS', default=30, cast=int)
+OUTBOX_BACKOFF_MAX_SECONDS = config('OUTBOX_BACKOFF_MAX_SECONDS', default=6 * 60 * 60, cast=int)
+OUTBOX_LEASE_SECONDS = config('OUTBOX_LEASE_SECONDS', default=5 * 60, cast=int)
+
+# 'immediate' sends one email per contact submission; 'digest' lets the outbox worker
+# collect everything submitted since the previous digest into one email at most every
+# CONTACT_DIGEST_INTERVAL seconds, which keeps SMTP volume flat during campaign bursts.
+CONTACT_NOTIFICATION_MODE = config('CONTACT_NOTIFICATION_MODE', default='immediate')
+CONTACT_DIGEST_INTERVAL = config('CONTACT_DIGEST_INTERVAL', default=15 * 60, cast=int)
+
+# Reverse proxies in front of Django that append the client address to X-Forwarded-For
+# (nginx: `proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;`). Client IPs for
+# throttling and visitor keys are read from that header; 0 uses REMOTE_ADDR.
+TRUSTED_PROXY_COUNT = config('TRUSTED_PROXY_COUNT', default=0, cast=int)
+
+# Contact form POSTs per client IP: a bucket of CONTACT_THROTTLE_BURST requests that
+# refills one request every CONTACT_THROTTLE_REFILL_SECONDS. Excess requests get a 429
+# before the form is validated or the database is touched. A burst of 0 disables it.
+CONTACT_THROTTLE_BURST = config('CONTACT_THROTTLE_BURST', default=5, cast=int)
+CONTACT_THROTTLE_REFILL_SECONDS = config('CONTACT_THROTTLE_REFILL_SECONDS', default=60, cast=int)
+
 # Caching
 CACHES = {
     'default': {
@@ -163,6 +189,44 @@ CACHES = {
     }
 }
 
+# Full-page cache for anonymous visitors (seconds; 0 disables). Entries are purged per
+# model instance via cache tags; run `manage.py clear_page_cache` after each deploy.
+PAGE_CACHE_TIMEOUT = config('PAGE_CACHE_TIMEOUT', default=60 * 60, cast=int)
+
+# Admin search for contact submissions, projects and blogs through a full-text index
+# (SQLite FTS5 or a PostgreSQL GIN index, see mainapp/fulltext.py) instead of LIKE scans.
+# The indexes are created by migration 0024_full_text_search; this only switches the admin to them.
+ADMIN_FULL_TEXT_SEARCH = config('ADMIN_FULL_TEXT_SEARCH', default=False, cast=bool)
+
+# Analytics
+# When enabled, HitCount.objects.increment only bumps a cache counter and page views
+# do no analytics writes. Run `manage.py flush_hit_counts` periodically (e.g. from cron)
+# to persist the counters. Requires a shared cache (Redis) when running several workers.
+HITCOUNT_BUFFERED = config('HITCOUNT_BUFFERED', default=False, cast=bool)
+# When enabled, visitors are recorded in a fixed-size HyperLogLog sketch per object and
+# day (PFADD on Redis) instead of one debounce key per visitor, and HitCount.unique_visitors
+# holds the approximate number of distinct visitors next to the raw hits.
+HITCOUNT_UNIQUE_VISITORS = config('HITCOUNT_UNIQUE_VISITORS', default=False, cast=bool)
+
+# Image uploads
+# Every ImageField upload is checked from its header before it is decoded or stored
+# (mainapp.utils.image_validate_and_resize); `manage.py validate_media` audits existing files.
+IMAGE_UPLOAD_MAX_MB = config('IMAGE_UPLOAD_MAX_MB', default=5, cast=int)
+IMAGE_UPLOAD_MAX_PIXELS = config('IMAGE_UPLOAD_MAX_PIXELS', default=40_000_000, cast=int)
+IMAGE_UPLOAD_FORMATS = ('JPEG', 'MPO', 'PNG', 'WEBP', 'GIF', 'AVIF')
+# Content-hash manifest of `manage.py optimize_media`, kept outside MEDIA_ROOT so it is
+# never served; files it lists with an unchanged size and mtime are not read again.
+MEDIA_OPTIMIZE_MANIFEST = config('MEDIA_OPTIMIZE_MANIFEST', default=str(BASE_DIR / '.media-manifest.json'))
+
+# Responsive images
+# Uploaded images get width-bounded derivatives (mainapp/images.py) that templates emit
+# in srcset. Uploads are queued and built by `manage.py build_image_derivatives --queued`
+# (run it from cron); without --queued it backfills existing uploads.
+# Add 'avif' to the formats if Pillow was built with AVIF support.
+IMAGE_DERIVATIVE_WIDTHS = (320, 640, 960, 1280, 1920)
+IMAGE_DERIVATIVE_FORMATS = config('IMAGE_DERIVATIVE_FORMATS', default='webp', cast=Csv())
+IMAGE_DERIVATIVE_QUALITY = config('IMAGE_DERIVATIVE_QUALITY', default=80, cast=int)
+
 # Admin Charts
 ADMIN_CHARTS_CONFIG = 'mainapp.admin_charts.py'
 
@@ -0,0 +1,9 @@
+import pytest
+from django.core.cache import cache
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Keeps cached pages, versions and hit debounce keys from leaking between tests."""
+    cache.clear()
+    yield
+    cache.clear()
@@ -1,3 +1,4 @@
+import os
 import pytest
 from django.contrib.admin.sites import AdminSite
 from mainapp.admin import ProjectAdmin, ProjectImageInline, ProjectFactInline
@@ -11,3 +12,128 @@ def test_project_admin_inlines():
     
     assert ProjectImageInline in project_admin.inlines
     assert ProjectFactInline in project_admin.inlines
+
+@pytest.mark.django_db
+def test_contact_submission_export_streams_filtered_rows(admin_client):
+    """Tests that the export view streams every row matching the changelist filters."""
+    import json
+    from django.urls import reverse
+    from mainapp.models import ContactSubmission
+
+    for n in range(3):
+        ContactSubmission.objects.create(first_name=f'Person{n}', last_name='Doe', email=f'p{n}@example.com',
+                                         message='Hello, "world"', notified=n > 0)
+
+    url = reverse('admin:mainapp_contactsubmission_export', args=['csv'])
+    response = admin_client.get(url)
+    assert response.streaming
+    lines = b''.join(response.streaming_content).decode().splitlines()
+    assert lines[0] == 'first_name,last_name,email,mobile_number,message,submission_date'
+    assert len(lines) == 4
+
+    response = admin_client.get(reverse('admin:mainapp_contactsubmission_export', args=['jsonl']),
+                                {'notified__exact': '0'})
+    rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+    assert [row['first_name'] for row in rows] == ['Person0']
+    assert rows[0]['message'] == 'Hello, "world"'
+
+# Queries allowed per changelist page (session, user, counts, the page itself and
+# its prefetches). The count must not grow with the number of rows.
+ADMIN_QUERY_BUDGETS = {
+    'project': 5,
+    'blog': 5,
+    'projecthomebanner': 5,
+    'hitcount': 7,
+    'contactsubmission': 5,
+    'mediareference': 7,
+}
+
+def _seed_admin_rows(start, count):
+    from django.utils import timezone
+    from mainapp.models import Blog, ContactSubmission, HitCount, ProjectHomeBanner, ProjectImage
+
+    for n in range(start, start + count):
+        project = Project.objects.create(title=f"Project {n}", status='PUBLISHED', brief_description="Test")
+        ProjectImage.objects.create(project=project, image=f'project_images/{n}.webp', main_image=True)
+        ProjectHomeBanner.objects.create(project=project, scope='Scope', tech_used='Tech', performance_impact='Impact',
+                                         background_image=f'project_home_banners/{n}.webp')
+        blog = Blog.objects.create(title=f"Blog {n}", status='PUBLISHED', summary='Summary', content='Content',
+                                   header_image_desktop='blog_headers/desktop/header.webp')
+        for obj in (project, blog):
+            HitCount.objects.create(content_object=obj, day=timezone.localdate(), hits=n + 1)
+        ContactSubmission.objects.create(first_name='First', last_name='Last', email=f'{n}@example.com', message='Hi')
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('model_name', ADMIN_QUERY_BUDGETS)
+def test_admin_changelist_query_budget(admin_client, model_name):
+    """Tests that changelist pages run a fixed number of queries, however many rows they list."""
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from django.urls import reverse
+
+    url = reverse(f'admin:mainapp_{model_name}_changelist')
+    counts = []
+    for start, count in ((0, 2), (2, 10)):
+        _seed_admin_rows(start, count)
+        call_command('recompute_hit_counts', stdout=open(os.devnull, 'w'))
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client.get(url)
+        assert response.status_code == 200
+        counts.append(len(queries))
+
+    assert counts[0] == counts[1], f'{model_name} changelist queries grow with rows: {counts}'
+    assert counts[1] <= ADMIN_QUERY_BUDGETS[model_name], counts
+
+@pytest.mark.django_db
+def test_admin_full_text_search_ranks_matches(admin_client, settings):
+    """Tests that admin search uses the migrated full-text index, stays in sync and ranks matches."""
+    from django.urls import reverse
+    from mainapp import fulltext
+    from mainapp.models import ContactSubmission
+
+    settings.ADMIN_FULL_TEXT_SEARCH = True
+    if not fulltext.is_enabled(ContactSubmission):
+        pytest.skip('No full-text index support on this database.')
+
+    ContactSubmission.objects.create(first_name='Asha', last_name='Rao', email='asha@example.com',
+                                     message='Quote for geopolymer kerbstones, geopolymer pavers too')
+    weak = ContactSubmission.objects.create(first_name='Ravi', last_name='Iyer', email='ravi@example.com',
+                                            message='Do you ship geopolymer blocks abroad?')
+    ContactSubmission.objects.create(first_name='Meera', last_name='Das', email='meera@example.com',
+                                     message='Careers page question about the geopolymer research team in the lab')
+    for n in range(5):
+        ContactSubmission.objects.create(first_name='Other', last_name=str(n), email=f'{n}@example.com', message='Hello')
+    ContactSubmission.objects.filter(pk=weak.pk).update(message='Do you ship fly ash blocks abroad?')
+
+    url = reverse('admin:mainapp_contactsubmission_changelist')
+    response = admin_client.get(url, {'q': 'geopoly'})
+    assert [obj.first_name for obj in response.context['cl'].result_list] == ['Asha', 'Meera']
+
+    response = admin_client.get(url, {'q': 'blocks ship'})
+    assert [obj.first_name for obj in response.context['cl'].result_list] == ['Ravi']
+    # Punctuation never reaches the FTS query parser.
+    assert admin_client.get(url, {'q': '"AND (*'}).status_code == 200
+
+@pytest.mark.django_db
+def test_full_text_index_found_once_it_exists(settings):
+    """Tests that a missing index is looked up again rather than remembered as missing."""
+    from django.db import connection, transaction
+    from mainapp import fulltext
+    from mainapp.models import ContactSubmission
+
+    settings.ADMIN_FULL_TEXT_SEARCH = True
+    if not fulltext.is_enabled(ContactSubmission) or connection.vendor != 'sqlite':
+        pytest.skip('No SQLite full-text index on this database.')
+
+    class Restore(Exception):
+        pass
+
+    fulltext._installed.clear()
+    with pytest.raises(Restore):
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('DROP TRIGGER "mainapp_contactsubmission_fts_au"')
+            assert not fulltext.is_enabled(ContactSubmission)
+            raise Restore  # Rolls the DROP back, as if the migration had just run.
+    assert fulltext.is_enabled(ContactSubmission)
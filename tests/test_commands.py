@@ -0,0 +1,168 @@
+import io
+from datetime import timedelta
+
+import pytest
+from PIL import Image
+from django.core import mail
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from unittest.mock import patch
+
+from mainapp.models import Clientele, ContactDigest, ContactSubmission, MediaReference, OutboxMessage
+
+@pytest.fixture
+def media_dirs(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path / 'media')
+    settings.STATICFILES_DIRS = [str(tmp_path / 'static')]
+    settings.MEDIA_OPTIMIZE_MANIFEST = str(tmp_path / 'manifest.json')
+    (tmp_path / 'media' / 'clientele_logos').mkdir(parents=True)
+    (tmp_path / 'static' / 'images').mkdir(parents=True)
+    return tmp_path
+
+@pytest.mark.django_db
+def test_optimize_media_converts_and_skips_on_rerun(media_dirs):
+    """Tests that oversized images become WebP, ImageFields follow, and a rerun re-encodes nothing."""
+    image = Image.effect_noise((3000, 200), 64)
+    image.save(media_dirs / 'media' / 'clientele_logos' / 'logo.png')
+    image.save(media_dirs / 'static' / 'images' / 'hero.png')
+    client = Clientele.objects.create(name="Client", logo='clientele_logos/logo.png')
+
+    call_command('optimize_media', workers=2, stdout=io.StringIO())
+
+    client.refresh_from_db()
+    assert client.logo.name == 'clientele_logos/logo.webp'
+    assert list(MediaReference.objects.values_list('path', flat=True)) == ['clientele_logos/logo.webp']
+    assert not (media_dirs / 'media' / 'clientele_logos' / 'logo.png').exists()
+    with Image.open(media_dirs / 'media' / client.logo.name) as converted:
+        assert converted.format == 'WEBP' and converted.width == 2560
+    # Static files are referenced by name from templates, so the original stays.
+    assert (media_dirs / 'static' / 'images' / 'hero.png').exists()
+    assert (media_dirs / 'static' / 'images' / 'hero.webp').exists()
+
+    out = io.StringIO()
+    call_command('optimize_media', workers=2, stdout=out)
+    assert '0 new or modified files' in out.getvalue()
+
+@pytest.mark.django_db
+def test_cleanup_orphan_uploads_keeps_rich_text_images(media_dirs, monkeypatch):
+    """Tests that only unreferenced files are deleted, keeping images linked from CKEditor HTML."""
+    from mainapp.models import Blog
+
+    media = media_dirs / 'media'
+    (media / 'uploads' / 'ckeditor' / '2024').mkdir(parents=True)
+    for name in ('clientele_logos/logo.webp', 'uploads/ckeditor/2024/inline image.webp', 'clientele_logos/orphan.webp'):
+        (media / name).write_bytes(b'x')
+    Clientele.objects.create(name="Client", logo='clientele_logos/logo.webp')
+    Blog.objects.create(
+        title="Inline", summary="Summary",
+        content='<p><img src="/media/uploads/ckeditor/2024/inline%20image.webp" alt=""></p>',
+    )
+
+    monkeypatch.setattr('builtins.input', lambda prompt: 'y')
+    call_command('cleanup_orphan_uploads', batch_size=1, stdout=io.StringIO())
+
+    assert (media / 'clientele_logos' / 'logo.webp').exists()
+    assert (media / 'uploads' / 'ckeditor' / '2024' / 'inline image.webp').exists()
+    assert not (media / 'clientele_logos' / 'orphan.webp').exists()
+
+@pytest.mark.django_db
+def test_run_outbox_worker_sends_each_submission_in_one_digest(client, settings):
+    """Tests that digest mode reports a burst of submissions in one email, exactly once."""
+    settings.CONTACT_NOTIFICATION_MODE = 'digest'
+    settings.CONTACT_NOTIFICATION_EMAIL = 'notifications@example.com'
+    for n in range(3):
+        client.post(reverse('mainapp:contact'), {'first_name': f'Person{n}', 'last_name': 'Doe', 'email': f'p{n}@example.com',
+                                  'mobile_number': '9876543210', 'message': '<b>Hello</b>'})
+    assert ContactSubmission.objects.count() == 3
+    ContactSubmission.objects.update(submission_date=timezone.now() - timedelta(minutes=5))
+
+    call_command('run_outbox_worker', once=True, digest_now=True, stdout=io.StringIO())
+    assert len(mail.outbox) == 1
+    assert mail.outbox[0].subject == '3 new contact inquiries'
+    assert '&lt;b&gt;Hello&lt;/b&gt;' in mail.outbox[0].alternatives[0][0]
+    assert not ContactSubmission.objects.filter(notified=False).exists()
+
+    # Nothing new since the high-water mark: no second digest.
+    call_command('run_outbox_worker', once=True, digest_now=True, stdout=io.StringIO())
+    assert len(mail.outbox) == 1
+    assert ContactDigest.objects.high_water_mark()[0] == ContactSubmission.objects.order_by('pk').last().pk
+
+@pytest.mark.django_db
+def test_contact_digest_skips_submissions_emailed_in_immediate_mode(client, settings):
+    """Tests that switching from immediate to digest mode reports each submission exactly once."""
+    settings.CONTACT_NOTIFICATION_EMAIL = 'notifications@example.com'
+    contact = {'last_name': 'Doe', 'mobile_number': '9876543210', 'message': 'Hello'}
+    settings.CONTACT_NOTIFICATION_MODE = 'immediate'
+    for n in range(2):
+        client.post(reverse('mainapp:contact'), {'first_name': f'Early{n}', 'email': f'e{n}@example.com', **contact})
+    call_command('run_outbox_worker', once=True, stdout=io.StringIO())
+    assert len(mail.outbox) == 2
+
+    settings.CONTACT_NOTIFICATION_MODE = 'digest'
+    client.post(reverse('mainapp:contact'), {'first_name': 'Late', 'email': 'late@example.com', **contact})
+    ContactSubmission.objects.update(submission_date=timezone.now() - timedelta(minutes=5))
+    call_command('run_outbox_worker', once=True, digest_now=True, stdout=io.StringIO())
+    assert len(mail.outbox) == 3
+    assert mail.outbox[2].subject == '1 new contact inquiries'
+    assert 'Late' in mail.outbox[2].body and 'Early' not in mail.outbox[2].body
+
+    # Immediate submissions alone only move the mark; no empty digest is sent.
+    settings.CONTACT_NOTIFICATION_MODE = 'immediate'
+    client.post(reverse('mainapp:contact'), {'first_name': 'Again', 'email': 'a@example.com', **contact})
+    ContactSubmission.objects.update(submission_date=timezone.now() - timedelta(minutes=5))
+    settings.CONTACT_NOTIFICATION_MODE = 'digest'
+    call_command('run_outbox_worker', once=True, digest_now=True, stdout=io.StringIO())
+    assert len(mail.outbox) == 4 and 'Again' in mail.outbox[3].subject
+    assert ContactDigest.objects.high_water_mark()[0] == ContactSubmission.objects.order_by('pk').last().pk
+
+@pytest.mark.django_db
+def test_run_outbox_worker_backs_off_the_whole_batch_when_smtp_is_down():
+    """Tests that a failed connect costs one attempt per message and no further connects."""
+    for n in range(3):
+        OutboxMessage.objects.enqueue_email(f'Subject {n}', 'Body', ['to@example.com'])
+    with patch('django.core.mail.backends.locmem.EmailBackend.open', side_effect=OSError('Connection refused')) as opened, \
+            patch('mainapp.outbox.send') as send:
+        call_command('run_outbox_worker', once=True, stdout=io.StringIO())
+    assert opened.call_count == 1
+    assert not send.called
+    for message in OutboxMessage.objects.all():
+        assert (message.status, message.attempts) == (OutboxMessage.Status.PENDING, 1)
+        assert message.next_attempt_at > timezone.now()
+        assert message.last_error == 'OSError: Connection refused'
+
+@pytest.mark.django_db
+def test_outbox_claims_never_overlap():
+    """Tests that a worker only gets rows its own conditional UPDATE leased."""
+    for n in range(3):
+        OutboxMessage.objects.enqueue_email(f'Subject {n}', 'Body', ['to@example.com'])
+    first = OutboxMessage.objects.claim(2)
+    second = OutboxMessage.objects.claim(5)
+    assert len(first) == 2 and len(second) == 1
+    assert {m.pk for m in first}.isdisjoint(m.pk for m in second)
+    assert len({m.claimed_by for m in first + second}) == 2
+    assert OutboxMessage.objects.claim(5) == []
+
+@pytest.mark.django_db
+def test_rebuild_search_index_matches_incremental_index():
+    """Tests that a rebuild produces the same postings and frequencies as the save signals."""
+    from mainapp.models import Project, SearchPosting, SearchStatistics, SearchTerm
+
+    for n in range(4):
+        Project.objects.create(title=f"Road {n}", status='PUBLISHED', brief_description="Cement-free road",
+                               detail_content=f"<p>Geopolymer {'slag ' * n}</p>")
+    project = Project.objects.get(title="Road 1")
+    project.detail_content = "<p>Geopolymer slag slag slag slag</p>"
+    project.save()
+    Project.objects.get(title="Road 3").delete()
+    def snapshot():
+        statistics = SearchStatistics.objects.current()
+        return (
+            sorted(SearchPosting.objects.values_list('term__term', 'document__object_id', 'frequency')),
+            sorted(SearchTerm.objects.filter(document_count__gt=0).values_list('term', 'document_count')),
+            (statistics.document_count, statistics.total_length),
+        )
+    incremental = snapshot()
+
+    call_command('rebuild_search_index', stdout=io.StringIO())
+    assert snapshot() == incremental
@@ -28,3 +28,200 @@ def test_project_fact_uniqueness():
     ProjectFact.objects.create(project=project, key="Location", value="City A")
     with pytest.raises(Exception): # IntegrityError
         ProjectFact.objects.create(project=project, key="Location", value="City B")
+
+@pytest.mark.django_db
+def test_buffered_hit_count_flush(settings):
+    """Tests that buffered hits skip the database until flushed."""
+    from django.core.cache import cache
+    from mainapp.models import HitCount
+    settings.HITCOUNT_BUFFERED = True
+    cache.clear()
+    blog = Blog.objects.create(title="Buffered", summary="Summary")
+
+    HitCount.objects.increment(blog, delta=3)
+    assert HitCount.objects.count() == 0
+
+    assert HitCount.objects.flush_buffered() == 3
+    assert HitCount.objects.get().hits == 3
+
+    cache.delete(f"hit::{HitCount.objects.get().content_type_id}::{blog.pk}::anonymous")
+    HitCount.objects.increment(blog, delta=2)
+    assert HitCount.objects.flush_buffered() == 2
+    assert HitCount.objects.get().hits == 5
+    assert HitCount.objects.flush_buffered() == 0
+
+@pytest.mark.django_db
+def test_recompute_hit_counts_incremental():
+    """Tests that recompute_hit_counts writes totals and only re-sums touched or late-committed objects."""
+    from datetime import timedelta
+    from django.contrib.contenttypes.models import ContentType
+    from django.core.management import call_command
+    from django.utils import timezone
+    from mainapp.models import HitCount, HitCountTotal
+    blog_ct = ContentType.objects.get_for_model(Blog)
+    first = Blog.objects.create(title="First", summary="Summary")
+    second = Blog.objects.create(title="Second", summary="Summary")
+    HitCount.objects.create(content_type=blog_ct, object_id=first.pk, hits=4)
+    HitCount.objects.create(content_type=blog_ct, object_id=second.pk, hits=7)
+    HitCount.objects.filter(object_id=first.pk).update(last_hit=timezone.now() - timedelta(hours=1))
+
+    call_command('recompute_hit_counts')
+    assert HitCountTotal.objects.get(object_id=first.pk).hits == 4
+    assert HitCountTotal.objects.get(object_id=second.pk).hits == 7
+
+    HitCount.objects.filter(object_id=second.pk).update(hits=9, last_hit=timezone.now() + timedelta(seconds=1))
+    assert HitCountTotal.objects.recompute(blog_ct) == 1
+    assert HitCountTotal.objects.get(object_id=second.pk).hits == 9
+
+    # A write stamped before the watermark but committed after the last run is still folded in.
+    watermark = HitCountTotal.objects.get(object_id=second.pk).last_hit
+    third = Blog.objects.create(title="Third", summary="Summary")
+    HitCount.objects.create(content_type=blog_ct, object_id=third.pk, hits=2)
+    HitCount.objects.filter(object_id=third.pk).update(last_hit=watermark - timedelta(minutes=1))
+    HitCountTotal.objects.recompute(blog_ct)
+    assert HitCountTotal.objects.get(object_id=third.pk).hits == 2
+
+@pytest.mark.django_db
+def test_hit_count_daily_upsert():
+    """Tests that same-day hits fold into one row and the daily row is unique."""
+    from django.contrib.contenttypes.models import ContentType
+    from django.utils import timezone
+    from mainapp.models import HitCount
+    blog = Blog.objects.create(title="Upsert", summary="Summary")
+    blog_ct = ContentType.objects.get_for_model(Blog)
+    HitCount.objects._apply_counts(timezone.localdate(), {(blog_ct.id, blog.pk): 2})
+    HitCount.objects._apply_counts(timezone.localdate(), {(blog_ct.id, blog.pk): 3})
+    assert HitCount.objects.get().hits == 5
+    with pytest.raises(Exception): # IntegrityError
+        HitCount.objects.create(content_type=blog_ct, object_id=blog.pk, day=timezone.localdate())
+
+def test_hyperloglog_estimate():
+    """Tests that the HyperLogLog sketch stays close to the true cardinality."""
+    from mainapp.hyperloglog import HyperLogLog
+    sketch = HyperLogLog()
+    for n in range(20000):
+        sketch.add(f"visitor-{n}")
+    assert sketch.add("visitor-1") is False
+    assert abs(sketch.count() - 20000) < 20000 * 0.05
+    assert HyperLogLog(registers=sketch.to_bytes()).count() == sketch.count()
+
+@pytest.mark.django_db
+def test_unique_visitor_hit_counts(settings, rf):
+    """Tests that unique-visitor mode counts every view and estimates distinct visitors."""
+    from django.contrib.auth.models import AnonymousUser
+    from django.core.cache import cache
+    from mainapp.models import HitCount
+    settings.HITCOUNT_UNIQUE_VISITORS = True
+    cache.clear()
+    blog = Blog.objects.create(title="Uniques", summary="Summary")
+    for ip in ['10.0.0.1', '10.0.0.2', '10.0.0.1']:
+        request = rf.get('/', REMOTE_ADDR=ip)
+        request.user = AnonymousUser()
+        request.session = type('Session', (), {'session_key': 'k'})()
+        HitCount.objects.increment(blog, request=request)
+    hit_count = HitCount.objects.get()
+    assert hit_count.hits == 3
+    assert hit_count.unique_visitors == 2
+
+@pytest.mark.django_db
+def test_project_main_image_pointer():
+    """Tests that Project.main_image follows the flagged image and only one image is flagged."""
+    from mainapp.models import ProjectImage
+    project = Project.objects.create(title="Gallery", brief_description="Test")
+    first = ProjectImage.objects.create(project=project, image="project_images/a.webp", order=1)
+    project.refresh_from_db()
+    assert project.main_image == first
+
+    second = ProjectImage.objects.create(project=project, image="project_images/b.webp", order=2, main_image=True)
+    third = ProjectImage.objects.create(project=project, image="project_images/c.webp", order=3, main_image=True)
+    project.refresh_from_db()
+    assert project.main_image == third
+    assert list(project.gallery_images.filter(main_image=True)) == [third]
+
+    third.delete()
+    project.refresh_from_db()
+    assert project.main_image == first
+
+    prefetched = Project.objects.prefetch_related('gallery_images').get(pk=project.pk)
+    second.main_image = True
+    second.save()
+    assert Project.objects.prefetch_related('gallery_images').get(pk=project.pk).resolve_main_image() == second
+    assert prefetched.resolve_main_image() == first
+
+@pytest.mark.django_db
+def test_image_derivatives_built_after_upload(settings, tmp_path):
+    """Tests that an upload queues width-bounded WebP derivatives and the srcset tag lists them once built."""
+    import io
+    from PIL import Image
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from django.core.management import call_command
+    from django.template import Context, Template
+    from mainapp.models import Clientele, ImageDerivative, ImageDerivativeJob
+
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.IMAGE_DERIVATIVE_WIDTHS = (320, 640)
+    settings.IMAGE_DERIVATIVE_FORMATS = ['webp']
+    buffer = io.BytesIO()
+    Image.new('RGB', (500, 250), 'green').save(buffer, 'PNG')
+
+    client = Clientele.objects.create(name="Client", logo=SimpleUploadedFile('logo.png', buffer.getvalue()))
+    # The save only queues the work; no Pillow encoding happens in the web process.
+    assert list(ImageDerivativeJob.objects.values_list('source', flat=True)) == [client.logo.name]
+    assert not ImageDerivative.objects.exists()
+
+    call_command('build_image_derivatives', queued=True, stdout=io.StringIO())
+    assert not ImageDerivativeJob.objects.exists()
+    derivatives = list(ImageDerivative.objects.filter(source=client.logo.name))
+    # 640 exceeds the original, so it collapses onto the original width.
+    assert [(d.format, d.width, d.height) for d in derivatives] == [('webp', 320, 160), ('webp', 500, 250)]
+    assert (tmp_path / derivatives[0].file.name).exists()
+
+    html = Template('{% load responsive_images %}{% srcset client.logo "160px" %}').render(Context({'client': client}))
+    assert '-320w.webp 320w' in html and '-500w.webp 500w' in html and 'sizes="160px"' in html
+
+@pytest.mark.django_db
+def test_image_upload_validation(settings, tmp_path):
+    """Tests that uploads over the pixel limit or that are not images are rejected before being stored."""
+    import io
+    from PIL import Image
+    from django.core.exceptions import ValidationError
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from mainapp.models import Clientele
+
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.IMAGE_UPLOAD_MAX_PIXELS = 100
+    buffer = io.BytesIO()
+    Image.new('RGB', (20, 20)).save(buffer, 'PNG')
+
+    client = Clientele(name="Client", logo=SimpleUploadedFile('logo.png', buffer.getvalue()))
+    with pytest.raises(ValidationError) as excinfo:
+        client.full_clean()
+    assert 'logo' in excinfo.value.message_dict
+
+    # Saving without full_clean() is caught by the pre_save check.
+    with pytest.raises(ValidationError):
+        Clientele.objects.create(name="Client", logo=SimpleUploadedFile('logo.png', b'not an image'))
+    assert not Clientele.objects.exists()
+    assert not list(tmp_path.rglob('*.png'))
+
+@pytest.mark.django_db
+def test_media_reference_index():
+    """Tests that saving and deleting keep the index of file fields and rich-text media links current."""
+    from mainapp.models import MediaReference
+
+    blog = Blog.objects.create(
+        title="Indexed", summary="Summary", header_image_desktop='blog_headers/desktop/a.webp',
+        content='<p><img src="/media/uploads/ckeditor/a.webp"></p>',
+    )
+    assert set(MediaReference.objects.values_list('field', 'path')) == {
+        ('header_image_desktop', 'blog_headers/desktop/a.webp'),
+        ('content', 'uploads/ckeditor/a.webp'),
+        ('content', 'uploads/ckeditor/a_thumb.webp'),
+    }
+
+    blog.content = '<p>No images</p>'
+    blog.save()
+    assert list(MediaReference.objects.values_list('path', flat=True)) == ['blog_headers/desktop/a.webp']
+
+    blog.delete()
+    assert not MediaReference.objects.exists()
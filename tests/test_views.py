@@ -1,9 +1,12 @@
 import pytest
+from io import StringIO
 from django.urls import reverse
 from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
 from unittest.mock import patch
 
-from mainapp.models import Project, Blog, ContactSubmission, ServiceCategory
+from mainapp.models import Project, Blog, ContactSubmission, OutboxMessage, ServiceCategory
 
 @pytest.mark.django_db
 def test_homepage_view(client):
@@ -21,21 +24,28 @@ def test_project_list_view(client):
 def test_project_detail_hit_count(client):
     project = Project.objects.create(title="Hit Count Test", status='PUBLISHED', brief_description="Test")
     url = reverse('mainapp:project_detail', kwargs={'slug': project.slug})
-    
+    beacon_url = reverse('mainapp:hit_beacon', kwargs={'model': 'project', 'pk': project.pk})
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert beacon_url.encode() in response.content
+
     with patch('mainapp.models.HitCount.objects.increment') as mock_increment:
-        response = client.get(url)
-        assert response.status_code == 200
+        response = client.post(beacon_url)
+        assert response.status_code == 204
         mock_increment.assert_called_once()
 
 @pytest.mark.django_db
-def test_contact_view_post_success():
+def test_contact_view_post_success(settings):
     """Tests successful submission of the contact form."""
+    settings.CONTACT_NOTIFICATION_EMAIL = 'notifications@example.com'
     ServiceCategory.objects.create(name='General Inquiry')
     url = reverse('mainapp:contact')
     form_data = {
         'first_name': 'John',
         'last_name': 'Doe',
         'email': 'john.doe@example.com',
+        'mobile_number': '9876543210',
         'service_inquiry': ServiceCategory.objects.first().pk,
         'message': 'This is a test message.'
     }
@@ -50,13 +60,18 @@ def test_contact_view_post_success():
     assert ContactSubmission.objects.count() == 1
     submission = ContactSubmission.objects.first()
     assert submission.email == 'john.doe@example.com'
+    assert submission.notified is False # Queued, not sent inline
+    assert len(mail.outbox) == 0
+
+    call_command('run_outbox_worker', once=True, stdout=StringIO())
+    submission.refresh_from_db()
     assert submission.notified is True # Because email sending is mocked to succeed
     assert len(mail.outbox) == 1 # Check that one email was sent
     assert mail.outbox[0].subject == 'New Contact Inquiry from John Doe'
 
 @pytest.mark.django_db
-@patch('mainapp.views.send_mail', side_effect=Exception("SMTP Error"))
-def test_contact_view_post_email_failure(mock_send_mail):
+@patch('mainapp.outbox.EmailMultiAlternatives.send', side_effect=Exception("SMTP Error"))
+def test_contact_view_post_email_failure(mock_send):
     """Tests that the submission is saved even if email sending fails."""
     ServiceCategory.objects.create(name='General Inquiry')
     url = reverse('mainapp:contact')
@@ -64,6 +79,7 @@ def test_contact_view_post_email_failure(mock_send_mail):
         'first_name': 'Jane',
         'last_name': 'Doe',
         'email': 'jane.doe@example.com',
+        'mobile_number': '9876543210',
         'service_inquiry': ServiceCategory.objects.first().pk,
         'message': 'Another test message.'
     }
@@ -77,5 +93,270 @@ def test_contact_view_post_email_failure(mock_send_mail):
     assert ContactSubmission.objects.count() == 1
     submission = ContactSubmission.objects.first()
     assert submission.email == 'jane.doe@example.com'
+
+    call_command('run_outbox_worker', once=True, stdout=StringIO())
+    submission.refresh_from_db()
     assert submission.notified is False # Should be False on email failure
     assert len(mail.outbox) == 0 # No email should be sent
+    message = submission.outbox_messages.get()
+    assert message.status == OutboxMessage.Status.PENDING
+    assert message.attempts == 1
+    assert message.next_attempt_at > timezone.now() # Retried later, with backoff
+    assert 'SMTP Error' in message.last_error
+
+@pytest.mark.django_db
+def test_contact_view_throttles_before_touching_the_database(client, settings, django_assert_num_queries):
+    """Tests that POSTs beyond the token bucket get a 429 without any query."""
+    settings.CONTACT_THROTTLE_BURST = 2
+    url = reverse('mainapp:contact')
+    form_data = {'first_name': 'Bot', 'last_name': 'Net', 'email': 'bot@example.com', 'mobile_number': '9876543210',
+                 'message': 'Spam'}
+    for _ in range(2):
+        assert client.post(url, form_data).status_code == 302
+
+    with django_assert_num_queries(0):
+        response = client.post(url, form_data)
+    assert response.status_code == 429
+    assert int(response['Retry-After']) > 0
+    assert ContactSubmission.objects.count() == 2
+
+@pytest.mark.django_db
+def test_contact_throttle_keys_on_the_forwarded_client_ip(client, settings):
+    """Tests that visitors behind the same reverse proxy get separate buckets."""
+    settings.CONTACT_THROTTLE_BURST = 1
+    settings.TRUSTED_PROXY_COUNT = 1
+    url = reverse('mainapp:contact')
+    form_data = {'first_name': 'Ann', 'last_name': 'Lee', 'email': 'ann@example.com', 'mobile_number': '9876543210',
+                 'message': 'Hi'}
+    proxy = {'REMOTE_ADDR': '10.0.0.1'}
+    assert client.post(url, form_data, HTTP_X_FORWARDED_FOR='203.0.113.5', **proxy).status_code == 302
+    assert client.post(url, form_data, HTTP_X_FORWARDED_FOR='203.0.113.5', **proxy).status_code == 429
+    # A spoofed left-most entry does not escape the bucket; another visitor has their own.
+    assert client.post(url, form_data, HTTP_X_FORWARDED_FOR='1.2.3.4, 203.0.113.5', **proxy).status_code == 429
+    assert client.post(url, form_data, HTTP_X_FORWARDED_FOR='198.51.100.7', **proxy).status_code == 302
+
+@pytest.mark.django_db
+def test_detail_view_does_not_create_anonymous_session(client):
+    """Tests that counting an anonymous hit does not create a session or cookie."""
+    from django.contrib.sessions.models import Session
+    from mainapp.models import HitCount
+    project = Project.objects.create(title="Sessionless", status='PUBLISHED', brief_description="Test")
+    response = client.post(reverse('mainapp:hit_beacon', kwargs={'model': 'project', 'pk': project.pk}))
+    assert response.status_code == 204
+    assert HitCount.objects.get().hits == 1
+    assert Session.objects.count() == 0
+    assert 'sessionid' not in response.cookies
+
+@pytest.mark.django_db
+def test_homepage_cached_until_content_changes(client, django_assert_num_queries):
+    """Tests that a warm homepage runs no SQL and a model change invalidates it."""
+    from mainapp.models import Clientele
+    url = reverse('mainapp:homepage')
+    client.get(url)
+    with django_assert_num_queries(0):
+        assert client.get(url).status_code == 200
+
+    Clientele.objects.create(name="New Client", logo="clientele_logos/new.webp")
+    response = client.get(url)
+    assert b"New Client" in response.content
+
+@pytest.mark.django_db
+def test_page_cache_purged_by_instance_tags(client, django_assert_num_queries):
+    """Tests that anonymous pages are served from cache and saving a project purges its pages only."""
+    project = Project.objects.create(title="Cached", status='PUBLISHED', brief_description="Before")
+    other = Project.objects.create(title="Other", status='PUBLISHED', brief_description="Other")
+    detail_url = reverse('mainapp:project_detail', kwargs={'slug': project.slug})
+    other_url = reverse('mainapp:project_detail', kwargs={'slug': other.slug})
+    for url in (detail_url, other_url):
+        client.get(url)
+    with django_assert_num_queries(0):
+        assert client.get(detail_url).status_code == 200
+
+    project.brief_description = "After"
+    project.save()
+    assert b"After" in client.get(detail_url).content
+    with django_assert_num_queries(0):
+        client.get(other_url)
+
+@pytest.mark.django_db
+def test_page_cache_replays_vary(rf, django_assert_num_queries):
+    """Tests that a page served from the cache keeps the Vary header of the rendered one."""
+    from django.contrib.auth.models import AnonymousUser
+    from django.http import HttpResponse
+    from django.views import View
+    from mainapp.views import PageCacheMixin
+
+    class VaryingView(PageCacheMixin, View):
+        def get(self, request):
+            return HttpResponse('Hello', headers={'Vary': 'Accept-Language'})
+
+    def get():
+        request = rf.get('/varying/')
+        request.user = AnonymousUser()
+        return VaryingView.as_view()(request)
+
+    assert get()['Vary'] == 'Accept-Language'
+    with django_assert_num_queries(0):
+        assert get()['Vary'] == 'Accept-Language'
+
+@pytest.mark.django_db
+def test_project_detail_conditional_get(client, django_assert_num_queries):
+    """Tests that repeat requests with validators get a 304 until the gallery or its derivatives change."""
+    from mainapp.images import process_queued
+    from mainapp.models import ImageDerivativeJob, ProjectImage
+    from mainapp.signals import page_cache_tags
+    project = Project.objects.create(title="Conditional", status='PUBLISHED', brief_description="Test")
+    url = reverse('mainapp:project_detail', kwargs={'slug': project.slug})
+    response = client.get(url)
+    etag = response['ETag']
+    assert response.has_header('Last-Modified')
+
+    with django_assert_num_queries(0):
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    image = ProjectImage.objects.create(project=project, image="project_images/new.webp")
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+
+    # Derivatives finishing later change the srcset, so they change the validators too.
+    etag = response['ETag']
+    ImageDerivativeJob.objects.enqueue([image.image.name], page_cache_tags(image))
+    process_queued(batch_size=10)
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+@pytest.mark.django_db
+def test_blog_list_conditional_get_authenticated(admin_client):
+    """Tests that list validators work without the page cache (logged-in users)."""
+    Blog.objects.create(title="Listed", summary="Summary", status='PUBLISHED', header_image_desktop="blog_headers/desktop/listed.webp")
+    url = reverse('mainapp:blog_list')
+    response = admin_client.get(url)
+    assert response.status_code == 200
+    assert admin_client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code == 304
+
+@pytest.mark.django_db
+def test_project_list_single_query_for_cards(admin_client, django_assert_max_num_queries):
+    """Tests that project cards resolve their main image without a query per card."""
+    from mainapp.models import ProjectImage
+    for n in range(5):
+        project = Project.objects.create(title=f"Card {n}", status='PUBLISHED', brief_description="Test")
+        ProjectImage.objects.create(project=project, image=f"project_images/{n}.webp")
+    admin_client.get(reverse('mainapp:project_list'))
+    with django_assert_max_num_queries(4):
+        assert admin_client.get(reverse('mainapp:project_list')).status_code == 200
+
+@pytest.mark.django_db
+def test_project_list_keyset_pagination(client, settings):
+    """Tests that the archive pages by cursor and signature projects are split out."""
+    from mainapp.views import ProjectListView
+    settings.PAGE_CACHE_TIMEOUT = 0
+    Project.objects.create(title="Signature", status='PUBLISHED', brief_description="Test", feature_on_project_page=True)
+    Project.objects.create(title="Draft", brief_description="Test")
+    archived = [
+        Project.objects.create(title=f"Archived {n}", status='PUBLISHED', brief_description="Test")
+        for n in range(ProjectListView.archive_page_size + 3)
+    ]
+    url = reverse('mainapp:project_list')
+
+    first = client.get(url).context
+    assert [p.title for p in first['signature_projects']] == ["Signature"]
+    assert len(first['archive_projects']) == ProjectListView.archive_page_size
+    assert first['archive_total'] == len(archived)
+
+    second = client.get(url, {'after': first['archive_next_cursor']}).context
+    seen = first['archive_projects'] + second['archive_projects']
+    assert {p.pk for p in seen} == {p.pk for p in archived}
+    assert second['archive_next_cursor'] is None
+
+@pytest.mark.django_db
+def test_blog_list_cursor_pages_and_card_projection(client, settings):
+    """Tests that the blog list pages by cursor and never loads the rich-text content."""
+    from mainapp.views import BlogListView
+    settings.PAGE_CACHE_TIMEOUT = 0
+    for n in range(BlogListView.page_size + 2):
+        Blog.objects.create(
+            title=f"Post {n}", summary="Summary", status='PUBLISHED', content="<p>Body</p>",
+            header_image_desktop=f"blog_headers/desktop/{n}.webp",
+        )
+    url = reverse('mainapp:blog_list')
+
+    first = client.get(url).context
+    assert len(first['blogs']) == BlogListView.page_size
+    assert 'content' in first['blogs'][0].get_deferred_fields()
+
+    second = client.get(url, {'after': first['next_cursor']}).context
+    assert len(second['blogs']) == 2
+    assert second['next_cursor'] is None
+
+@pytest.mark.django_db
+def test_search_view_ranks_and_follows_edits(client, django_assert_max_num_queries):
+    """Tests BM25-ranked prefix search and that saves and deletes update the index incrementally."""
+    from mainapp.models import SearchTerm
+    header = {'header_image_desktop': 'blog_headers/desktop/h.webp', 'header_image_mobile': 'blog_headers/mobile/h.webp'}
+    project = Project.objects.create(title="Geopolymer Highway", status='PUBLISHED', brief_description="A road.",
+                                     detail_content="<p>Built with <strong>geopolymer</strong> concrete.</p>")
+    Blog.objects.create(title="Why curing matters", status='PUBLISHED', summary="Curing water.",
+                        content="<p>Geopolymer needs no water curing.</p>", **header)
+    Blog.objects.create(title="Geopolymer draft", status='DRAFT', summary="Unpublished.", content="x", **header)
+
+    url = reverse('mainapp:search')
+    with django_assert_max_num_queries(4):
+        response = client.get(url, {'q': 'geopoly'})
+    assert [r.title for r in response.context['results']] == ["Geopolymer Highway", "Why curing matters"]
+    assert [r.title for r in client.get(url, {'q': 'strong'}).context['results']] == []  # Markup is not indexed
+
+    project.title = "Slag Highway"
+    project.detail_content = "<p>Steel slag base.</p>"
+    project.save()
+    response = client.get(url, {'q': 'geopolymer'})
+    assert [r.title for r in response.context['results']] == ["Why curing matters"]
+    assert SearchTerm.objects.get(term='geopolymer').document_count == 1
+
+    project.delete()
+    assert client.get(url, {'q': 'slag'}).context['results'] == []
+    assert SearchTerm.objects.get(term='slag').document_count == 0
+
+@pytest.mark.django_db
+def test_search_results_bypass_the_page_cache(client, django_assert_num_queries):
+    """Tests that only the empty search page is cached, so arbitrary queries cannot fill the cache."""
+    Project.objects.create(title="Geopolymer Highway", status='PUBLISHED', brief_description="A road.")
+    url = reverse('mainapp:search')
+    client.get(url)
+    with django_assert_num_queries(0):
+        client.get(url)
+
+    client.get(url, {'q': 'geo'})
+    with django_assert_num_queries(4):
+        assert len(client.get(url, {'q': 'geo'}).context['results']) == 1
+
+@pytest.mark.django_db
+def test_blog_tag_pages_follow_the_tags_field(client, settings):
+    """Tests that tag pages and counts read the tag index, which saves, unpublishing and deletes keep current."""
+    from mainapp.models import BlogTag, Tag
+    settings.PAGE_CACHE_TIMEOUT = 0
+    header = {'header_image_desktop': 'blog_headers/desktop/h.webp', 'header_image_mobile': 'blog_headers/mobile/h.webp'}
+    first = Blog.objects.create(title="Fly ash roads", status='PUBLISHED', summary="S", content="x",
+                                tags="Fly Ash, geopolymer", **header)
+    second = Blog.objects.create(title="Slag", status='PUBLISHED', summary="S", content="x",
+                                 tags="fly-ash,  Slag ,,", **header)
+    Blog.objects.create(title="Draft", status='DRAFT', summary="S", content="x", tags="Fly ash", **header)
+
+    assert dict(Tag.objects.in_use().values_list('slug', 'blog_count')) == {'fly-ash': 2, 'geopolymer': 1, 'slag': 1}
+    response = client.get(reverse('mainapp:blog_tag', kwargs={'slug': 'fly-ash'}))
+    assert [blog.title for blog in response.context['blogs']] == ["Slag", "Fly ash roads"]
+    assert response.context['tag'].name == "Fly Ash"
+    assert client.get(reverse('mainapp:blog_tag', kwargs={'slug': 'missing'})).status_code == 404
+
+    first.tags = "geopolymer"
+    first.save()
+    second.status = 'DRAFT'
+    second.save()
+    assert dict(Tag.objects.values_list('slug', 'blog_count')) == {'fly-ash': 0, 'geopolymer': 1, 'slag': 0}
+    assert client.get(reverse('mainapp:blog_tag', kwargs={'slug': 'fly-ash'})).context['blogs'] == []
+
+    # A batched rebuild gives the same index.
+    incremental = sorted(BlogTag.objects.values_list('blog_id', 'tag__slug'))
+    BlogTag.objects.rebuild(batch_size=2)
+    assert sorted(BlogTag.objects.values_list('blog_id', 'tag__slug')) == incremental
+
+    first.delete()
+    assert Tag.objects.get(slug='geopolymer').blog_count == 0